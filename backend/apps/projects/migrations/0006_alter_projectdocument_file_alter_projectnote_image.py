@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:09
+
+import apps.projects.models
+import apps.wallet.storage
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_project_projects_pr_status_d9e5a3_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='projectdocument',
+            name='file',
+            field=models.FileField(storage=apps.wallet.storage.get_content_storage, upload_to=apps.projects.models.project_document_upload_path, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'doc', 'docx', 'txt', 'md', 'xlsx', 'xls', 'ppt', 'pptx', 'jpg', 'jpeg', 'png', 'gif', 'svg', 'zip', 'rar'])]),
+        ),
+        migrations.AlterField(
+            model_name='projectnote',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=apps.wallet.storage.get_content_storage, upload_to=apps.projects.models.project_note_image_upload_path),
+        ),
+    ]
@@ -5,6 +5,9 @@ from django.core.validators import URLValidator, FileExtensionValidator
 import uuid
 import os
 
+from apps.wallet.storage import get_content_storage
+from nvms.memo import memoized_property
+
 
 class ProjectStatus(models.TextChoices):
     PLANNING = 'planning', 'Planning'
@@ -197,7 +200,7 @@ class Project(models.Model):
         
         return Portfolio.objects.create(**portfolio_data)
     
-    @property
+    @memoized_property(depends_on=['projects.ProjectAssignment'])
     def team_members(self):
         """Get all assigned team members"""
         return User.objects.filter(
@@ -214,7 +217,7 @@ class Project(models.Model):
             project_assignments__is_active=True
         ).distinct()
     
-    @property
+    @memoized_property(depends_on=['projects.ProjectDocument'])
     def document_count(self):
         """Get total number of documents"""
         return self.documents.count()
@@ -224,7 +227,7 @@ class Project(models.Model):
         """Get number of confidential documents"""
         return self.documents.filter(is_confidential=True).count()
     
-    @property
+    @memoized_property(depends_on=['projects.ProjectTagAssignment'])
     def tags(self):
         """Get all associated tags"""
         return ProjectTag.objects.filter(projecttagassignment__project=self)
@@ -263,7 +266,9 @@ class ProjectNote(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='notes')
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
-    image = models.ImageField(upload_to=project_note_image_upload_path, null=True, blank=True)
+    image = models.ImageField(
+        upload_to=project_note_image_upload_path, storage=get_content_storage, null=True, blank=True
+    )
     mentioned_users = models.ManyToManyField(User, related_name='mentioned_in_notes', blank=True)
     is_internal = models.BooleanField(default=True)  # False for client-visible notes
     created_at = models.DateTimeField(auto_now_add=True)
@@ -295,6 +300,7 @@ class ProjectDocument(models.Model):
     )
     file = models.FileField(
         upload_to=project_document_upload_path,
+        storage=get_content_storage,
         validators=[FileExtensionValidator(allowed_extensions=[
             'pdf', 'doc', 'docx', 'txt', 'md', 'xlsx', 'xls', 'ppt', 'pptx',
             'jpg', 'jpeg', 'png', 'gif', 'svg', 'zip', 'rar'
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from nvms.fieldsets import SparseFieldsetSerializerMixin
 from .models import (
     Project, ProjectTag, ProjectTagAssignment, ProjectNote,
     ProjectDocument, ProjectAssignment
@@ -70,7 +71,7 @@ class ProjectAssignmentSerializer(serializers.ModelSerializer):
         read_only_fields = ['assigned_by', 'assigned_date']
 
 
-class ProjectListSerializer(serializers.ModelSerializer):
+class ProjectListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for project list view with essential fields"""
     assigned_to = UserSerializer(read_only=True)
     supervisor = UserSerializer(read_only=True)
@@ -91,9 +92,15 @@ class ProjectListSerializer(serializers.ModelSerializer):
             'updated_at', 'progress_percentage', 'is_overdue', 'tags', 'document_count',
             'team_member_count'
         ]
+        # Detail-only relations, available on the list with ?expand=
+        expandable_fields = {
+            'notes': ('notes', lambda: ProjectNoteSerializer(many=True, read_only=True)),
+            'documents': ('documents', lambda: ProjectDocumentSerializer(many=True, read_only=True)),
+            'assignments': ('assignments', lambda: ProjectAssignmentSerializer(many=True, read_only=True)),
+        }
 
 
-class ProjectDetailSerializer(serializers.ModelSerializer):
+class ProjectDetailSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Detailed serializer for project detail view"""
     assigned_to = UserSerializer(read_only=True)
     supervisor = UserSerializer(read_only=True)
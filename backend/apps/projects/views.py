@@ -6,6 +6,10 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth.models import User
 from django.db.models import Count, Q
+from apps.wallet.caching import cached_response
+from nvms.renderers import StreamingListMixin
+from nvms.fieldsets import QueryPlanMixin
+from nvms.columnar import ColumnarListMixin, wants_columnar
 from .models import Project, ProjectTag, ProjectNote, ProjectDocument, ProjectAssignment
 from .serializers import (
     ProjectListSerializer,
@@ -19,16 +23,33 @@ from .serializers import (
 )
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
-    queryset = Project.objects.filter(is_active=True).select_related(
-        'assigned_to', 'supervisor', 'created_by'
-    ).prefetch_related('tag_assignments__tag', 'notes', 'documents', 'assignments__user')
+class ProjectViewSet(ColumnarListMixin, StreamingListMixin, QueryPlanMixin, viewsets.ModelViewSet):
+    queryset = Project.objects.filter(is_active=True)
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'priority', 'assigned_to', 'supervisor', 'created_by']
     search_fields = ['title', 'description', 'client_name']
     ordering_fields = ['created_at', 'updated_at', 'due_date', 'priority']
     ordering = ['-created_at']
+    select_related_fields = {
+        'assigned_to': ['assigned_to'],
+        'supervisor': ['supervisor'],
+        'created_by': ['created_by'],
+    }
+    prefetch_related_fields = {
+        'notes': ['notes__author', 'notes__mentioned_users'],
+        'documents': ['documents__uploaded_by'],
+        'assignments': ['assignments__user', 'assignments__assigned_by'],
+    }
+    columnar_fields = [
+        'id', 'title', 'status', 'priority', 'start_date', 'due_date', 'client_name',
+        'budget', 'estimated_hours', 'actual_hours', 'manual_progress',
+        'assigned_to', 'supervisor', 'created_at',
+    ]
+    columnar_dictionaries = {
+        'assigned_to': ['username'],
+        'supervisor': ['username'],
+    }
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -38,18 +59,24 @@ class ProjectViewSet(viewsets.ModelViewSet):
         return ProjectDetailSerializer
     
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = self.apply_query_plan(super().get_queryset())
         
-        # Annotate counts for list view to avoid N+1 queries
-        if self.action == 'list':
-            queryset = queryset.annotate(
-                team_member_count_annotated=Count(
-                    'assignments', 
-                    filter=Q(assignments__is_active=True),
-                    distinct=True
-                ),
-                document_count_annotated=Count('documents', distinct=True)
-            )
+        # Annotate counts for list view to avoid N+1 queries, skipping the
+        # joins when ?fields= leaves the counts out
+        if self.action == 'list' and not wants_columnar(self.request):
+            fields = self.get_rendered_field_names()
+            if 'team_member_count' in fields:
+                queryset = queryset.annotate(
+                    team_member_count_annotated=Count(
+                        'assignments', 
+                        filter=Q(assignments__is_active=True),
+                        distinct=True
+                    )
+                )
+            if 'document_count' in fields:
+                queryset = queryset.annotate(
+                    document_count_annotated=Count('documents', distinct=True)
+                )
         
         # Filter by status if provided
         status_filter = self.request.query_params.get('status')
@@ -295,6 +322,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
             )
     
     @action(detail=False)
+    @cached_response(tags=[Project])
     def stats(self, request):
         """Get project statistics - optimized with conditional aggregation"""
         queryset = self.get_queryset()
@@ -1,9 +1,11 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from .models import (
     Currency, Wallet, TransactionCategory, TransactionTag,
     Income, Expense, Subscription, Budget, SavingsGoal,
-    TransactionHistory
+    TransactionHistory, Transfer, StoredFile, ExchangeRateSnapshot, IdempotencyKey,
+    AccountingPeriod, PeriodWalletBalance, PeriodCategoryTotal, JobRun
 )
+from .reconciliation import reconcile_wallets
 
 
 @admin.register(Currency)
@@ -14,6 +16,14 @@ class CurrencyAdmin(admin.ModelAdmin):
     ordering = ['code']
 
 
+@admin.register(ExchangeRateSnapshot)
+class ExchangeRateSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['currency', 'date', 'exchange_rate_to_base']
+    list_filter = ['currency']
+    date_hierarchy = 'date'
+    ordering = ['-date', 'currency']
+
+
 @admin.register(Wallet)
 class WalletAdmin(admin.ModelAdmin):
     list_display = ['name', 'wallet_type', 'balance', 'currency', 'is_active', 'created_at']
@@ -21,6 +31,29 @@ class WalletAdmin(admin.ModelAdmin):
     search_fields = ['name']
     ordering = ['-created_at']
     readonly_fields = ['created_at', 'updated_at']
+    actions = ['check_balances', 'repair_balances']
+
+    def _report_reconciliation(self, request, results, repair):
+        if not results:
+            self.message_user(request, 'All selected wallet balances match their transactions', messages.SUCCESS)
+            return
+        for row in results:
+            self.message_user(
+                request,
+                f"{row['wallet']}: stored {row['balance']}, expected {row['expected_balance']} "
+                f"(drift {row['balance_drift']} {row['currency']})",
+                messages.SUCCESS if repair else messages.WARNING
+            )
+        if repair:
+            self.message_user(request, f"Repaired {len(results)} wallet(s)", messages.SUCCESS)
+
+    @admin.action(description='Check balances against transactions')
+    def check_balances(self, request, queryset):
+        self._report_reconciliation(request, reconcile_wallets(queryset), repair=False)
+
+    @admin.action(description='Repair balance drift')
+    def repair_balances(self, request, queryset):
+        self._report_reconciliation(request, reconcile_wallets(queryset, repair=True), repair=True)
 
 
 @admin.register(TransactionCategory)
@@ -103,3 +136,87 @@ class TransactionHistoryAdmin(admin.ModelAdmin):
     
     def has_change_permission(self, request, obj=None):
         return False
+
+
+@admin.register(Transfer)
+class TransferAdmin(admin.ModelAdmin):
+    list_display = ['source_wallet', 'target_wallet', 'source_amount', 'target_amount', 'date', 'created_at']
+    list_filter = ['source_wallet', 'target_wallet']
+    search_fields = ['description']
+    date_hierarchy = 'date'
+    ordering = ['-date', '-created_at']
+    # Balances are moved by create_transfers(), so transfers are read-only here
+    readonly_fields = [
+        'source_wallet', 'target_wallet', 'source_amount', 'target_amount', 'exchange_rate',
+        'amount_rwf', 'date', 'description', 'created_by', 'created_at'
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+
+class PeriodWalletBalanceInline(admin.TabularInline):
+    model = PeriodWalletBalance
+    extra = 0
+    can_delete = False
+    readonly_fields = [
+        'wallet', 'closing_balance', 'closing_balance_rwf', 'income_total', 'expense_total',
+        'transfers_in', 'transfers_out'
+    ]
+
+
+class PeriodCategoryTotalInline(admin.TabularInline):
+    model = PeriodCategoryTotal
+    extra = 0
+    can_delete = False
+    readonly_fields = ['category', 'kind', 'total_rwf', 'count']
+
+
+@admin.register(AccountingPeriod)
+class AccountingPeriodAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'start_date', 'end_date', 'closed_by', 'closed_at']
+    ordering = ['-end_date']
+    # Periods are closed and reopened through periods.py (API or close_period command)
+    readonly_fields = ['year', 'month', 'start_date', 'end_date', 'closed_by', 'closed_at']
+    inlines = [PeriodWalletBalanceInline, PeriodCategoryTotalInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(JobRun)
+class JobRunAdmin(admin.ModelAdmin):
+    list_display = ['job', 'worker', 'status', 'claimed', 'processed', 'failed', 'duration_ms', 'started_at']
+    list_filter = ['job', 'status']
+    ordering = ['-started_at']
+    readonly_fields = [
+        'job', 'worker', 'status', 'chunks', 'claimed', 'processed', 'failed', 'errors',
+        'triggered_by', 'started_at', 'finished_at', 'duration_ms'
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(StoredFile)
+class StoredFileAdmin(admin.ModelAdmin):
+    list_display = ['name', 'mime_type', 'size', 'upload_count', 'created_at']
+    list_filter = ['mime_type']
+    search_fields = ['digest', 'name']
+    ordering = ['-created_at']
+    readonly_fields = ['digest', 'name', 'size', 'mime_type', 'upload_count', 'created_at']
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ['key', 'user', 'method', 'path', 'status_code', 'created_at', 'expires_at']
+    list_filter = ['method', 'status_code']
+    search_fields = ['key', 'path']
+    ordering = ['-created_at']
+    readonly_fields = [
+        'key', 'user', 'method', 'path', 'request_fingerprint',
+        'status_code', 'response_data', 'created_at', 'expires_at'
+    ]
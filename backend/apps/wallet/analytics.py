@@ -0,0 +1,123 @@
+"""
+Grouped analytics queries: category rollups, tag totals and category × month
+
+Each function returns the result of a single SQL statement. Category
+rollups include every subcategory through a prefix match on the stored
+category path, and tag totals go through the `tags` M2M table. All
+amounts are in RWF (amount_rwf).
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.utils.dateparse import parse_date
+from django.db.models import Count, DecimalField, F, Func, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+
+from .models import Income, Expense, TransactionCategory, TransactionTag
+
+AMOUNT_FIELD = DecimalField(max_digits=15, decimal_places=2)
+
+TRANSACTION_MODELS = {'income': Income, 'expense': Expense}
+
+
+def date_range_filters(start_date=None, end_date=None) -> dict:
+    """
+    Filters on the transaction date for an optional inclusive range of
+    YYYY-MM-DD strings. Raises ValueError for malformed dates.
+    """
+    filters = {}
+    for lookup, value in (('date__gte', start_date), ('date__lte', end_date)):
+        if value:
+            try:
+                parsed = parse_date(value)
+            except ValueError:
+                parsed = None
+            if parsed is None:
+                raise ValueError(f"Invalid date: {value} (expected YYYY-MM-DD)")
+            filters[lookup] = parsed
+    return filters
+
+
+def month_range_filters(year, month, field='date') -> dict:
+    """
+    Half-open range filters for one calendar month, e.g. date__gte=2026-10-01
+    and date__lt=2026-11-01. Unlike date__year/date__month, which compile to
+    EXTRACT() (strftime on SQLite) per row, a plain range can seek the
+    indexes that start with the date. Raises ValueError for an invalid month.
+    """
+    if not 1 <= month <= 12:
+        raise ValueError(f"Invalid month: {month}")
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return {f'{field}__gte': start, f'{field}__lt': end}
+
+
+def year_range_filters(year, field='date') -> dict:
+    """Half-open range filters for one calendar year (see month_range_filters)"""
+    return {f'{field}__gte': date(year, 1, 1), f'{field}__lt': date(year + 1, 1, 1)}
+
+
+def _correlated_total(queryset):
+    """SUM(amount_rwf) of a correlated queryset, without grouping"""
+    totals = queryset.order_by().annotate(
+        total=Func(F('amount_rwf'), function='SUM', output_field=AMOUNT_FIELD)
+    ).values('total')
+    return Coalesce(Subquery(totals, output_field=AMOUNT_FIELD), Value(Decimal('0')), output_field=AMOUNT_FIELD)
+
+
+def _correlated_count(queryset):
+    """COUNT(*) of a correlated queryset, without grouping"""
+    counts = queryset.order_by().annotate(
+        count=Func(F('pk'), function='COUNT', output_field=IntegerField())
+    ).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def category_rollups(filters=None, categories=None):
+    """
+    Categories annotated with income and expense totals and counts over
+    the category and all of its subcategories (prefix match on `path`)
+    """
+    filters = filters or {}
+    categories = TransactionCategory.objects.all() if categories is None else categories
+    annotations = {}
+    for kind, model in TRANSACTION_MODELS.items():
+        subtree = model.objects.filter(category__path__startswith=OuterRef('path'), **filters)
+        annotations[f'{kind}_total'] = _correlated_total(subtree)
+        annotations[f'{kind}_count'] = _correlated_count(subtree)
+    return categories.annotate(**annotations).order_by('path')
+
+
+def tag_totals(filters=None, tags=None):
+    """Tags annotated with the income and expense totals and counts of their transactions"""
+    filters = filters or {}
+    tags = TransactionTag.objects.all() if tags is None else tags
+    annotations = {}
+    for kind, model in TRANSACTION_MODELS.items():
+        tagged = model.objects.filter(tags=OuterRef('pk'), **filters)
+        annotations[f'{kind}_total'] = _correlated_total(tagged)
+        annotations[f'{kind}_count'] = _correlated_count(tagged)
+    return tags.annotate(**annotations).order_by('name')
+
+
+def category_month_totals(filters=None, kinds=None):
+    """
+    Totals per (type, category, month): one GROUP BY per transaction type,
+    combined with UNION ALL into a single statement
+    """
+    filters = filters or {}
+    kinds = kinds or list(TRANSACTION_MODELS)
+    grouped = [
+        TRANSACTION_MODELS[kind].objects.filter(**filters).order_by().values(
+            'category_id',
+            category_name=F('category__full_path'),
+            month=TruncMonth('date'),
+            type=Value(kind),
+        ).annotate(
+            total=Sum('amount_rwf'),
+            count=Count('id'),
+        )
+        for kind in kinds
+    ]
+    queryset = grouped[0].union(*grouped[1:], all=True) if len(grouped) > 1 else grouped[0]
+    return queryset.order_by('month', 'category_name', 'type')
@@ -0,0 +1,298 @@
+"""
+Expense anomaly detection for month-end review
+
+Flags three kinds of unusual spending, computed over NumPy arrays pulled
+with one values_list() per window instead of looping over ORM rows:
+
+- amount outliers: expenses whose modified z-score within their category
+  (0.6745 * (x - median) / MAD) exceeds the threshold
+- subscription price jumps: a renewal charged noticeably more than the
+  previous one, or an active subscription now priced above its last renewal
+- spending spikes: days where a wallet's or category's total is far above
+  the mean of the preceding baseline days
+
+Reports are cached under the Expense and Subscription cache tag versions,
+so they are reused until a transaction or subscription changes.
+"""
+import hashlib
+import logging
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .caching import get_tag_versions, model_tag, record_cache_access, STATS_NAMESPACES
+from .models import Expense, Subscription, TransactionCategory, Wallet
+
+logger = logging.getLogger(__name__)
+
+# Days of expenses reviewed per report
+ANOMALY_WINDOW_DAYS = getattr(settings, 'ANOMALY_WINDOW_DAYS', 90)
+
+# Modified z-score above which an amount is an outlier (Iglewicz & Hoaglin)
+ANOMALY_Z_THRESHOLD = getattr(settings, 'ANOMALY_Z_THRESHOLD', 3.5)
+
+# Categories with fewer expenses in the window are not scored
+ANOMALY_MIN_SAMPLES = getattr(settings, 'ANOMALY_MIN_SAMPLES', 5)
+
+# Preceding days a daily total is compared against
+ANOMALY_BASELINE_DAYS = getattr(settings, 'ANOMALY_BASELINE_DAYS', 30)
+
+# A spike is above baseline mean + this many standard deviations ...
+ANOMALY_SPIKE_STD = getattr(settings, 'ANOMALY_SPIKE_STD', 3.0)
+# ... and at least this multiple of the baseline daily mean
+ANOMALY_SPIKE_RATIO = getattr(settings, 'ANOMALY_SPIKE_RATIO', 2.0)
+
+# Relative increase between renewals reported as a price jump
+SUBSCRIPTION_PRICE_JUMP = getattr(settings, 'SUBSCRIPTION_PRICE_JUMP', 0.2)
+
+# Renewals are compared over a year so yearly plans have a previous charge
+SUBSCRIPTION_HISTORY_DAYS = 400
+
+# Reports are keyed by tag versions; the timeout only bounds stale entries
+ANOMALY_CACHE_TIMEOUT = getattr(settings, 'ANOMALY_CACHE_TIMEOUT', 60 * 60 * 24)
+
+ANOMALY_KEY = 'wallet:anomalies:{digest}'
+
+# Renewal expenses are linked to their subscription only through this text
+RENEWAL_DESCRIPTION_PREFIX = 'Auto-generated from subscription: '
+
+MAD_SCALE = 0.6745
+
+STATS_NAMESPACES.add('anomalies')
+
+
+def group_medians(groups, values, group_count):
+    """Median of `values` per group id (0..group_count-1), fully vectorized"""
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+    counts = np.bincount(groups, minlength=group_count)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    safe_counts = np.maximum(counts, 1)
+    low = sorted_values[np.minimum(starts + (safe_counts - 1) // 2, len(values) - 1)]
+    high = sorted_values[np.minimum(starts + safe_counts // 2, len(values) - 1)]
+    return np.where(counts > 0, (low + high) / 2, np.nan), counts
+
+
+def robust_z_scores(groups, values, group_count):
+    """
+    Modified z-score of each value within its group. Groups with a zero MAD
+    fall back to the mean absolute deviation (scaled to match), and score 0
+    when every value is the same.
+    """
+    medians, counts = group_medians(groups, values, group_count)
+    deviations = np.abs(values - medians[groups])
+    mad, _ = group_medians(groups, deviations, group_count)
+    mean_deviation = np.bincount(groups, weights=deviations, minlength=group_count) / np.maximum(counts, 1)
+    spread = np.where(mad > 0, mad, mean_deviation * 1.2533 * MAD_SCALE)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = MAD_SCALE * (values - medians[groups]) / spread[groups]
+    return np.nan_to_num(scores, nan=0.0, posinf=0.0, neginf=0.0), counts, medians
+
+
+def daily_spikes(group_index, day_index, amounts, group_count, day_count, first_day):
+    """
+    (group, day, total, baseline mean) for every day from `first_day` whose
+    total is a spike against the preceding ANOMALY_BASELINE_DAYS days
+    """
+    totals = np.zeros((group_count, day_count))
+    np.add.at(totals, (group_index, day_index), amounts)
+
+    # Prefix sums give every trailing window sum in one subtraction
+    baseline = ANOMALY_BASELINE_DAYS
+    padded = np.zeros((group_count, day_count + 1))
+    padded_squares = np.zeros((group_count, day_count + 1))
+    np.cumsum(totals, axis=1, out=padded[:, 1:])
+    np.cumsum(totals ** 2, axis=1, out=padded_squares[:, 1:])
+
+    days = np.arange(first_day, day_count)
+    window_sum = padded[:, days] - padded[:, days - baseline]
+    window_squares = padded_squares[:, days] - padded_squares[:, days - baseline]
+    mean = window_sum / baseline
+    std = np.sqrt(np.maximum(window_squares / baseline - mean ** 2, 0))
+
+    current = totals[:, days]
+    spikes = (
+        (mean > 0)
+        & (current > mean + ANOMALY_SPIKE_STD * std)
+        & (current >= ANOMALY_SPIKE_RATIO * mean)
+    )
+    rows, columns = np.nonzero(spikes)
+    return [
+        (int(row), int(days[column]), float(current[row, column]), float(mean[row, column]))
+        for row, column in zip(rows, columns)
+    ]
+
+
+def _round(value):
+    return round(float(value), 2)
+
+
+def amount_outliers(ids, titles, dates, categories, amounts, in_window, threshold):
+    """Expenses in the window whose amount is an outlier within its category"""
+    ids, titles, dates = ids[in_window], titles[in_window], dates[in_window]
+    categories, amounts = categories[in_window], amounts[in_window]
+    if not len(ids):
+        return []
+
+    category_ids, groups = np.unique(categories, return_inverse=True)
+    scores, counts, medians = robust_z_scores(groups, amounts, len(category_ids))
+    flagged = np.flatnonzero((np.abs(scores) > threshold) & (counts[groups] >= ANOMALY_MIN_SAMPLES))
+    flagged = flagged[np.argsort(-np.abs(scores[flagged]))]
+
+    names = dict(TransactionCategory.objects.filter(
+        pk__in=category_ids[groups[flagged]].tolist()
+    ).values_list('id', 'full_path'))
+    return [
+        {
+            'expense_id': int(ids[i]),
+            'title': str(titles[i]),
+            'date': dates[i],
+            'category_id': int(categories[i]),
+            'category': names.get(int(categories[i])),
+            'amount_rwf': _round(amounts[i]),
+            'category_median_rwf': _round(medians[groups[i]]),
+            'score': _round(scores[i]),
+        }
+        for i in flagged
+    ]
+
+
+def spending_spikes(dates, keys, amounts, start, first_date, names, kind):
+    """Daily spending spikes per wallet or category"""
+    if not len(dates):
+        return []
+    key_ids, groups = np.unique(keys, return_inverse=True)
+    day_index = (dates - np.datetime64(first_date)).astype(int)
+    day_count = int(day_index.max()) + 1
+    first_day = max((start - first_date).days, ANOMALY_BASELINE_DAYS)
+    if first_day >= day_count:
+        return []
+
+    spikes = daily_spikes(groups, day_index, amounts, len(key_ids), day_count, first_day)
+    spikes.sort(key=lambda spike: spike[2] / spike[3], reverse=True)
+    return [
+        {
+            kind: names.get(int(key_ids[group])),
+            f'{kind}_id': int(key_ids[group]),
+            'date': first_date + timedelta(days=day),
+            'total_rwf': _round(total),
+            'baseline_mean_rwf': _round(mean),
+            'ratio': _round(total / mean),
+        }
+        for group, day, total, mean in spikes
+    ]
+
+
+def subscription_price_jumps(today):
+    """Renewals charged more than the previous renewal of the same subscription"""
+    rows = Expense.objects.filter(
+        description__startswith=RENEWAL_DESCRIPTION_PREFIX,
+        date__gte=today - timedelta(days=SUBSCRIPTION_HISTORY_DAYS)
+    ).order_by().values_list('id', 'description', 'date', 'amount')
+    jumps = []
+    last_renewal = {}
+    if rows:
+        ids, descriptions, dates, amounts = zip(*rows)
+        names = np.array([description[len(RENEWAL_DESCRIPTION_PREFIX):] for description in descriptions])
+        dates = np.array(dates, dtype='datetime64[D]')
+        amounts = np.array(amounts, dtype=float)
+        order = np.lexsort((dates, names))
+        names, dates, amounts = names[order], dates[order], amounts[order]
+        ids = np.array(ids)[order]
+
+        same_subscription = names[1:] == names[:-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = amounts[1:] / amounts[:-1] - 1
+        for i in np.flatnonzero(same_subscription & (change > SUBSCRIPTION_PRICE_JUMP)):
+            jumps.append({
+                'subscription': str(names[i + 1]),
+                'expense_id': int(ids[i + 1]),
+                'date': dates[i + 1].item(),
+                'previous_amount': _round(amounts[i]),
+                'amount': _round(amounts[i + 1]),
+                'change': _round(change[i]),
+            })
+        # Last index of each subscription name holds its latest renewal
+        last = np.flatnonzero(np.append(~same_subscription, True))
+        last_renewal = {str(names[i]): float(amounts[i]) for i in last}
+
+    # Active subscriptions whose current price is already above the last charge
+    for subscription_id, name, amount in Subscription.objects.filter(
+        status='active', name__in=list(last_renewal)
+    ).values_list('id', 'name', 'amount'):
+        previous = last_renewal[name]
+        if previous and float(amount) / previous - 1 > SUBSCRIPTION_PRICE_JUMP:
+            jumps.append({
+                'subscription': name,
+                'subscription_id': subscription_id,
+                'date': None,
+                'previous_amount': _round(previous),
+                'amount': _round(amount),
+                'change': _round(float(amount) / previous - 1),
+            })
+    return jumps
+
+
+def detect_anomalies(days=ANOMALY_WINDOW_DAYS, threshold=ANOMALY_Z_THRESHOLD, today=None) -> dict:
+    """Build the anomaly report for the last `days` days"""
+    today = today or timezone.now().date()
+    start = today - timedelta(days=days - 1)
+    first_date = start - timedelta(days=ANOMALY_BASELINE_DAYS)
+
+    # One pull covers the reviewed window and the baseline before it
+    rows = list(Expense.objects.filter(
+        date__gte=first_date, date__lte=today
+    ).order_by().values_list('id', 'title', 'date', 'category_id', 'wallet_id', 'amount_rwf'))
+
+    outliers, wallet_spikes, category_spikes = [], [], []
+    reviewed = 0
+    if rows:
+        ids, titles, dates, categories, wallets, amounts = (np.array(column) for column in zip(*rows))
+        dates = dates.astype('datetime64[D]')
+        amounts = amounts.astype(float)
+        in_window = dates >= np.datetime64(start)
+        reviewed = int(in_window.sum())
+
+        outliers = amount_outliers(ids, titles, dates.astype(object), categories, amounts, in_window, threshold)
+        wallet_names = dict(Wallet.objects.filter(pk__in=np.unique(wallets).tolist()).values_list('id', 'name'))
+        category_names = dict(TransactionCategory.objects.filter(
+            pk__in=np.unique(categories).tolist()
+        ).values_list('id', 'full_path'))
+        wallet_spikes = spending_spikes(dates, wallets, amounts, start, first_date, wallet_names, 'wallet')
+        category_spikes = spending_spikes(dates, categories, amounts, start, first_date, category_names, 'category')
+
+    return {
+        'start_date': start,
+        'end_date': today,
+        'threshold': threshold,
+        'expenses_reviewed': reviewed,
+        'amount_outliers': outliers,
+        'subscription_price_jumps': subscription_price_jumps(today),
+        'wallet_spikes': wallet_spikes,
+        'category_spikes': category_spikes,
+        'generated_at': timezone.now(),
+        'currency': 'RWF',
+    }
+
+
+def get_anomaly_report(days=ANOMALY_WINDOW_DAYS, threshold=ANOMALY_Z_THRESHOLD, refresh=False) -> dict:
+    """Cached anomaly report, rebuilt once expenses or subscriptions change"""
+    versions = get_tag_versions([model_tag(Expense), model_tag(Subscription)])
+    parts = [str(days), str(threshold), str(timezone.now().date())]
+    parts += [f'{tag}:{version}' for tag, version in sorted(versions.items())]
+    cache_key = ANOMALY_KEY.format(digest=hashlib.md5('|'.join(parts).encode()).hexdigest())
+
+    report = None if refresh else cache.get(cache_key)
+    record_cache_access('anomalies', report is not None)
+    if report is None:
+        report = detect_anomalies(days, threshold)
+        cache.set(cache_key, report, ANOMALY_CACHE_TIMEOUT)
+        logger.info(
+            f"Anomaly report for {days} days: {len(report['amount_outliers'])} outliers, "
+            f"{len(report['subscription_price_jumps'])} price jumps, "
+            f"{len(report['wallet_spikes']) + len(report['category_spikes'])} spikes"
+        )
+    return report
@@ -0,0 +1,175 @@
+"""
+Set-based bulk operations on incomes and expenses
+
+Each operation runs in one transaction: a single UPDATE or DELETE for the
+selected rows, one balance change per affected wallet and one bulk insert
+into the audit trail. QuerySet.update() bypasses model signals, so tagged
+response caches are invalidated here explicitly.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .caching import invalidate_tags, model_tag
+from .fingerprints import transaction_fingerprint
+from .models import TransactionHistory
+from .transactions import (
+    AUDIT_FIELDS, InsufficientBalanceError, PeriodClosedError, RateSnapshot, apply_balance_deltas, balance_sign,
+    ensure_open, jsonable, lock_wallets
+)
+
+BULK_OPERATIONS = ['recategorize', 'retag', 'reassign_project', 'change_wallet', 'delete']
+
+TAG_MODES = ['add', 'remove', 'set']
+
+# Upper bound on ids per request, keeps the IN (...) lists and locks bounded
+BULK_MAX_IDS = getattr(settings, 'BULK_MAX_IDS', 5000)
+
+
+class BulkActionError(Exception):
+    """A bulk operation could not be applied; nothing was changed"""
+
+
+def apply_wallet_deltas(deltas: dict):
+    """
+    Apply one aggregated balance change per wallet. Wallets are locked in id
+    order so concurrent bulk operations can't deadlock each other.
+    """
+    deltas = {wallet_id: delta for wallet_id, delta in deltas.items() if delta}
+    try:
+        apply_balance_deltas(lock_wallets(deltas), deltas, RateSnapshot())
+    except InsufficientBalanceError as e:
+        raise BulkActionError(str(e))
+
+
+def ensure_rows_open(rows):
+    """Refuse to touch transactions dated in a closed period"""
+    try:
+        ensure_open(*(row['date'] for row in rows))
+    except PeriodClosedError as e:
+        raise BulkActionError(str(e))
+
+
+def wallet_totals(queryset) -> dict:
+    """Sum of amounts per wallet, in each wallet's currency"""
+    return {
+        row['wallet_id']: row['total']
+        for row in queryset.order_by().values('wallet_id').annotate(total=Sum('amount'))
+    }
+
+
+def retag(model, ids, tag_ids, mode):
+    """Add, remove or replace tags on many transactions through the M2M table"""
+    through = model.tags.through
+    source = model.tags.field.m2m_field_name()
+    target = model.tags.field.m2m_reverse_field_name()
+    existing = through.objects.filter(**{f'{source}_id__in': ids})
+
+    if mode == 'remove':
+        existing.filter(**{f'{target}_id__in': tag_ids}).delete()
+        return
+    if mode == 'set':
+        existing.delete()
+    through.objects.bulk_create(
+        [through(**{f'{source}_id': pk, f'{target}_id': tag_id}) for pk in ids for tag_id in tag_ids],
+        ignore_conflicts=True
+    )
+
+
+def bulk_update_transactions(model, ids, operation, data, user) -> dict:
+    """
+    Apply a bulk operation to the incomes or expenses with the given ids.
+    Raises BulkActionError (and changes nothing) if any id is missing or the
+    operation isn't valid for the selection.
+    """
+    entity_type = model._meta.model_name
+    sign = balance_sign(model)
+    category_types = [entity_type, 'both']
+
+    with transaction.atomic():
+        rows = {
+            row['id']: row
+            for row in model.objects.select_for_update().filter(pk__in=ids).values('id', *AUDIT_FIELDS)
+        }
+        missing = sorted(set(ids) - set(rows))
+        if missing:
+            raise BulkActionError(f"{entity_type.title()} not found: {', '.join(map(str, missing))}")
+        ensure_rows_open(rows.values())
+
+        queryset = model.objects.filter(pk__in=list(rows))
+        deltas = defaultdict(Decimal)
+        changes = {}
+
+        if operation == 'recategorize':
+            category = data['category']
+            if category.category_type not in category_types:
+                raise BulkActionError(f"Selected category is not valid for {entity_type}")
+            changes = {'category_id': category.pk}
+
+        elif operation == 'reassign_project':
+            project = data['project']
+            changes = {'project_id': project.pk if project else None}
+
+        elif operation == 'change_wallet':
+            wallet = data['wallet']
+            # Amounts are stored in the wallet's currency, so moving them is
+            # only a relabel when the currencies match
+            if queryset.exclude(wallet__currency_id=wallet.currency_id).exists():
+                raise BulkActionError(
+                    f"Only {wallet.currency.code} {entity_type}s can be moved to {wallet.name}"
+                )
+            for wallet_id, total in wallet_totals(queryset).items():
+                deltas[wallet_id] -= sign * total
+                deltas[wallet.pk] += sign * total
+            changes = {'wallet_id': wallet.pk}
+
+        elif operation == 'delete':
+            for wallet_id, total in wallet_totals(queryset).items():
+                deltas[wallet_id] -= sign * total
+
+        apply_wallet_deltas(deltas)
+
+        if operation == 'retag':
+            tag_ids = [tag.pk for tag in data['tags']]
+            retag(model, list(rows), tag_ids, data['tag_mode'])
+            changes = {'tags': tag_ids, 'tag_mode': data['tag_mode']}
+            queryset.update(updated_at=timezone.now())
+        elif operation == 'delete':
+            queryset.delete()
+        else:
+            queryset.update(**changes, updated_at=timezone.now())
+            if operation == 'change_wallet':
+                # The wallet is part of the duplicate fingerprint
+                model.objects.bulk_update([
+                    model(pk=pk, fingerprint=transaction_fingerprint(row['title'], row['amount'], changes['wallet_id']))
+                    for pk, row in rows.items()
+                ], ['fingerprint'], batch_size=500)
+
+        action = 'delete' if operation == 'delete' else 'update'
+        old_data = jsonable(rows)
+        new_data = jsonable(changes) if changes else None
+        TransactionHistory.objects.bulk_create([
+            TransactionHistory(
+                user=user,
+                action=action,
+                entity_type=entity_type,
+                entity_id=pk,
+                description=f"Bulk {operation.replace('_', ' ')} {entity_type}: {rows[pk]['title']}",
+                old_data=old_data[str(pk)],
+                new_data=new_data,
+            )
+            for pk in rows
+        ], batch_size=500)
+
+        tag = model_tag(model)
+        transaction.on_commit(lambda: invalidate_tags(tag))
+
+    return {
+        'operation': operation,
+        'affected': len(rows),
+        'wallet_deltas': {str(wallet_id): str(delta) for wallet_id, delta in deltas.items() if delta},
+    }
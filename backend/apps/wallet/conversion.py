@@ -0,0 +1,174 @@
+"""
+Report currency conversion for analytics endpoints
+
+Totals are stored in RWF (amount_rwf / balance_rwf), which remain the fast
+path for RWF reports. For any other active currency (`?currency=USD`),
+amounts are summed in SQL per original currency and only those subtotals
+are converted with a rate vector, instead of converting row by row.
+
+`?rates=historical` additionally groups by transaction date and converts
+each subtotal with the rate recorded for that day (ExchangeRateSnapshot),
+falling back to the current rate when no snapshot exists.
+"""
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.db.models import F, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Currency, ExchangeRateSnapshot
+from .transactions import RateSnapshot, TransactionWriteError
+
+BASE_REPORT_CURRENCY = 'RWF'
+
+RATE_MODES = ['current', 'historical']
+
+CENT = Decimal('0.01')
+
+
+class ReportCurrencyError(ValueError):
+    """Invalid ?currency= or ?rates= parameter"""
+
+
+def original_currency():
+    """Currency a transaction was entered in (wallet currency for legacy rows)"""
+    return Coalesce('currency_original__code', 'wallet__currency__code')
+
+
+def original_amount():
+    return Coalesce('amount_original', 'amount')
+
+
+class ReportCurrency:
+    """Target currency and rate mode for one report"""
+
+    def __init__(self, code=BASE_REPORT_CURRENCY, mode='current'):
+        self.code = code
+        self.mode = mode
+        self._rates = RateSnapshot()
+        self._snapshots = None
+
+    @classmethod
+    def from_request(cls, request):
+        """Read ?currency= and ?rates=, raising ReportCurrencyError if invalid"""
+        code = (request.query_params.get('currency') or BASE_REPORT_CURRENCY).upper()
+        mode = request.query_params.get('rates', 'current')
+        if mode not in RATE_MODES:
+            raise ReportCurrencyError(f"rates must be one of: {', '.join(RATE_MODES)}")
+        if code != BASE_REPORT_CURRENCY and not Currency.objects.filter(code=code, is_active=True).exists():
+            raise ReportCurrencyError(f"Unknown or inactive currency: {code}")
+        return cls(code, mode)
+
+    @property
+    def uses_stored_rwf(self) -> bool:
+        # RWF reports keep using the amounts converted when each row was saved
+        return self.code == BASE_REPORT_CURRENCY
+
+    @property
+    def historical(self) -> bool:
+        return self.mode == 'historical'
+
+    # Rates
+
+    def rate(self, code) -> Decimal:
+        """
+        Current rate from `code` to the report currency, from the same
+        RateSnapshot lookup as writes (cached service, then database)
+        """
+        try:
+            return self._rates.rate(code, self.code)
+        except TransactionWriteError as e:
+            raise ReportCurrencyError(str(e))
+
+    def _load_snapshots(self, until):
+        # {currency code: ([dates], [rates to base])}, ascending by date
+        self._snapshots = {}
+        rows = ExchangeRateSnapshot.objects.filter(date__lte=until).order_by(
+            'currency__code', 'date'
+        ).values_list('currency__code', 'date', 'exchange_rate_to_base')
+        for code, day, rate in rows:
+            dates, rates = self._snapshots.setdefault(code, ([], []))
+            dates.append(day)
+            rates.append(rate)
+
+    def _snapshot_rate_to_base(self, code, day):
+        dates, rates = self._snapshots.get(code, ((), ()))
+        position = bisect_right(dates, day)
+        return rates[position - 1] if position else None
+
+    def rate_on(self, code, day) -> Decimal:
+        """Rate from `code` to the report currency on a given day"""
+        if code == self.code:
+            return Decimal('1')
+        source = self._snapshot_rate_to_base(code, day)
+        target = self._snapshot_rate_to_base(self.code, day)
+        if source and target:
+            return target / source
+        return self.rate(code)
+
+    # Conversion of grouped subtotals
+
+    def _convert(self, rows, group=None) -> dict:
+        """Sum converted subtotals per group from rows of (group, code, day, total)"""
+        days = [row['day'] for row in rows if row.get('day')]
+        if days and self._snapshots is None:
+            self._load_snapshots(max(days))
+
+        totals = {}
+        for row in rows:
+            if row['total'] is None:
+                continue
+            if row.get('day'):
+                rate = self.rate_on(row['code'], row['day'])
+            else:
+                rate = self.rate(row['code'])
+            key = row[group] if group else None
+            totals[key] = totals.get(key, Decimal('0')) + row['total'] * rate
+        return {key: total.quantize(CENT) for key, total in totals.items()}
+
+    def _grouped_rows(self, queryset, fields=(), date_field='date'):
+        # One row per (fields, original currency[, date]) with its SQL subtotal
+        group = {'code': original_currency()}
+        if self.historical and date_field:
+            group['day'] = F(date_field)
+        return list(
+            queryset.order_by().values(*fields, **group).annotate(total=Sum(original_amount()))
+        )
+
+    def sum_transactions(self, queryset, date_field='date') -> Decimal:
+        """Total of an Income/Expense/Subscription queryset in the report currency"""
+        if self.uses_stored_rwf:
+            return queryset.aggregate(total=Sum('amount_rwf'))['total'] or Decimal('0')
+        rows = self._grouped_rows(queryset, date_field=date_field)
+        return self._convert(rows).get(None, Decimal('0'))
+
+    def sum_transactions_by(self, queryset, field, date_field='date') -> dict:
+        """Totals per value of `field` (e.g. 'category__name') in the report currency"""
+        if self.uses_stored_rwf:
+            return {
+                row[field]: row['total']
+                for row in queryset.order_by().values(field).annotate(total=Sum('amount_rwf'))
+            }
+        rows = self._grouped_rows(queryset, [field], date_field=date_field)
+        return self._convert(rows, group=field)
+
+    def sum_currency_totals(self, rows) -> Decimal:
+        """Convert and add up rows of {'code': currency code, 'total': subtotal} at current rates"""
+        return sum(
+            (row['total'] * self.rate(row['code']) for row in rows if row['total'] is not None),
+            Decimal('0')
+        ).quantize(CENT)
+
+    def sum_balances(self, wallets) -> Decimal:
+        """Total balance of wallets in the report currency (always at current rates)"""
+        if self.uses_stored_rwf:
+            return wallets.aggregate(total=Sum('balance_rwf'))['total'] or Decimal('0')
+        return self.sum_currency_totals(
+            wallets.order_by().values(code=F('currency__code')).annotate(total=Sum('balance'))
+        )
+
+    def convert(self, amount_rwf) -> Decimal:
+        """Convert a single stored RWF amount at the current rate"""
+        if self.uses_stored_rwf or amount_rwf is None:
+            return amount_rwf
+        return (amount_rwf * self.rate(BASE_REPORT_CURRENCY)).quantize(CENT)
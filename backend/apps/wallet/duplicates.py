@@ -0,0 +1,147 @@
+"""
+Duplicate income/expense review and merging
+
+Candidates are transactions sharing a fingerprint (see fingerprints.py)
+whose dates are at most DUPLICATE_WINDOW_DAYS apart; occurrences posted
+from recurring templates are left out. They are listed with one query over
+the fingerprint index, and merging deletes the extra rows, reverses their
+balance effect and keeps their tags on the surviving row in a single
+transaction.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count
+
+from .bulk import BulkActionError, apply_wallet_deltas, ensure_rows_open
+from .transactions import AUDIT_FIELDS, balance_sign, jsonable
+from .caching import invalidate_tags, model_tag
+from .fingerprints import DUPLICATE_WINDOW_DAYS, RECURRING_TITLE_SUFFIX, date_clusters, is_recurring_occurrence
+from .models import TransactionHistory
+
+# Fields returned for each candidate in a duplicate group
+DUPLICATE_FIELDS = [
+    'id', 'fingerprint', 'title', 'amount', 'amount_rwf', 'date', 'wallet_id', 'wallet__name',
+    'category_id', 'category__name', 'project_id', 'created_at', 'created_by_id',
+]
+
+
+def duplicate_groups(queryset, limit=None) -> list:
+    """
+    Groups of transactions sharing a fingerprint with dates at most
+    DUPLICATE_WINDOW_DAYS apart, oldest entry first within each group. One
+    query: the rows whose fingerprint occurs more than once, split into
+    date clusters here.
+    """
+    queryset = queryset.exclude(title__endswith=RECURRING_TITLE_SUFFIX)
+    repeated = queryset.order_by().exclude(fingerprint='').values('fingerprint').annotate(
+        count=Count('id')
+    ).filter(count__gt=1).values('fingerprint')
+    rows = queryset.filter(fingerprint__in=repeated).order_by(
+        'fingerprint', 'created_at', 'id'
+    ).values(*DUPLICATE_FIELDS)
+
+    by_fingerprint = {}
+    for row in rows:
+        by_fingerprint.setdefault(row['fingerprint'], []).append(row)
+    groups = [
+        sorted(cluster, key=lambda row: (row['created_at'], row['id']))
+        for items in by_fingerprint.values()
+        for cluster in date_clusters(items)
+        if len(cluster) > 1
+    ]
+
+    # Most recent duplicates first
+    groups.sort(key=lambda items: max(row['date'] for row in items), reverse=True)
+    return [
+        {'fingerprint': items[0]['fingerprint'], 'count': len(items), 'transactions': items}
+        for items in groups[:limit]
+    ]
+
+
+def merge_duplicates(model, keep_id, duplicate_ids, user, force=False) -> dict:
+    """
+    Merge duplicates into the transaction `keep_id`: the duplicates are
+    deleted, their amounts taken back out of (or returned to) their wallets,
+    and their tags added to the kept row. Unless `force` is set, every
+    duplicate must share the kept row's fingerprint, none of the rows may be
+    a recurring occurrence, and their dates must span at most
+    DUPLICATE_WINDOW_DAYS.
+    """
+    entity_type = model._meta.model_name
+    duplicate_ids = sorted(set(duplicate_ids) - {keep_id})
+    if not duplicate_ids:
+        raise BulkActionError("No duplicates to merge")
+
+    with transaction.atomic():
+        rows = {
+            row['id']: row
+            for row in model.objects.select_for_update().filter(
+                pk__in=[keep_id, *duplicate_ids]
+            ).values('id', 'fingerprint', *AUDIT_FIELDS)
+        }
+        missing = sorted({keep_id, *duplicate_ids} - set(rows))
+        if missing:
+            raise BulkActionError(f"{entity_type.title()} not found: {', '.join(map(str, missing))}")
+
+        ensure_rows_open(rows[pk] for pk in duplicate_ids)
+
+        kept = rows[keep_id]
+        if not force:
+            scheduled = [pk for pk in [keep_id, *duplicate_ids] if is_recurring_occurrence(rows[pk]['title'])]
+            if scheduled:
+                raise BulkActionError(
+                    f"Recurring occurrences are not duplicates: {', '.join(map(str, scheduled))}"
+                )
+            mismatched = [pk for pk in duplicate_ids if rows[pk]['fingerprint'] != kept['fingerprint']]
+            if mismatched:
+                raise BulkActionError(
+                    f"Not duplicates of {entity_type} {keep_id}: {', '.join(map(str, mismatched))}"
+                )
+            dates = [row['date'] for row in rows.values()]
+            if (max(dates) - min(dates)).days > DUPLICATE_WINDOW_DAYS:
+                raise BulkActionError(f"Duplicates must be at most {DUPLICATE_WINDOW_DAYS} days apart")
+
+        deltas = defaultdict(Decimal)
+        for pk in duplicate_ids:
+            deltas[rows[pk]['wallet_id']] -= balance_sign(model) * rows[pk]['amount']
+        apply_wallet_deltas(deltas)
+
+        # Keep the union of tags on the surviving row
+        through = model.tags.through
+        source = model.tags.field.m2m_field_name()
+        target = model.tags.field.m2m_reverse_field_name()
+        tag_ids = set(through.objects.filter(
+            **{f'{source}_id__in': duplicate_ids}
+        ).values_list(f'{target}_id', flat=True))
+        through.objects.bulk_create(
+            [through(**{f'{source}_id': keep_id, f'{target}_id': tag_id}) for tag_id in tag_ids],
+            ignore_conflicts=True
+        )
+
+        model.objects.filter(pk__in=duplicate_ids).delete()
+
+        old_data = jsonable(rows)
+        TransactionHistory.objects.bulk_create([
+            TransactionHistory(
+                user=user,
+                action='delete',
+                entity_type=entity_type,
+                entity_id=pk,
+                description=f"Merged duplicate {entity_type} into #{keep_id}: {rows[pk]['title']}",
+                old_data=old_data[str(pk)],
+                new_data={'merged_into': keep_id},
+            )
+            for pk in duplicate_ids
+        ])
+
+        tag = model_tag(model)
+        transaction.on_commit(lambda: invalidate_tags(tag))
+
+    return {
+        'kept': keep_id,
+        'merged': duplicate_ids,
+        'tags_added': sorted(tag_ids),
+        'wallet_deltas': {str(wallet_id): str(delta) for wallet_id, delta in deltas.items() if delta},
+    }
@@ -0,0 +1,179 @@
+"""
+Streaming CSV/XLSX exports for transactions and reports
+
+Rows are read with values_list().iterator(chunk_size=...), which uses a
+server-side cursor on PostgreSQL, so memory use stays flat no matter how
+many rows are exported.
+"""
+import csv
+import json
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse, FileResponse
+from django.utils import timezone
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = ['csv', 'xlsx']
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# (header, lookup) pairs for each export
+INCOME_EXPORT_COLUMNS = [
+    ('ID', 'id'),
+    ('Date', 'date'),
+    ('Title', 'title'),
+    ('Wallet', 'wallet__name'),
+    ('Wallet Currency', 'wallet__currency__code'),
+    ('Amount', 'amount'),
+    ('Amount (RWF)', 'amount_rwf'),
+    ('Original Amount', 'amount_original'),
+    ('Original Currency', 'currency_original__code'),
+    ('Category', 'category__name'),
+    ('Project', 'project__title'),
+    ('Recurring', 'is_recurring'),
+    ('Recurrence', 'recurrence_type'),
+    ('Description', 'description'),
+    ('Notes', 'notes'),
+    ('Created By', 'created_by__username'),
+    ('Created At', 'created_at'),
+]
+
+EXPENSE_EXPORT_COLUMNS = INCOME_EXPORT_COLUMNS
+
+HISTORY_EXPORT_COLUMNS = [
+    ('ID', 'id'),
+    ('Timestamp', 'timestamp'),
+    ('User', 'user__username'),
+    ('Action', 'action'),
+    ('Entity Type', 'entity_type'),
+    ('Entity ID', 'entity_id'),
+    ('Description', 'description'),
+    ('Old Data', 'old_data'),
+    ('New Data', 'new_data'),
+]
+
+
+class Echo:
+    """File-like object that returns what is written, for csv.writer streaming"""
+
+    def write(self, value):
+        return value
+
+
+def export_filename(name: str, file_format: str) -> str:
+    """e.g. incomes-20260101.csv"""
+    return f"{name}-{timezone.now().strftime('%Y%m%d')}.{file_format}"
+
+
+def iterate_columns(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield value tuples for the given columns without instantiating models"""
+    lookups = [lookup for _, lookup in columns]
+    # prefetch_related() cannot apply to values_list(); drop it along with joins
+    queryset = queryset.prefetch_related(None).select_related(None)
+    return queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+def _cell(value):
+    """Normalize a value for a CSV or spreadsheet cell"""
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        # Spreadsheets don't support timezones
+        return timezone.make_naive(value, timezone.get_current_timezone())
+    return value
+
+
+def stream_csv(filename, header, rows):
+    """Stream rows as CSV, writing each row as soon as it is fetched"""
+    writer = csv.writer(Echo())
+
+    def generate():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow([_cell(value) for value in row])
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def stream_xlsx(filename, header, rows):
+    """
+    Write rows to a write-only workbook (rows are flushed to disk as they are
+    added) and stream the finished file from a temporary file
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    for row in rows:
+        sheet.append([
+            float(value) if isinstance(value, Decimal) else value
+            for value in (_cell(value) for value in row)
+        ])
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    response = FileResponse(output, content_type=XLSX_CONTENT_TYPE)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_response(name, file_format, header, rows):
+    """Build a streaming export response in the requested format"""
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {file_format}")
+    filename = export_filename(name, file_format)
+    if file_format == 'xlsx':
+        return stream_xlsx(filename, header, rows)
+    return stream_csv(filename, header, rows)
+
+
+def export_queryset(name, file_format, queryset, columns):
+    """Stream a queryset using (header, lookup) column definitions"""
+    return export_response(
+        name,
+        file_format,
+        [header for header, _ in columns],
+        iterate_columns(queryset, columns)
+    )
+
+
+def monthly_report_rows(report, incomes, expenses, convert=None):
+    """
+    Flatten a monthly report into rows: summary, per-category totals, top
+    expenses, then every transaction of the month streamed from the database.
+    `convert` maps stored RWF amounts to the report currency.
+    """
+    yield ('Section', 'Name', 'Date', f"Amount ({report.get('currency', 'RWF')})")
+    yield ('Summary', 'Total Income', '', report['total_income'])
+    yield ('Summary', 'Total Expense', '', report['total_expense'])
+    yield ('Summary', 'Net Savings', '', report['net_savings'])
+    for name, total in report['income_by_category'].items():
+        yield ('Income by Category', name, '', total)
+    for name, total in report['expense_by_category'].items():
+        yield ('Expense by Category', name, '', total)
+    for expense in report['top_expenses']:
+        yield ('Top Expense', expense['title'], expense['date'], expense.get('amount', expense['amount_rwf']))
+    for section, queryset in (('Income', incomes), ('Expense', expenses)):
+        rows = queryset.order_by('date', 'id').values_list(
+            'title', 'date', 'amount_rwf'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        for title, day, amount in rows:
+            yield (section, title, day, convert(amount) if convert else amount)
+
+
+def export_rows(name, file_format, rows):
+    """Stream an iterable whose first item is the header row"""
+    rows = iter(rows)
+    header = next(rows)
+    return export_response(name, file_format, list(header), rows)
+
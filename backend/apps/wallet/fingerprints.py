@@ -0,0 +1,59 @@
+"""
+Duplicate fingerprints for incomes and expenses
+
+A fingerprint hashes the normalized title, amount and wallet, so re-entries
+of the same transaction (client retries, manual double entry) share one
+indexed value regardless of case, accents or punctuation. The date is left
+out of the hash: entries sharing a fingerprint are duplicates when their
+dates are at most DUPLICATE_WINDOW_DAYS apart (see duplicates.py), which
+also catches a re-entry a day or two off on either side of any date.
+Occurrences posted from recurring templates (jobs.py) are scheduled, not
+re-entered, and are never duplicates.
+"""
+import hashlib
+import re
+import unicodedata
+from decimal import Decimal
+
+from django.conf import settings
+
+# Entries sharing a fingerprint at most this many days apart are duplicates
+DUPLICATE_WINDOW_DAYS = getattr(settings, 'DUPLICATE_WINDOW_DAYS', 2)
+
+# Title suffix of occurrences posted from recurring templates
+RECURRING_TITLE_SUFFIX = ' (Recurring)'
+
+NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase ASCII words separated by single spaces"""
+    ascii_title = unicodedata.normalize('NFKD', title or '').encode('ascii', 'ignore').decode()
+    return NON_WORD.sub(' ', ascii_title.lower()).strip()
+
+
+def transaction_fingerprint(title, amount, wallet_id) -> str:
+    """SHA-1 hex digest identifying likely duplicates of a transaction"""
+    amount = Decimal(amount).quantize(Decimal('0.01'))
+    key = f'{normalize_title(title)}|{amount}|{wallet_id}'
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def is_recurring_occurrence(title) -> bool:
+    return (title or '').endswith(RECURRING_TITLE_SUFFIX)
+
+
+def date_clusters(rows, window=None) -> list:
+    """
+    Split rows sharing a fingerprint into clusters, in date order: each
+    cluster spans at most `window` days from its first row, so a series of
+    entries one day apart is never chained into one cluster
+    """
+    window = DUPLICATE_WINDOW_DAYS if window is None else window
+    clusters = []
+    for row in sorted(rows, key=lambda row: row['date']):
+        if clusters and (row['date'] - clusters[-1][0]['date']).days <= window:
+            clusters[-1].append(row)
+        else:
+            clusters.append([row])
+    return clusters
@@ -0,0 +1,122 @@
+"""
+Idempotency keys for endpoints that create transactions or move money
+
+A client sends `Idempotency-Key: <unique value>` with a POST. The first
+request with a key is processed and its response stored; retries with the
+same key and body get the stored response back (`Idempotent-Replayed: true`)
+instead of creating another income, expense or transfer. Keys are scoped
+to the user and expire after IDEMPOTENCY_KEY_TTL seconds.
+"""
+import hashlib
+import json
+import logging
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# How long a key is remembered: 24 hours
+IDEMPOTENCY_KEY_TTL = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24)
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def request_fingerprint(request) -> str:
+    """SHA-256 of the method, path and body, to detect a key reused for another request"""
+    body = json.dumps(request.data, cls=DjangoJSONEncoder, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method}|{request.path}|{body}'.encode()).hexdigest()
+
+
+def purge_expired_keys() -> int:
+    """Delete expired keys, returning how many were removed"""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def _replay(record):
+    response = Response(record.response_data, status=record.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view_method):
+    """
+    Make a POST view method safe to retry with an Idempotency-Key header.
+    Requests without the header are processed as usual.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if request.method != 'POST' or not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return Response(
+                {'error': f'{IDEMPOTENCY_HEADER} must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        user = request.user if request.user.is_authenticated else None
+        fingerprint = request_fingerprint(request)
+        now = timezone.now()
+
+        # An expired key is free to be used again
+        IdempotencyKey.objects.filter(user=user, key=key, expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    key=key,
+                    user=user,
+                    method=request.method,
+                    path=request.path,
+                    request_fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=IDEMPOTENCY_KEY_TTL),
+                )
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if record is None:
+                return Response(
+                    {'error': 'A request with this Idempotency-Key just finished; retry it'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            if record.request_fingerprint != fingerprint:
+                return Response(
+                    {'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.status_code is None:
+                return Response(
+                    {'error': 'A request with this Idempotency-Key is still being processed'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            logger.info(f"Replayed idempotent {request.method} {request.path} for key {key}")
+            return _replay(record)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if response.status_code >= 500:
+            # Server errors aren't stored, so the client can retry for real
+            record.delete()
+            return response
+
+        record.status_code = response.status_code
+        record.response_data = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+        record.save(update_fields=['status_code', 'response_data'])
+        return response
+
+    return wrapper
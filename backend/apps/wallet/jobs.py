@@ -0,0 +1,169 @@
+"""
+Scheduled jobs: recurring incomes and expenses, and subscription renewals
+
+Each job drains its due rows in chunks. A chunk is claimed inside one
+transaction with SELECT ... FOR UPDATE SKIP LOCKED, so several workers
+(cron on several nodes, or overlapping API calls) split the backlog
+between them instead of posting the same occurrence twice: a row locked by
+another worker is skipped, and by the time it can be claimed again its
+next date has moved past today.
+
+Every claimed row posts all of its overdue occurrences in a savepoint; a
+row that fails is rolled back and recorded on the run. A run claims rows
+in pk order, each at most once, so it always terminates. Progress (chunks,
+claimed, processed, failed) is saved on the JobRun after every chunk, and
+its duration when the run ends.
+"""
+import logging
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .fingerprints import RECURRING_TITLE_SUFFIX
+from .models import Income, Expense, JobRun, Subscription
+from .transactions import RateSnapshot, save_transaction
+
+logger = logging.getLogger(__name__)
+
+# Rows claimed (and locked) per transaction
+JOB_CHUNK_SIZE = getattr(settings, 'JOB_CHUNK_SIZE', 50)
+
+# Errors kept on a JobRun; the count is always exact
+JOB_MAX_ERRORS = getattr(settings, 'JOB_MAX_ERRORS', 50)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def post_recurring_occurrences(template, today, user=None, rates=None):
+    """Post every occurrence of a recurring income or expense due by `today`"""
+    model = type(template)
+    posted = 0
+    while template.is_recurring and template.next_occurrence and template.next_occurrence <= today:
+        save_transaction(model(
+            wallet_id=template.wallet_id,
+            project_id=template.project_id,
+            title=f"{template.title}{RECURRING_TITLE_SUFFIX}",
+            amount=template.amount,
+            category_id=template.category_id,
+            description=template.description,
+            date=template.next_occurrence,
+            is_recurring=False,
+            created_by=template.created_by
+        ), user=user, rates=rates)
+        posted += 1
+        if not template.set_next_occurrence():
+            break
+    if posted:
+        template.save(update_fields=['is_recurring', 'next_occurrence'])
+    return posted
+
+
+def renew_subscription(subscription, today, user=None, rates=None):
+    """
+    Process every renewal of a subscription due by `today`. Raises if a
+    renewal doesn't move next_billing_date forward (e.g. an unknown billing
+    cycle), so the row fails instead of posting expenses in a loop.
+    """
+    renewed = 0
+    while subscription.status == 'active' and subscription.next_billing_date <= today:
+        billed = subscription.next_billing_date
+        subscription.process_renewal(user=user, rates=rates)
+        renewed += 1
+        if subscription.next_billing_date <= billed:
+            raise ValueError(
+                f"Renewal didn't advance the next billing date past {billed.isoformat()} "
+                f"(billing cycle {subscription.billing_cycle!r})"
+            )
+    return renewed
+
+
+# job name → (model, due filter for a day, process one row)
+JOBS = {
+    'recurring_incomes': (
+        Income, lambda today: {'is_recurring': True, 'next_occurrence__lte': today}, post_recurring_occurrences
+    ),
+    'recurring_expenses': (
+        Expense, lambda today: {'is_recurring': True, 'next_occurrence__lte': today}, post_recurring_occurrences
+    ),
+    'subscription_renewals': (
+        Subscription, lambda today: {'status': 'active', 'next_billing_date__lte': today}, renew_subscription
+    ),
+}
+
+
+def _save_progress(run, **fields):
+    for name, value in fields.items():
+        setattr(run, name, value)
+    JobRun.objects.filter(pk=run.pk).update(**fields)
+
+
+def run_job(name, user=None, chunk_size=None, max_chunks=None, today=None) -> JobRun:
+    """
+    Run a job until no unclaimed due rows are left (or `max_chunks` chunks
+    were processed) and return its JobRun
+    """
+    model, due_filter, process = JOBS[name]
+    chunk_size = chunk_size or JOB_CHUNK_SIZE
+    today = today or timezone.localdate()
+    run = JobRun.objects.create(job=name, worker=worker_name(), triggered_by=user)
+    started = time.monotonic()
+    rates = RateSnapshot()
+    status = 'failed'
+    # Claim in pk order past the last claimed row: each row is claimed at
+    # most once per run, including rows that failed or are still due
+    last_pk = 0
+
+    try:
+        while max_chunks is None or run.chunks < max_chunks:
+            processed = failed = 0
+            errors = []
+            with transaction.atomic():
+                rows = list(
+                    model.objects.select_for_update(skip_locked=True, of=('self',))
+                    .filter(pk__gt=last_pk, **due_filter(today))
+                    .order_by('pk')[:chunk_size]
+                )
+                if not rows:
+                    break
+                for row in rows:
+                    try:
+                        with transaction.atomic():
+                            processed += process(row, today, user=user, rates=rates)
+                    except Exception as e:
+                        failed += 1
+                        errors.append(f"{row}: {e}")
+                        logger.warning(f"Job {name}: {model.__name__} {row.pk} failed: {e}")
+                last_pk = rows[-1].pk
+
+            _save_progress(
+                run,
+                chunks=run.chunks + 1,
+                claimed=run.claimed + len(rows),
+                processed=run.processed + processed,
+                failed=run.failed + failed,
+                errors=(run.errors + errors)[:JOB_MAX_ERRORS],
+            )
+        status = 'succeeded'
+    except Exception as e:
+        logger.exception(f"Job {name} failed")
+        run.errors = (run.errors + [str(e)])[:JOB_MAX_ERRORS]
+        raise
+    finally:
+        _save_progress(
+            run,
+            status=status,
+            errors=run.errors,
+            finished_at=timezone.now(),
+            duration_ms=int((time.monotonic() - started) * 1000),
+        )
+        logger.info(
+            f"Job {name} on {run.worker}: {run.processed} processed, {run.failed} failed "
+            f"in {run.chunks} chunk(s), {run.duration_ms} ms"
+        )
+    return run
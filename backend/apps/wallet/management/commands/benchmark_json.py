@@ -0,0 +1,84 @@
+"""
+Management command to benchmark JSON rendering of the list endpoints
+Usage: python manage.py benchmark_json [--iterations 20]
+"""
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.wallet.views import IncomeViewSet, ExpenseViewSet
+from apps.projects.views import ProjectViewSet
+from nvms.renderers import FastJSONRenderer, orjson
+
+ENDPOINTS = [
+    ('incomes', IncomeViewSet),
+    ('expenses', ExpenseViewSet),
+    ('projects', ProjectViewSet),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare stdlib and fast JSON rendering (and streaming) on the income, expense and project list endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=1000,
+            help='Rows rendered per iteration (the paginated list is capped by PAGE_SIZE otherwise)'
+        )
+
+    def timed(self, func, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - started) / iterations * 1000
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_active=True).order_by('-is_superuser', 'id').first()
+        if user is None:
+            raise CommandError('At least one active user is required to call the endpoints')
+
+        iterations = options['iterations']
+        factory = APIRequestFactory()
+        stdlib_renderer = JSONRenderer()
+        fast_renderer = FastJSONRenderer()
+
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; FastJSONRenderer uses the stdlib fallback'))
+
+        self.stdout.write(
+            f"{'Endpoint':<10} {'Rows':>6} {'stdlib ms':>10} {'fast ms':>9} {'speedup':>8} {'stream ms':>10}"
+        )
+        for name, viewset in ENDPOINTS:
+            # Serializer data for one big page, rendered repeatedly
+            view = viewset(action_map={'get': 'list'}, format_kwarg=None)
+            request = factory.get(f'/{name}/')
+            force_authenticate(request, user=user)
+            view.request = view.initialize_request(request)
+            queryset = view.filter_queryset(view.get_queryset())[:options['page_size']]
+            data = view.get_serializer(queryset, many=True).data
+
+            stdlib_ms = self.timed(lambda: stdlib_renderer.render(data), iterations)
+            fast_ms = self.timed(lambda: fast_renderer.render(data), iterations)
+
+            # End to end: query, serialize and render the whole list as a stream
+            stream_view = viewset.as_view({'get': 'list'})
+
+            def consume_stream():
+                stream_request = factory.get(f'/{name}/', {'stream': 'true'})
+                force_authenticate(stream_request, user=user)
+                response = stream_view(stream_request)
+                for _ in response.streaming_content:
+                    pass
+
+            stream_ms = self.timed(consume_stream, max(1, iterations // 4))
+
+            speedup = f'{stdlib_ms / fast_ms:.1f}x' if fast_ms else '-'
+            self.stdout.write(
+                f'{name:<10} {len(data):>6} {stdlib_ms:>10.2f} {fast_ms:>9.2f} {speedup:>8} {stream_ms:>10.2f}'
+            )
@@ -0,0 +1,71 @@
+"""
+Management command to compare date__year/date__month filters with the
+half-open ranges from analytics.month_range_filters on the current
+database (SQLite or PostgreSQL): query plan and time per month total
+Usage: python manage.py benchmark_month_filters [--year 2026 --month 10] [--iterations 50] [--plans]
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.wallet.analytics import month_range_filters
+from apps.wallet.models import Income, Expense
+
+# Plan fragments showing an index lookup, per backend
+INDEX_MARKERS = ('USING INDEX', 'USING COVERING INDEX', 'Index Scan', 'Index Only Scan', 'Bitmap Index Scan')
+
+
+class Command(BaseCommand):
+    help = 'Compare EXTRACT-based month filters with half-open date ranges (query plan and timing)'
+
+    def add_arguments(self, parser):
+        today = timezone.localdate()
+        parser.add_argument('--year', type=int, default=today.year)
+        parser.add_argument('--month', type=int, default=today.month)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--plans', action='store_true', help='Print the full query plans')
+
+    def timed(self, queryset, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            queryset.aggregate(total=Sum('amount_rwf'))
+        return (time.perf_counter() - started) / iterations * 1000
+
+    def handle(self, *args, **options):
+        year, month, iterations = options['year'], options['month'], options['iterations']
+        try:
+            range_filters = month_range_filters(year, month)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Database: {connection.vendor}, month {year}-{month:02d}, {iterations} iteration(s)")
+        self.stdout.write(f"{'Model':<8} {'Rows':>8} {'Filter':<12} {'Index':<6} {'ms':>8}")
+        for model in (Income, Expense):
+            rows = model.objects.count()
+            variants = [
+                ('year/month', model.objects.filter(date__year=year, date__month=month)),
+                ('range', model.objects.filter(**range_filters)),
+            ]
+            timings = {}
+            for name, queryset in variants:
+                plan = queryset.order_by().explain()
+                uses_index = any(marker in plan for marker in INDEX_MARKERS)
+                timings[name] = self.timed(queryset, iterations)
+                self.stdout.write(
+                    f"{model.__name__:<8} {rows:>8} {name:<12} {'yes' if uses_index else 'no':<6} {timings[name]:>8.2f}"
+                )
+                if options['plans']:
+                    self.stdout.write(f"  {plan}".replace('\n', '\n  '))
+
+            speedup = timings['year/month'] / timings['range'] if timings['range'] else 0
+            style = self.style.SUCCESS if speedup >= 1 else self.style.WARNING
+            self.stdout.write(style(f"{model.__name__}: range filter {speedup:.1f}x"))
+
+        if connection.vendor == 'postgresql':
+            self.stdout.write(
+                'PostgreSQL may still choose a sequential scan for small tables; '
+                'compare plans on production-sized data (or after ANALYZE)'
+            )
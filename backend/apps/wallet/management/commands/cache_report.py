@@ -0,0 +1,42 @@
+"""
+Management command to check cache health and report hit ratios
+Usage: python manage.py cache_report [--reset]
+"""
+from django.core.management.base import BaseCommand
+from apps.wallet.caching import cache_health_report, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Check the configured cache backend and report hit ratios per namespace'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset hit/miss counters after reporting'
+        )
+
+    def handle(self, *args, **options):
+        report = cache_health_report()
+
+        self.stdout.write(f"Backend:   {report['backend']}")
+        if report['location']:
+            self.stdout.write(f"Location:  {report['location']}")
+
+        if not report['healthy']:
+            self.stdout.write(self.style.ERROR(f"Cache is unhealthy: {report['error']}"))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Cache is healthy (round trip {report['roundtrip_ms']} ms)"
+        ))
+
+        self.stdout.write('')
+        self.stdout.write(f"{'Namespace':<60} {'Hits':>8} {'Misses':>8} {'Ratio':>7}")
+        for name, stats in report['stats'].items():
+            ratio = f"{stats['hit_ratio']:.1%}" if stats['hit_ratio'] is not None else '-'
+            self.stdout.write(f"{name:<60} {stats['hits']:>8} {stats['misses']:>8} {ratio:>7}")
+
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Cache statistics reset'))
@@ -0,0 +1,46 @@
+"""
+Management command to close (or reopen) an accounting month
+Usage: python manage.py close_period --year 2026 --month 9 [--reopen] [--notes TEXT]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.wallet.models import AccountingPeriod
+from apps.wallet.periods import PeriodCloseError, close_period, reopen_period
+
+
+class Command(BaseCommand):
+    help = 'Close a month (lock its transactions and store closing balances) or reopen the latest closed one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, required=True)
+        parser.add_argument('--month', type=int, required=True)
+        parser.add_argument('--notes', default='', help='Note stored with the closed period')
+        parser.add_argument(
+            '--reopen',
+            action='store_true',
+            help='Reopen the period instead (only the latest closed period)'
+        )
+
+    def handle(self, *args, **options):
+        year, month = options['year'], options['month']
+        try:
+            if options['reopen']:
+                period = AccountingPeriod.objects.filter(year=year, month=month).first()
+                if period is None:
+                    raise CommandError(f"{year}-{month:02d} is not closed")
+                reopen_period(period)
+                self.stdout.write(self.style.SUCCESS(f"Reopened {period}"))
+                return
+
+            period = close_period(year, month, notes=options['notes'])
+        except PeriodCloseError as e:
+            raise CommandError(str(e))
+
+        balances = period.wallet_balances.select_related('wallet__currency')
+        for row in balances:
+            self.stdout.write(
+                f"{row.wallet.name[:30]:<30} {row.wallet.currency.code:<4} {row.closing_balance:>15}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed {period}: {len(balances)} wallet balance(s), "
+            f"{period.category_totals.count()} category total(s)"
+        ))
@@ -0,0 +1,47 @@
+"""
+Management command to build (and cache) the expense anomaly report
+Usage: python manage.py detect_anomalies [--days 90] [--threshold 3.5] [--refresh]
+"""
+from django.core.management.base import BaseCommand
+from apps.wallet.anomalies import ANOMALY_WINDOW_DAYS, ANOMALY_Z_THRESHOLD, get_anomaly_report
+
+
+class Command(BaseCommand):
+    help = 'Flag expense outliers, subscription price jumps and spending spikes, and cache the report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=ANOMALY_WINDOW_DAYS, help='Days of expenses to review')
+        parser.add_argument('--threshold', type=float, default=ANOMALY_Z_THRESHOLD, help='Modified z-score threshold')
+        parser.add_argument('--refresh', action='store_true', help='Rebuild even if a cached report is current')
+
+    def handle(self, *args, **options):
+        report = get_anomaly_report(options['days'], options['threshold'], refresh=options['refresh'])
+
+        self.stdout.write(
+            f"Reviewed {report['expenses_reviewed']} expenses "
+            f"from {report['start_date']} to {report['end_date']}"
+        )
+        for outlier in report['amount_outliers']:
+            self.stdout.write(
+                f"  Outlier   #{outlier['expense_id']:<8} {outlier['date']} {outlier['title'][:40]:<40} "
+                f"{outlier['amount_rwf']:>14,.2f} (median {outlier['category_median_rwf']:,.2f}, z {outlier['score']})"
+            )
+        for jump in report['subscription_price_jumps']:
+            self.stdout.write(
+                f"  Price     {jump['subscription'][:40]:<40} {jump['previous_amount']:,.2f} -> "
+                f"{jump['amount']:,.2f} (+{jump['change']:.0%})"
+            )
+        for kind in ('wallet', 'category'):
+            for spike in report[f'{kind}_spikes']:
+                self.stdout.write(
+                    f"  Spike     {kind:<8} {str(spike[kind])[:31]:<31} {spike['date']} "
+                    f"{spike['total_rwf']:>14,.2f} ({spike['ratio']}x baseline)"
+                )
+
+        found = sum(len(report[key]) for key in (
+            'amount_outliers', 'subscription_price_jumps', 'wallet_spikes', 'category_spikes'
+        ))
+        if found:
+            self.stdout.write(self.style.WARNING(f"{found} anomalies flagged"))
+        else:
+            self.stdout.write(self.style.SUCCESS('No anomalies found'))
@@ -0,0 +1,14 @@
+"""
+Management command to delete expired idempotency keys
+Usage: python manage.py purge_idempotency_keys
+"""
+from django.core.management.base import BaseCommand
+from apps.wallet.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete idempotency keys past their TTL'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency key(s)'))
@@ -0,0 +1,51 @@
+"""
+Management command to find and repair wallet balance drift
+Usage: python manage.py reconcile_balances [--wallet ID ...] [--repair]
+"""
+from django.core.management.base import BaseCommand
+from apps.wallet.models import Wallet
+from apps.wallet.reconciliation import reconcile_wallets
+
+
+class Command(BaseCommand):
+    help = 'Recompute expected wallet balances from transactions and transfers and report (or repair) drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--wallet',
+            type=int,
+            action='append',
+            dest='wallets',
+            help='Only reconcile this wallet id (can be repeated)'
+        )
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Overwrite drifting balances with the expected values'
+        )
+
+    def handle(self, *args, **options):
+        queryset = Wallet.objects.all()
+        if options['wallets']:
+            queryset = queryset.filter(pk__in=options['wallets'])
+
+        results = reconcile_wallets(queryset, repair=options['repair'])
+        if not results:
+            self.stdout.write(self.style.SUCCESS('All wallet balances match their transactions'))
+            return
+
+        self.stdout.write(
+            f"{'Wallet':<30} {'Cur':<4} {'Stored':>15} {'Expected':>15} {'Drift':>13}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['wallet'][:30]:<30} {row['currency']:<4} {row['balance']:>15} "
+                f"{row['expected_balance']:>15} {row['balance_drift']:>13}"
+            )
+
+        if options['repair']:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(results)} wallet(s)"))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"{len(results)} wallet(s) drifted; run with --repair to fix"
+            ))
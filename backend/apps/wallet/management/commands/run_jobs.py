@@ -0,0 +1,45 @@
+"""
+Management command to run the scheduled wallet jobs (recurring incomes and
+expenses, subscription renewals). Safe to run from cron on several nodes at
+once: workers claim due rows with SKIP LOCKED and never post them twice.
+Usage: python manage.py run_jobs [JOB ...] [--chunk-size 50] [--max-chunks N]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.wallet.jobs import JOBS, JOB_CHUNK_SIZE, run_job
+
+
+class Command(BaseCommand):
+    help = 'Process due recurring transactions and subscription renewals in locked chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'jobs',
+            nargs='*',
+            help=f"Jobs to run (default: all): {', '.join(JOBS)}"
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=JOB_CHUNK_SIZE,
+            help=f'Rows claimed per transaction (default: {JOB_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--max-chunks',
+            type=int,
+            help='Stop each job after this many chunks (default: until nothing is due)'
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['jobs']) - set(JOBS)
+        if unknown:
+            raise CommandError(f"Unknown job(s): {', '.join(sorted(unknown))}. Choose from: {', '.join(JOBS)}")
+
+        for name in options['jobs'] or JOBS:
+            run = run_job(name, chunk_size=options['chunk_size'], max_chunks=options['max_chunks'])
+            style = self.style.WARNING if run.failed else self.style.SUCCESS
+            self.stdout.write(style(
+                f"{name}: {run.processed} processed from {run.claimed} claimed row(s), {run.failed} failed, "
+                f"{run.chunks} chunk(s) in {run.duration_ms} ms"
+            ))
+            for error in run.errors:
+                self.stdout.write(f"  {error}")
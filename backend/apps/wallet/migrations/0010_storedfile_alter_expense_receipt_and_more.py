@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:09
+
+import apps.wallet.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0009_expense_wallet_expe_date_56798e_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(help_text='SHA-256 of the content', max_length=64, unique=True)),
+                ('name', models.CharField(help_text='Name in the content storage', max_length=255)),
+                ('size', models.BigIntegerField(help_text='Size in bytes')),
+                ('mime_type', models.CharField(max_length=100)),
+                ('upload_count', models.PositiveIntegerField(default=1, help_text='Times this content was uploaded')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='receipt',
+            field=models.FileField(blank=True, null=True, storage=apps.wallet.storage.get_content_storage, upload_to='expenses/receipts/'),
+        ),
+        migrations.AlterField(
+            model_name='income',
+            name='receipt',
+            field=models.FileField(blank=True, null=True, storage=apps.wallet.storage.get_content_storage, upload_to='incomes/receipts/'),
+        ),
+    ]
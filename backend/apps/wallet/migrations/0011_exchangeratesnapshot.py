@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0010_storedfile_alter_expense_receipt_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRateSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('exchange_rate_to_base', models.DecimalField(decimal_places=6, max_digits=15)),
+                ('currency', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rate_snapshots', to='wallet.currency')),
+            ],
+            options={
+                'ordering': ['-date', 'currency'],
+                'indexes': [models.Index(fields=['date', 'currency'], name='wallet_exch_date_998576_idx')],
+                'unique_together': {('currency', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:14
+
+from django.db import migrations, models
+
+
+def build_category_paths(apps, schema_editor):
+    """Fill path, depth and full_path for existing categories, parents first"""
+    TransactionCategory = apps.get_model('wallet', 'TransactionCategory')
+    categories = {category.pk: category for category in TransactionCategory.objects.all()}
+
+    def resolve(category, seen=()):
+        if category.path:
+            return
+        parent = categories.get(category.parent_id)
+        if parent is None or parent.pk in seen:
+            category.path, category.depth, category.full_path = f'{category.pk}/', 0, category.name
+            return
+        resolve(parent, seen + (category.pk,))
+        category.path = f'{parent.path}{category.pk}/'
+        category.depth = parent.depth + 1
+        category.full_path = f'{parent.full_path} > {category.name}'
+
+    for category in categories.values():
+        resolve(category)
+    TransactionCategory.objects.bulk_update(categories.values(), ['path', 'depth', 'full_path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0011_exchangeratesnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transactioncategory',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='transactioncategory',
+            name='full_path',
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='transactioncategory',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(build_category_paths, migrations.RunPython.noop),
+    ]
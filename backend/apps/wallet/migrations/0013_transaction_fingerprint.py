@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:17
+
+import hashlib
+import re
+import unicodedata
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def transaction_fingerprint(title, amount, wallet_id):
+    """Frozen copy of apps.wallet.fingerprints.transaction_fingerprint"""
+    ascii_title = unicodedata.normalize('NFKD', title or '').encode('ascii', 'ignore').decode()
+    normalized = re.sub(r'[^a-z0-9]+', ' ', ascii_title.lower()).strip()
+    amount = Decimal(amount).quantize(Decimal('0.01'))
+    key = f'{normalized}|{amount}|{wallet_id}'
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def fill_fingerprints(apps, schema_editor):
+    """Fingerprint existing incomes and expenses"""
+    for model_name in ('Income', 'Expense'):
+        model = apps.get_model('wallet', model_name)
+        rows = []
+        for row in model.objects.only('id', 'title', 'amount', 'wallet_id').iterator(chunk_size=2000):
+            row.fingerprint = transaction_fingerprint(row.title, row.amount, row.wallet_id)
+            rows.append(row)
+        model.objects.bulk_update(rows, ['fingerprint'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0012_transactioncategory_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='income',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=40),
+        ),
+        migrations.RunPython(fill_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:26
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+def import_legacy_transfers(apps, schema_editor):
+    """
+    Transfers used to be recorded only as TransactionHistory rows. They
+    moved the same nominal amount out of and into both wallets, so they
+    become Transfer rows with equal source and target amounts.
+    """
+    TransactionHistory = apps.get_model('wallet', 'TransactionHistory')
+    Transfer = apps.get_model('wallet', 'Transfer')
+    Wallet = apps.get_model('wallet', 'Wallet')
+    Currency = apps.get_model('wallet', 'Currency')
+
+    rates = dict(Currency.objects.values_list('code', 'exchange_rate_to_base'))
+    wallet_currencies = dict(Wallet.objects.values_list('id', 'currency__code'))
+    transfers = []
+    for entry in TransactionHistory.objects.filter(action='transfer', entity_type='wallet').iterator():
+        data = entry.new_data or {}
+        try:
+            source_id, target_id = int(data['source_wallet']), int(data['target_wallet'])
+            amount = Decimal(str(data['amount']))
+        except (KeyError, TypeError, ValueError, ArithmeticError):
+            continue
+        if source_id not in wallet_currencies or target_id not in wallet_currencies:
+            continue
+        source_rate = rates.get(wallet_currencies[source_id])
+        rwf_rate = rates.get('RWF')
+        amount_rwf = amount * rwf_rate / source_rate if source_rate and rwf_rate else amount
+        transfers.append(Transfer(
+            source_wallet_id=source_id,
+            target_wallet_id=target_id,
+            source_amount=amount,
+            target_amount=amount,
+            exchange_rate=Decimal('1'),
+            amount_rwf=Decimal(amount_rwf).quantize(Decimal('0.01')),
+            date=entry.timestamp.date(),
+            description=entry.description,
+            created_by_id=entry.user_id,
+        ))
+    Transfer.objects.bulk_create(transfers, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0014_idempotencykey'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transactionhistory',
+            name='entity_type',
+            field=models.CharField(choices=[('income', 'Income'), ('expense', 'Expense'), ('subscription', 'Subscription'), ('budget', 'Budget'), ('wallet', 'Wallet'), ('transfer', 'Transfer'), ('goal', 'Savings Goal')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='Transfer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_amount', models.DecimalField(decimal_places=2, help_text="Amount debited, in the source wallet's currency", max_digits=15, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))])),
+                ('target_amount', models.DecimalField(decimal_places=2, help_text="Amount credited, in the target wallet's currency", max_digits=15)),
+                ('exchange_rate', models.DecimalField(decimal_places=10, default=1, help_text='Source to target currency rate used for the conversion', max_digits=20)),
+                ('amount_rwf', models.DecimalField(decimal_places=2, help_text='Source amount converted to RWF (base currency for totals)', max_digits=15)),
+                ('date', models.DateField(default=django.utils.timezone.localdate)),
+                ('description', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_transfers', to=settings.AUTH_USER_MODEL)),
+                ('source_wallet', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='outgoing_transfers', to='wallet.wallet')),
+                ('target_wallet', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='incoming_transfers', to='wallet.wallet')),
+            ],
+            options={
+                'ordering': ['-date', '-created_at'],
+                'indexes': [models.Index(fields=['source_wallet', 'date'], name='wallet_tran_source__980f31_idx'), models.Index(fields=['target_wallet', 'date'], name='wallet_tran_target__d69785_idx'), models.Index(fields=['-date'], name='wallet_tran_date_292cb2_idx')],
+            },
+        ),
+        migrations.RunPython(import_legacy_transfers, migrations.RunPython.noop),
+    ]
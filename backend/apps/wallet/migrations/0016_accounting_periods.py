@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0015_transfer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountingPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(unique=True)),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('notes', models.TextField(blank=True)),
+                ('closed_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='closed_periods', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-end_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PeriodCategoryTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=10)),
+                ('total_rwf', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_totals', to='wallet.transactioncategory')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_totals', to='wallet.accountingperiod')),
+            ],
+            options={
+                'ordering': ['period', 'kind', 'category'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PeriodWalletBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('closing_balance', models.DecimalField(decimal_places=2, help_text="In the wallet's currency", max_digits=15)),
+                ('closing_balance_rwf', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('income_total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('transfers_in', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('transfers_out', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='wallet_balances', to='wallet.accountingperiod')),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_balances', to='wallet.wallet')),
+            ],
+            options={
+                'ordering': ['period', 'wallet'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='accountingperiod',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='unique_accounting_period'),
+        ),
+        migrations.AddConstraint(
+            model_name='periodcategorytotal',
+            constraint=models.UniqueConstraint(fields=('period', 'category', 'kind'), name='unique_period_category_total'),
+        ),
+        migrations.AddConstraint(
+            model_name='periodwalletbalance',
+            constraint=models.UniqueConstraint(fields=('period', 'wallet'), name='unique_period_wallet_balance'),
+        ),
+    ]
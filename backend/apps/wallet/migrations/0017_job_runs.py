@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0016_accounting_periods'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.CharField(choices=[('recurring_incomes', 'Recurring Incomes'), ('recurring_expenses', 'Recurring Expenses'), ('subscription_renewals', 'Subscription Renewals')], max_length=30)),
+                ('worker', models.CharField(help_text='host:pid of the process that ran the job', max_length=100)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='running', max_length=10)),
+                ('chunks', models.PositiveIntegerField(default=0)),
+                ('claimed', models.PositiveIntegerField(default=0, help_text='Due rows locked by this run')),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('triggered_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='job_runs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['job', '-started_at'], name='wallet_jobr_job_fb9ca0_idx')],
+            },
+        ),
+    ]
@@ -1,9 +1,14 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
+
+from nvms.memo import memoized_property
+
+from .fingerprints import transaction_fingerprint
+from .storage import get_content_storage
 
 
 class Currency(models.Model):
@@ -38,6 +43,44 @@ class Currency(models.Model):
         super().save(*args, **kwargs)
 
 
+class ExchangeRateSnapshot(models.Model):
+    """Daily copy of Currency.exchange_rate_to_base, for converting at transaction-date rates"""
+    currency = models.ForeignKey(Currency, on_delete=models.CASCADE, related_name='rate_snapshots')
+    date = models.DateField()
+    exchange_rate_to_base = models.DecimalField(max_digits=15, decimal_places=6)
+
+    class Meta:
+        ordering = ['-date', 'currency']
+        unique_together = ['currency', 'date']
+        indexes = [
+            models.Index(fields=['date', 'currency']),
+        ]
+
+    def __str__(self):
+        return f"{self.currency.code} {self.date}: {self.exchange_rate_to_base}"
+
+    @classmethod
+    def record_today(cls):
+        """Snapshot every active currency's current rate for today (one query)"""
+        today = timezone.now().date()
+        snapshots = [
+            cls(currency_id=currency_id, date=today, exchange_rate_to_base=rate)
+            for currency_id, rate in Currency.objects.filter(
+                is_active=True
+            ).values_list('id', 'exchange_rate_to_base')
+        ]
+        cls.objects.bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=['currency', 'date'],
+            update_fields=['exchange_rate_to_base']
+        )
+        # bulk_create sends no save signals: invalidate reports converted at historical rates here
+        from .caching import invalidate_tags, model_tag
+        transaction.on_commit(lambda: invalidate_tags(model_tag(cls)))
+        return len(snapshots)
+
+
 class Wallet(models.Model):
     """Different wallet/account types for managing finances"""
     WALLET_TYPES = [
@@ -91,26 +134,31 @@ class Wallet(models.Model):
             self.balance = self.initial_balance
         
         # Update balance_rwf (convert to RWF)
-        from .services import exchange_rate_service
-        if self.currency.code == 'RWF':
-            self.balance_rwf = self.balance
-        else:
-            converted = exchange_rate_service.convert_amount(
-                self.balance,
-                self.currency.code,
-                'RWF'
-            )
-            if converted is not None:
-                self.balance_rwf = converted
-            else:
-                # Fallback to database rates
-                rwf_currency = Currency.objects.filter(code='RWF').first()
-                if rwf_currency:
-                    conversion_rate = rwf_currency.exchange_rate_to_base / self.currency.exchange_rate_to_base
-                    self.balance_rwf = self.balance * Decimal(str(conversion_rate))
+        balance_rwf = self.convert_to_rwf(self.balance)
+        if balance_rwf is not None:
+            self.balance_rwf = balance_rwf
         
         super().save(*args, **kwargs)
 
+    def convert_to_rwf(self, amount):
+        """Convert an amount in this wallet's currency to RWF (None if no rate is available)"""
+        from .services import exchange_rate_service
+        if self.currency.code == 'RWF':
+            return amount
+        converted = exchange_rate_service.convert_amount(
+            amount,
+            self.currency.code,
+            'RWF'
+        )
+        if converted is not None:
+            return converted
+        # Fallback to database rates
+        rwf_currency = Currency.objects.filter(code='RWF').first()
+        if rwf_currency:
+            conversion_rate = rwf_currency.exchange_rate_to_base / self.currency.exchange_rate_to_base
+            return amount * Decimal(str(conversion_rate))
+        return None
+
     def update_balance(self, amount, operation='add'):
         """Update wallet balance with given amount"""
         amount = abs(amount)
@@ -125,13 +173,22 @@ class Wallet(models.Model):
 
 
 class TransactionCategory(models.Model):
-    """Categories for organizing income and expenses with hierarchical structure"""
+    """
+    Categories for organizing income and expenses with hierarchical structure
+
+    Each category stores its materialized path of ids (e.g. "3/12/40/"),
+    its depth and its full name, maintained on save. A category's subtree
+    is then a single indexed prefix query on `path`.
+    """
     CATEGORY_TYPES = [
         ('income', 'Income'),
         ('expense', 'Expense'),
         ('both', 'Both'),
     ]
 
+    PATH_SEPARATOR = '/'
+    NAME_SEPARATOR = ' > '
+
     name = models.CharField(max_length=100)
     category_type = models.CharField(max_length=10, choices=CATEGORY_TYPES)
     parent = models.ForeignKey(
@@ -141,6 +198,9 @@ class TransactionCategory(models.Model):
         blank=True, 
         related_name='subcategories'
     )
+    path = models.CharField(max_length=255, blank=True, db_index=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    full_path = models.CharField(max_length=500, blank=True, editable=False)
     description = models.TextField(blank=True)
     color = models.CharField(max_length=7, default='#3B82F6')  # Hex color
     icon = models.CharField(max_length=50, blank=True)  # Icon name for frontend
@@ -156,12 +216,84 @@ class TransactionCategory(models.Model):
             return f"{self.parent.name} > {self.name}"
         return self.name
 
-    @property
-    def full_path(self):
-        """Get full category path"""
-        if self.parent:
-            return f"{self.parent.full_path} > {self.name}"
-        return self.name
+    def build_path(self):
+        """(path, depth, full_path) from the parent's stored values"""
+        if not self.parent_id:
+            return f'{self.pk}{self.PATH_SEPARATOR}', 0, self.name
+        parent_path, parent_depth, parent_full_path = TransactionCategory.objects.filter(
+            pk=self.parent_id
+        ).values_list('path', 'depth', 'full_path').get()
+        if self.path and parent_path.startswith(self.path):
+            raise ValueError("A category can't be moved under itself or one of its subcategories")
+        return (
+            f'{parent_path}{self.pk}{self.PATH_SEPARATOR}',
+            parent_depth + 1,
+            f'{parent_full_path}{self.NAME_SEPARATOR}{self.name}'
+        )
+
+    def save(self, *args, **kwargs):
+        old_path, old_full_path = self.path, self.full_path
+        if self.pk:
+            # Validate moves before anything is written
+            self.path, self.depth, self.full_path = self.build_path()
+        super().save(*args, **kwargs)
+
+        if not old_path:
+            # New row: the path includes the id, known only after the insert
+            self.path, self.depth, self.full_path = self.build_path()
+            TransactionCategory.objects.filter(pk=self.pk).update(
+                path=self.path, depth=self.depth, full_path=self.full_path
+            )
+        elif (self.path, self.full_path) != (old_path, old_full_path):
+            self.move_descendants(old_path, old_full_path)
+
+    def move_descendants(self, old_path, old_full_path):
+        """Rewrite the stored paths of every descendant after a move or rename"""
+        descendants = list(
+            TransactionCategory.objects.filter(path__startswith=old_path).exclude(pk=self.pk)
+        )
+        for category in descendants:
+            category.path = self.path + category.path[len(old_path):]
+            category.depth = category.path.count(self.PATH_SEPARATOR) - 1
+            category.full_path = self.full_path + category.full_path[len(old_full_path):]
+        TransactionCategory.objects.bulk_update(
+            descendants, ['path', 'depth', 'full_path'], batch_size=500
+        )
+
+    def get_descendants(self, include_self=True):
+        """This category's subtree as one indexed prefix query"""
+        descendants = TransactionCategory.objects.filter(path__startswith=self.path)
+        if not include_self:
+            descendants = descendants.exclude(pk=self.pk)
+        return descendants
+
+    @staticmethod
+    def attach_subcategories(categories):
+        """
+        Set `active_subcategories` on each category from an already loaded
+        list (e.g. every active category), and return the roots of that list
+        """
+        categories = list(categories)
+        by_id = {category.pk: category for category in categories}
+        roots = []
+        for category in categories:
+            category.active_subcategories = []
+        for category in categories:
+            parent = by_id.get(category.parent_id)
+            if parent is None:
+                roots.append(category)
+            elif category.is_active:
+                parent.active_subcategories.append(category)
+        return roots
+
+
+def active_subcategories_prefetch(lookup='subcategories'):
+    """Prefetch of active subcategories into `active_subcategories`"""
+    return models.Prefetch(
+        lookup,
+        queryset=TransactionCategory.objects.filter(is_active=True).order_by('name'),
+        to_attr='active_subcategories'
+    )
 
 
 class TransactionTag(models.Model):
@@ -178,7 +310,23 @@ class TransactionTag(models.Model):
         return self.name
 
 
-class Income(models.Model):
+class TransactionWriteMixin:
+    """
+    Incomes, expenses and subscriptions are written through
+    transactions.save_transaction(): amounts converted from one rate
+    snapshot, the wallet balance adjusted and the row saved in one pass.
+    """
+
+    def save(self, **kwargs):
+        from .transactions import save_transaction
+        save_transaction(self, **kwargs)
+
+    def save_row(self, **kwargs):
+        """Plain Model.save(), used by save_transaction once the row is prepared"""
+        super().save(**kwargs)
+
+
+class Income(TransactionWriteMixin, models.Model):
     """Income transactions with project linking and recurrence support"""
     RECURRENCE_TYPES = [
         ('none', 'None'),
@@ -246,9 +394,14 @@ class Income(models.Model):
     next_occurrence = models.DateField(null=True, blank=True)
     
     # Attachments
-    receipt = models.FileField(upload_to='incomes/receipts/', null=True, blank=True)
+    receipt = models.FileField(
+        upload_to='incomes/receipts/', storage=get_content_storage, null=True, blank=True
+    )
     notes = models.TextField(blank=True)
     
+    # Hash of normalized title, amount and wallet (see fingerprints.py)
+    fingerprint = models.CharField(max_length=40, blank=True, db_index=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(
@@ -274,68 +427,18 @@ class Income(models.Model):
         project_info = f" ({self.project.title})" if self.project else ""
         return f"{self.title}{project_info} - {self.wallet.currency.symbol}{self.amount}"
 
-    def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        
-        # Handle currency conversion using live exchange rates
-        if self.amount_original and self.currency_original:
-            if self.currency_original.id != self.wallet.currency.id:
-                # Use live exchange rate service
-                from .services import exchange_rate_service
-                
-                converted_amount = exchange_rate_service.convert_amount(
-                    self.amount_original,
-                    self.currency_original.code,
-                    self.wallet.currency.code
-                )
-                
-                if converted_amount is not None:
-                    self.amount = converted_amount
-                else:
-                    # Fallback to cached database rates if API fails
-                    conversion_rate = self.wallet.currency.exchange_rate_to_base / self.currency_original.exchange_rate_to_base
-                    self.amount = self.amount_original * Decimal(str(conversion_rate))
-            else:
-                # Same currency, no conversion needed
-                self.amount = self.amount_original
-        elif not self.amount_original:
-            # If no original amount specified, assume amount is in wallet currency
-            self.amount_original = self.amount
-            self.currency_original = self.wallet.currency
-        
-        # Convert amount to RWF for totals
-        from .services import exchange_rate_service
-        if self.wallet.currency.code == 'RWF':
-            self.amount_rwf = self.amount
-        else:
-            converted_rwf = exchange_rate_service.convert_amount(
-                self.amount,
-                self.wallet.currency.code,
-                'RWF'
-            )
-            if converted_rwf is not None:
-                self.amount_rwf = converted_rwf
-            else:
-                # Fallback to database rates
-                rwf_currency = Currency.objects.filter(code='RWF').first()
-                if rwf_currency:
-                    conversion_rate = rwf_currency.exchange_rate_to_base / self.wallet.currency.exchange_rate_to_base
-                    self.amount_rwf = self.amount * Decimal(str(conversion_rate))
-        
-        super().save(*args, **kwargs)
-        
-        # Update wallet balance for new income
-        if is_new:
-            self.wallet.update_balance(self.amount, 'add')
-            
-        # Set next occurrence if recurring
-        if self.is_recurring and not self.next_occurrence:
-            self.calculate_next_occurrence()
+    def compute_fingerprint(self):
+        return transaction_fingerprint(self.title, self.amount, self.wallet_id)
 
     def calculate_next_occurrence(self):
-        """Calculate next occurrence date based on recurrence type"""
+        """Advance to the next occurrence and save it"""
+        if self.set_next_occurrence():
+            self.save(update_fields=['is_recurring', 'next_occurrence'])
+
+    def set_next_occurrence(self):
+        """Set the next occurrence date based on recurrence type (without saving)"""
         if not self.is_recurring or self.recurrence_type == 'none':
-            return
+            return False
         
         base_date = self.next_occurrence or self.date
         
@@ -350,7 +453,7 @@ class Income(models.Model):
         elif self.recurrence_type == 'yearly':
             next_date = base_date + timedelta(days=365)
         else:
-            return
+            return False
         
         # Check if next occurrence is before end date
         if self.recurrence_end_date and next_date > self.recurrence_end_date:
@@ -358,11 +461,10 @@ class Income(models.Model):
             self.next_occurrence = None
         else:
             self.next_occurrence = next_date
-        
-        self.save()
+        return True
 
 
-class Expense(models.Model):
+class Expense(TransactionWriteMixin, models.Model):
     """Expense transactions with project linking and recurrence support"""
     RECURRENCE_TYPES = [
         ('none', 'None'),
@@ -430,9 +532,14 @@ class Expense(models.Model):
     next_occurrence = models.DateField(null=True, blank=True)
     
     # Attachments
-    receipt = models.FileField(upload_to='expenses/receipts/', null=True, blank=True)
+    receipt = models.FileField(
+        upload_to='expenses/receipts/', storage=get_content_storage, null=True, blank=True
+    )
     notes = models.TextField(blank=True)
     
+    # Hash of normalized title, amount and wallet (see fingerprints.py)
+    fingerprint = models.CharField(max_length=40, blank=True, db_index=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(
@@ -457,68 +564,18 @@ class Expense(models.Model):
         project_info = f" ({self.project.title})" if self.project else ""
         return f"{self.title}{project_info} - {self.wallet.currency.symbol}{self.amount}"
 
-    def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        
-        # Handle currency conversion using live exchange rates
-        if self.amount_original and self.currency_original:
-            if self.currency_original.id != self.wallet.currency.id:
-                # Use live exchange rate service
-                from .services import exchange_rate_service
-                
-                converted_amount = exchange_rate_service.convert_amount(
-                    self.amount_original,
-                    self.currency_original.code,
-                    self.wallet.currency.code
-                )
-                
-                if converted_amount is not None:
-                    self.amount = converted_amount
-                else:
-                    # Fallback to cached database rates if API fails
-                    conversion_rate = self.wallet.currency.exchange_rate_to_base / self.currency_original.exchange_rate_to_base
-                    self.amount = self.amount_original * Decimal(str(conversion_rate))
-            else:
-                # Same currency, no conversion needed
-                self.amount = self.amount_original
-        elif not self.amount_original:
-            # If no original amount specified, assume amount is in wallet currency
-            self.amount_original = self.amount
-            self.currency_original = self.wallet.currency
-        
-        # Convert amount to RWF for totals
-        from .services import exchange_rate_service
-        if self.wallet.currency.code == 'RWF':
-            self.amount_rwf = self.amount
-        else:
-            converted_rwf = exchange_rate_service.convert_amount(
-                self.amount,
-                self.wallet.currency.code,
-                'RWF'
-            )
-            if converted_rwf is not None:
-                self.amount_rwf = converted_rwf
-            else:
-                # Fallback to database rates
-                rwf_currency = Currency.objects.filter(code='RWF').first()
-                if rwf_currency:
-                    conversion_rate = rwf_currency.exchange_rate_to_base / self.wallet.currency.exchange_rate_to_base
-                    self.amount_rwf = self.amount * Decimal(str(conversion_rate))
-        
-        super().save(*args, **kwargs)
-        
-        # Update wallet balance for new expense
-        if is_new:
-            self.wallet.update_balance(self.amount, 'subtract')
-            
-        # Set next occurrence if recurring
-        if self.is_recurring and not self.next_occurrence:
-            self.calculate_next_occurrence()
+    def compute_fingerprint(self):
+        return transaction_fingerprint(self.title, self.amount, self.wallet_id)
 
     def calculate_next_occurrence(self):
-        """Calculate next occurrence date based on recurrence type"""
+        """Advance to the next occurrence and save it"""
+        if self.set_next_occurrence():
+            self.save(update_fields=['is_recurring', 'next_occurrence'])
+
+    def set_next_occurrence(self):
+        """Set the next occurrence date based on recurrence type (without saving)"""
         if not self.is_recurring or self.recurrence_type == 'none':
-            return
+            return False
         
         base_date = self.next_occurrence or self.date
         
@@ -533,18 +590,17 @@ class Expense(models.Model):
         elif self.recurrence_type == 'yearly':
             next_date = base_date + timedelta(days=365)
         else:
-            return
+            return False
         
         if self.recurrence_end_date and next_date > self.recurrence_end_date:
             self.is_recurring = False
             self.next_occurrence = None
         else:
             self.next_occurrence = next_date
-        
-        self.save()
+        return True
 
 
-class Subscription(models.Model):
+class Subscription(TransactionWriteMixin, models.Model):
     """Recurring expenses with renewal tracking"""
     BILLING_CYCLES = [
         ('monthly', 'Monthly'),
@@ -629,54 +685,6 @@ class Subscription(models.Model):
     def __str__(self):
         return f"{self.name} - {self.wallet.currency.symbol}{self.amount}/{self.get_billing_cycle_display()}"
 
-    def save(self, *args, **kwargs):
-        # Handle currency conversion using live exchange rates
-        if self.amount_original and self.currency_original:
-            if self.currency_original.id != self.wallet.currency.id:
-                # Use live exchange rate service
-                from .services import exchange_rate_service
-                
-                converted_amount = exchange_rate_service.convert_amount(
-                    self.amount_original,
-                    self.currency_original.code,
-                    self.wallet.currency.code
-                )
-                
-                if converted_amount is not None:
-                    self.amount = converted_amount
-                else:
-                    # Fallback to cached database rates if API fails
-                    conversion_rate = self.wallet.currency.exchange_rate_to_base / self.currency_original.exchange_rate_to_base
-                    self.amount = self.amount_original * Decimal(str(conversion_rate))
-            else:
-                # Same currency, no conversion needed
-                self.amount = self.amount_original
-        elif not self.amount_original:
-            # If no original amount specified, assume amount is in wallet currency
-            self.amount_original = self.amount
-            self.currency_original = self.wallet.currency
-        
-        # Convert amount to RWF for totals
-        from .services import exchange_rate_service
-        if self.wallet.currency.code == 'RWF':
-            self.amount_rwf = self.amount
-        else:
-            converted_rwf = exchange_rate_service.convert_amount(
-                self.amount,
-                self.wallet.currency.code,
-                'RWF'
-            )
-            if converted_rwf is not None:
-                self.amount_rwf = converted_rwf
-            else:
-                # Fallback to database rates
-                rwf_currency = Currency.objects.filter(code='RWF').first()
-                if rwf_currency:
-                    conversion_rate = rwf_currency.exchange_rate_to_base / self.wallet.currency.exchange_rate_to_base
-                    self.amount_rwf = self.amount * Decimal(str(conversion_rate))
-        
-        super().save(*args, **kwargs)
-
     def calculate_next_billing_date(self):
         """Calculate next billing date based on billing cycle"""
         if self.billing_cycle == 'monthly':
@@ -689,35 +697,38 @@ class Subscription(models.Model):
             return self.next_billing_date + timedelta(days=365)
         return self.next_billing_date
 
-    def process_renewal(self):
+    def process_renewal(self, user=None, rates=None):
         """Process subscription renewal and create expense"""
+        from .transactions import save_transaction
+
         if self.status != 'active':
             return False
         
-        # Create expense for this subscription
-        expense = Expense.objects.create(
-            user=self.user,
-            wallet=self.wallet,
-            title=f"{self.name} - Subscription Renewal",
-            amount=self.amount,
-            category=self.category,
-            description=f"Auto-generated from subscription: {self.name}",
-            date=self.next_billing_date,
-            is_recurring=False,
-            created_by=self.user
-        )
-        
-        # Update next billing date
-        self.next_billing_date = self.calculate_next_billing_date()
-        
-        # Check if subscription should end
-        if self.end_date and self.next_billing_date > self.end_date:
-            self.status = 'cancelled'
-        
-        self.save()
+        with transaction.atomic():
+            # Create expense for this subscription
+            expense = Expense(
+                wallet=self.wallet,
+                title=f"{self.name} - Subscription Renewal",
+                amount=self.amount,
+                category=self.category,
+                description=f"Auto-generated from subscription: {self.name}",
+                date=self.next_billing_date,
+                is_recurring=False,
+                created_by=user
+            )
+            save_transaction(expense, user=user, rates=rates)
+            
+            # Update next billing date
+            self.next_billing_date = self.calculate_next_billing_date()
+            
+            # Check if subscription should end
+            if self.end_date and self.next_billing_date > self.end_date:
+                self.status = 'cancelled'
+            
+            self.save(update_fields=['next_billing_date', 'status', 'updated_at'])
         return expense
 
-    @property
+    @memoized_property
     def days_until_renewal(self):
         """Days until next renewal"""
         return (self.next_billing_date - timezone.now().date()).days
@@ -785,7 +796,7 @@ class Budget(models.Model):
     def __str__(self):
         return f"{self.name} - {self.currency.symbol}{self.amount}"
 
-    @property
+    @memoized_property(depends_on=['wallet.Expense'])
     def spent_amount(self):
         """Calculate total spent against this budget"""
         expenses = Expense.objects.filter(
@@ -864,7 +875,7 @@ class SavingsGoal(models.Model):
     def __str__(self):
         return f"{self.name} - {self.wallet.currency.symbol}{self.current_amount}/{self.target_amount}"
 
-    @property
+    @memoized_property
     def progress_percentage(self):
         """Calculate progress percentage"""
         if self.target_amount == 0:
@@ -889,6 +900,150 @@ class SavingsGoal(models.Model):
         self.save()
 
 
+class Transfer(models.Model):
+    """
+    Movement of funds between two wallets. The target amount is the source
+    amount converted at `exchange_rate`, taken from one rate snapshot.
+    Created through transactions.create_transfers(), which also moves the
+    balances.
+    """
+    source_wallet = models.ForeignKey(Wallet, on_delete=models.PROTECT, related_name='outgoing_transfers')
+    target_wallet = models.ForeignKey(Wallet, on_delete=models.PROTECT, related_name='incoming_transfers')
+    source_amount = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))],
+        help_text="Amount debited, in the source wallet's currency"
+    )
+    target_amount = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        help_text="Amount credited, in the target wallet's currency"
+    )
+    exchange_rate = models.DecimalField(
+        max_digits=20,
+        decimal_places=10,
+        default=1,
+        help_text="Source to target currency rate used for the conversion"
+    )
+    amount_rwf = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        help_text="Source amount converted to RWF (base currency for totals)"
+    )
+    date = models.DateField(default=timezone.localdate)
+    description = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='created_transfers'
+    )
+
+    class Meta:
+        ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['source_wallet', 'date']),
+            models.Index(fields=['target_wallet', 'date']),
+            models.Index(fields=['-date']),
+        ]
+
+    def __str__(self):
+        return f"{self.source_wallet} → {self.target_wallet}: {self.source_amount}"
+
+
+class AccountingPeriod(models.Model):
+    """
+    A closed month. Transactions and transfers dated on or before the last
+    closed period can't be changed, and the period keeps closing balances
+    per wallet and totals per category (see periods.py).
+    """
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    start_date = models.DateField()
+    end_date = models.DateField(unique=True)
+    closed_at = models.DateTimeField(auto_now_add=True)
+    closed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='closed_periods')
+    notes = models.TextField(blank=True)
+
+    CLOSED_THROUGH_KEY = 'wallet:closed_through'
+
+    class Meta:
+        ordering = ['-end_date']
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'month'], name='unique_accounting_period'),
+        ]
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d}"
+
+    @classmethod
+    def closed_through(cls):
+        """
+        Last day of the latest closed period (None if nothing is closed), cached
+        for read-only callers; writes check the database (transactions.ensure_open)
+        """
+        from django.core.cache import cache
+        cached = cache.get(cls.CLOSED_THROUGH_KEY)
+        if cached is None:
+            last = cls.objects.order_by('-end_date').values_list('end_date', flat=True).first()
+            # Cache "nothing closed" too, as an empty string
+            cached = last.isoformat() if last else ''
+            cache.set(cls.CLOSED_THROUGH_KEY, cached, None)
+        return date.fromisoformat(cached) if cached else None
+
+    @classmethod
+    def clear_closed_through(cls):
+        from django.core.cache import cache
+        cache.delete(cls.CLOSED_THROUGH_KEY)
+
+
+class PeriodWalletBalance(models.Model):
+    """Closing balance of a wallet at the end of a closed period, and the period's flows"""
+    period = models.ForeignKey(AccountingPeriod, on_delete=models.CASCADE, related_name='wallet_balances')
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='period_balances')
+    closing_balance = models.DecimalField(max_digits=15, decimal_places=2, help_text="In the wallet's currency")
+    closing_balance_rwf = models.DecimalField(max_digits=15, decimal_places=2)
+    income_total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    expense_total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    transfers_in = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    transfers_out = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['period', 'wallet']
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'wallet'], name='unique_period_wallet_balance'),
+        ]
+
+    def __str__(self):
+        return f"{self.wallet} @ {self.period}: {self.closing_balance}"
+
+
+class PeriodCategoryTotal(models.Model):
+    """Income or expense total (RWF) of a category in a closed period"""
+    KINDS = [
+        ('income', 'Income'),
+        ('expense', 'Expense'),
+    ]
+
+    period = models.ForeignKey(AccountingPeriod, on_delete=models.CASCADE, related_name='category_totals')
+    category = models.ForeignKey(TransactionCategory, on_delete=models.CASCADE, related_name='period_totals')
+    kind = models.CharField(max_length=10, choices=KINDS)
+    total_rwf = models.DecimalField(max_digits=15, decimal_places=2)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['period', 'kind', 'category']
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'category', 'kind'], name='unique_period_category_total'),
+        ]
+
+    def __str__(self):
+        return f"{self.category} {self.kind} @ {self.period}: {self.total_rwf}"
+
+
 class TransactionHistory(models.Model):
     """Audit trail for all financial transactions"""
     ACTION_TYPES = [
@@ -904,6 +1059,7 @@ class TransactionHistory(models.Model):
         ('subscription', 'Subscription'),
         ('budget', 'Budget'),
         ('wallet', 'Wallet'),
+        ('transfer', 'Transfer'),
         ('goal', 'Savings Goal'),
     ]
 
@@ -927,3 +1083,81 @@ class TransactionHistory(models.Model):
 
     def __str__(self):
         return f"{self.user} {self.get_action_display()} {self.get_entity_type_display()} #{self.entity_id}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response recorded for an Idempotency-Key header, replayed when the same
+    request is retried until the key expires (see idempotency.py)
+    """
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name='idempotency_keys')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    request_fingerprint = models.CharField(max_length=64)
+    # Null while the first request is still being processed
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_data = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} {self.method} {self.path}"
+
+
+class JobRun(models.Model):
+    """One run of a scheduled job by one worker, with its progress (see jobs.py)"""
+    JOB_CHOICES = [
+        ('recurring_incomes', 'Recurring Incomes'),
+        ('recurring_expenses', 'Recurring Expenses'),
+        ('subscription_renewals', 'Subscription Renewals'),
+    ]
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    job = models.CharField(max_length=30, choices=JOB_CHOICES)
+    worker = models.CharField(max_length=100, help_text="host:pid of the process that ran the job")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    chunks = models.PositiveIntegerField(default=0)
+    claimed = models.PositiveIntegerField(default=0, help_text="Due rows locked by this run")
+    processed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    triggered_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='job_runs')
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['job', '-started_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_job_display()} on {self.worker} ({self.status})"
+
+
+class StoredFile(models.Model):
+    """Content-addressed upload: one row per distinct file content (see storage.py)"""
+    digest = models.CharField(max_length=64, unique=True, help_text="SHA-256 of the content")
+    name = models.CharField(max_length=255, help_text="Name in the content storage")
+    size = models.BigIntegerField(help_text="Size in bytes")
+    mime_type = models.CharField(max_length=100)
+    upload_count = models.PositiveIntegerField(default=1, help_text="Times this content was uploaded")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.size} bytes)"
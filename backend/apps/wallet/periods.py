@@ -0,0 +1,198 @@
+"""
+Accounting period close
+
+Closing a month locks every income, expense and transfer dated on or
+before its last day (see transactions.ensure_open) and stores:
+
+- the closing balance of each wallet, with the month's income, expense and
+  transfer totals (PeriodWalletBalance)
+- income and expense totals per category (PeriodCategoryTotal)
+
+Periods close in order, so each closing balance is the previous one plus
+one month of flows. Historical reports start from the latest snapshot and
+only scan the open days after it: a balance as of any date costs the same
+number of queries however long the history is.
+"""
+import calendar
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import (
+    AccountingPeriod, Income, Expense, PeriodCategoryTotal, PeriodWalletBalance, Transfer, Wallet
+)
+from .transactions import BASE_CURRENCY_CODE, RateSnapshot
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_MODELS = {'income': Income, 'expense': Expense}
+
+
+class PeriodCloseError(ValueError):
+    """A period can't be closed or reopened"""
+
+
+def month_bounds(year, month):
+    """First and last day of a month"""
+    if not 1 <= month <= 12:
+        raise PeriodCloseError(f"Invalid month: {month}")
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def latest_snapshot(day=None):
+    """Latest closed period ending on or before `day` (or at all), or None"""
+    periods = AccountingPeriod.objects.order_by('-end_date')
+    if day is not None:
+        periods = periods.filter(end_date__lte=day)
+    return periods.first()
+
+
+def _totals_by_wallet(queryset, wallet_field, amount_field) -> dict:
+    return {
+        row[wallet_field]: row['total']
+        for row in queryset.order_by().values(wallet_field).annotate(total=Sum(amount_field))
+    }
+
+
+def wallet_flows(filters) -> dict:
+    """Income, expense and transfer totals per wallet (in its currency) for date filters"""
+    return {
+        'income_total': _totals_by_wallet(Income.objects.filter(**filters), 'wallet_id', 'amount'),
+        'expense_total': _totals_by_wallet(Expense.objects.filter(**filters), 'wallet_id', 'amount'),
+        'transfers_in': _totals_by_wallet(Transfer.objects.filter(**filters), 'target_wallet_id', 'target_amount'),
+        'transfers_out': _totals_by_wallet(Transfer.objects.filter(**filters), 'source_wallet_id', 'source_amount'),
+    }
+
+
+def _net_flow(flows, wallet_id):
+    zero = Decimal('0')
+    return (
+        flows['income_total'].get(wallet_id, zero) - flows['expense_total'].get(wallet_id, zero)
+        + flows['transfers_in'].get(wallet_id, zero) - flows['transfers_out'].get(wallet_id, zero)
+    )
+
+
+def wallet_balances_as_of(day, wallets=None) -> dict:
+    """
+    Balance of each wallet (in its currency) at the end of `day`: the
+    closing balance of the latest period ending by then, plus the flows
+    dated after it. Returns {wallet_id: balance}.
+    """
+    wallets = Wallet.objects.all() if wallets is None else wallets
+    balances = dict(wallets.values_list('id', 'initial_balance'))
+    filters = {'date__lte': day}
+
+    period = latest_snapshot(day)
+    if period is not None:
+        balances.update(
+            period.wallet_balances.filter(wallet_id__in=list(balances)).values_list('wallet_id', 'closing_balance')
+        )
+        filters['date__gt'] = period.end_date
+
+    flows = wallet_flows(filters)
+    return {wallet_id: balance + _net_flow(flows, wallet_id) for wallet_id, balance in balances.items()}
+
+
+def category_totals(start_date, end_date) -> list:
+    """(kind, category_id, total_rwf, count) rows for a date range, one GROUP BY per type"""
+    rows = []
+    for kind, model in TRANSACTION_MODELS.items():
+        grouped = model.objects.filter(date__gte=start_date, date__lte=end_date).order_by().values(
+            'category_id'
+        ).annotate(total=Sum('amount_rwf'), count=Count('id'))
+        rows.extend((kind, row['category_id'], row['total'], row['count']) for row in grouped)
+    return rows
+
+
+def close_period(year, month, user=None, notes='') -> AccountingPeriod:
+    """
+    Close a past month. Months close in order: after the first close, only
+    the month right after the latest closed one can be closed.
+    """
+    start_date, end_date = month_bounds(year, month)
+    if end_date >= timezone.localdate():
+        raise PeriodCloseError("Only months that have ended can be closed")
+
+    with transaction.atomic():
+        # Locking every wallet waits for in-flight writes and blocks new
+        # ones (they lock their wallets too) until the close commits
+        wallets = list(Wallet.objects.select_for_update().select_related('currency').order_by('pk'))
+
+        previous = latest_snapshot()
+        if previous is not None:
+            if end_date <= previous.end_date:
+                raise PeriodCloseError(f"The books are already closed through {previous.end_date.isoformat()}")
+            expected_start = previous.end_date + timedelta(days=1)
+            if start_date != expected_start:
+                raise PeriodCloseError(
+                    f"Close {expected_start.year}-{expected_start.month:02d} first"
+                )
+            opening = dict(previous.wallet_balances.values_list('wallet_id', 'closing_balance'))
+        else:
+            opening = wallet_balances_as_of(start_date - timedelta(days=1))
+
+        flows = wallet_flows({'date__gte': start_date, 'date__lte': end_date})
+        period = AccountingPeriod.objects.create(
+            year=year, month=month, start_date=start_date, end_date=end_date, closed_by=user, notes=notes
+        )
+
+        rates = RateSnapshot()
+        zero = Decimal('0')
+        balances = []
+        for wallet in wallets:
+            closing = opening.get(wallet.pk, wallet.initial_balance) + _net_flow(flows, wallet.pk)
+            balances.append(PeriodWalletBalance(
+                period=period,
+                wallet=wallet,
+                closing_balance=closing,
+                closing_balance_rwf=rates.convert(closing, wallet.currency.code, BASE_CURRENCY_CODE),
+                **{name: totals.get(wallet.pk, zero) for name, totals in flows.items()},
+            ))
+        PeriodWalletBalance.objects.bulk_create(balances, batch_size=500)
+        PeriodCategoryTotal.objects.bulk_create([
+            PeriodCategoryTotal(period=period, category_id=category_id, kind=kind, total_rwf=total, count=count)
+            for kind, category_id, total, count in category_totals(start_date, end_date)
+        ], batch_size=500)
+
+        transaction.on_commit(AccountingPeriod.clear_closed_through)
+
+    logger.info(f"Closed period {period} ({len(balances)} wallets)")
+    return period
+
+
+def reopen_period(period):
+    """Reopen the latest closed period, dropping its snapshots"""
+    with transaction.atomic():
+        latest = latest_snapshot()
+        if latest is None or latest.pk != period.pk:
+            raise PeriodCloseError("Only the latest closed period can be reopened")
+        period.delete()
+        transaction.on_commit(AccountingPeriod.clear_closed_through)
+    logger.info(f"Reopened period {period}")
+
+
+def closed_month_summary(year, month):
+    """
+    Income and expense totals (RWF) of a closed month by category name,
+    from its snapshot, or None if the month is open
+    """
+    rows = list(PeriodCategoryTotal.objects.filter(
+        period__year=year, period__month=month
+    ).values_list('kind', 'category__name', 'total_rwf'))
+    if not rows and not AccountingPeriod.objects.filter(year=year, month=month).exists():
+        return None
+
+    by_category = {kind: defaultdict(Decimal) for kind in TRANSACTION_MODELS}
+    for kind, name, total in rows:
+        by_category[kind][name] += total
+    return {
+        'total_income': sum(by_category['income'].values(), Decimal('0')),
+        'total_expense': sum(by_category['expense'].values(), Decimal('0')),
+        'income_by_category': dict(by_category['income']),
+        'expense_by_category': dict(by_category['expense']),
+    }
@@ -0,0 +1,120 @@
+"""
+Wallet balance reconciliation
+
+Balances are maintained incrementally by several code paths (transaction
+create/update/delete, transfers, initial balance edits), so they can drift.
+The expected balance of every wallet is recomputed in one query as
+
+    initial_balance + Σ incomes − Σ expenses − Σ transfers out + Σ transfers in
+
+and compared with the stored balance. Transfers out count their source
+amount and transfers in their (converted) target amount.
+
+Drift is decided on `balance` alone: balance_rwf was converted at the rate
+of the wallet's last write, so comparing it with today's conversion would
+flag every foreign-currency wallet after a rate update. A repaired wallet
+gets its balance_rwf converted again, with one RateSnapshot for the run.
+"""
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .caching import invalidate_tags, model_tag
+from .models import Wallet, Income, Expense, Transfer
+from .transactions import BASE_CURRENCY_CODE, RateSnapshot
+
+logger = logging.getLogger(__name__)
+
+AMOUNT_FIELD = DecimalField(max_digits=15, decimal_places=2)
+
+CENT = Decimal('0.01')
+
+
+def _coalesced(subquery):
+    return Coalesce(Subquery(subquery, output_field=AMOUNT_FIELD), Value(Decimal('0')), output_field=AMOUNT_FIELD)
+
+
+def wallet_amount_total(model):
+    """Correlated SUM(amount) of a transaction model, in the wallet's currency"""
+    totals = model.objects.filter(
+        wallet=OuterRef('pk')
+    ).order_by().values('wallet').annotate(total=Sum('amount')).values('total')
+    return _coalesced(totals)
+
+
+def transfer_total(direction):
+    """
+    Correlated sum of transfers out of ('source') or into ('target') the
+    wallet, in the wallet's currency
+    """
+    transfers = Transfer.objects.filter(
+        **{f'{direction}_wallet': OuterRef('pk')}
+    ).order_by().values(f'{direction}_wallet').annotate(total=Sum(f'{direction}_amount')).values('total')
+    return _coalesced(transfers)
+
+
+def wallets_with_expected_balance(queryset=None):
+    """Annotate wallets with their component totals and expected balance"""
+    queryset = Wallet.objects.all() if queryset is None else queryset
+    return queryset.select_related('currency').annotate(
+        income_total=wallet_amount_total(Income),
+        expense_total=wallet_amount_total(Expense),
+        transfers_out=transfer_total('source'),
+        transfers_in=transfer_total('target'),
+    ).annotate(
+        expected_balance=ExpressionWrapper(
+            F('initial_balance') + F('income_total') - F('expense_total')
+            - F('transfers_out') + F('transfers_in'),
+            output_field=AMOUNT_FIELD
+        )
+    ).order_by('pk')
+
+
+def reconcile_wallets(queryset=None, repair=False, rates=None) -> list:
+    """
+    Compare stored and expected balances for each wallet. Returns one entry
+    per wallet whose balance differs; with `repair`, the drifting wallets
+    are locked and corrected (balance and balance_rwf) with a single bulk
+    update.
+    """
+    wallets = wallets_with_expected_balance(queryset)
+    if repair:
+        wallets = wallets.select_for_update(of=('self',))
+        rates = rates or RateSnapshot()
+
+    drifted = []
+    results = []
+    with transaction.atomic():
+        for wallet in wallets:
+            expected = Decimal(wallet.expected_balance).quantize(CENT)
+            balance_drift = wallet.balance - expected
+            if not balance_drift:
+                continue
+
+            result = {
+                'wallet_id': wallet.pk,
+                'wallet': wallet.name,
+                'currency': wallet.currency.code,
+                'balance': wallet.balance,
+                'expected_balance': expected,
+                'balance_drift': balance_drift,
+                'balance_rwf': wallet.balance_rwf,
+                'repaired': repair,
+            }
+            if repair:
+                wallet.balance = expected
+                wallet.balance_rwf = rates.convert(expected, wallet.currency.code, BASE_CURRENCY_CODE)
+                result['repaired_balance_rwf'] = wallet.balance_rwf
+                drifted.append(wallet)
+            results.append(result)
+
+        if drifted:
+            Wallet.objects.bulk_update(drifted, ['balance', 'balance_rwf'], batch_size=500)
+            # bulk_update() doesn't send post_save, so invalidate like the signals would
+            transaction.on_commit(lambda: invalidate_tags(model_tag(Wallet)))
+            logger.warning(f"Repaired balance drift on {len(drifted)} wallet(s)")
+
+    return results
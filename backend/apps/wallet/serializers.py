@@ -3,9 +3,13 @@ from django.contrib.auth.models import User, Group
 from .models import (
     Currency, Wallet, TransactionCategory, TransactionTag,
     Income, Expense, Subscription, Budget, SavingsGoal,
-    TransactionHistory
+    TransactionHistory, Transfer, AccountingPeriod, PeriodWalletBalance, PeriodCategoryTotal
 )
+from apps.projects.models import Project
 from apps.projects.serializers import ProjectListSerializer
+from .bulk import BULK_OPERATIONS, BULK_MAX_IDS, TAG_MODES
+from .transactions import TRANSFER_BATCH_MAX
+from nvms.fieldsets import SparseFieldsetSerializerMixin
 
 class GroupSerializer(serializers.ModelSerializer):
     class Meta:
@@ -47,6 +51,18 @@ class WalletReferenceSerializer(serializers.ModelSerializer):
         read_only_fields = ['balance', 'balance_rwf']
 
 
+class WalletOptionSerializer(WalletReferenceSerializer):
+    """
+    Wallet for the reference data bundle: no balances, so posting a
+    transaction doesn't change the bundle (balances are on /wallets/)
+    """
+
+    class Meta(WalletReferenceSerializer.Meta):
+        fields = ['id', 'name', 'wallet_type', 'wallet_type_display', 'currency',
+                  'currency_code', 'currency_symbol', 'is_active']
+        read_only_fields = []
+
+
 class WalletSerializer(serializers.ModelSerializer):
     currency_details = CurrencySerializer(source='currency', read_only=True)
     wallet_type_display = serializers.CharField(source='get_wallet_type_display', read_only=True)
@@ -83,17 +99,45 @@ class TransactionCategorySerializer(serializers.ModelSerializer):
 
     def get_subcategory_ids(self, obj):
         """Return only IDs to avoid recursive serialization"""
+        subcategories = getattr(obj, 'active_subcategories', None)
+        if subcategories is not None:
+            # Prefetched or attached from an already loaded list
+            return [subcategory.id for subcategory in subcategories]
         return list(obj.subcategories.filter(is_active=True).values_list('id', flat=True))
 
 
+class TransactionCategoryTreeSerializer(TransactionCategorySerializer):
+    """Category with its active subcategories nested (see TransactionCategory.attach_subcategories)"""
+    subcategories = serializers.SerializerMethodField()
+
+    def get_subcategories(self, obj):
+        return TransactionCategoryTreeSerializer(
+            obj.active_subcategories, many=True, context=self.context
+        ).data
+
+
 class TransactionTagSerializer(serializers.ModelSerializer):
     class Meta:
         model = TransactionTag
         fields = '__all__'
 
 
+# Nested details list serializers can add with ?expand=
+TRANSACTION_EXPANDABLE_FIELDS = {
+    'wallet': ('wallet_details', lambda: WalletSerializer(source='wallet', read_only=True)),
+    'project': ('project_details', lambda: ProjectListSerializer(source='project', read_only=True)),
+    'category': ('category_details', lambda: TransactionCategorySerializer(source='category', read_only=True)),
+    'tags': ('tags_details', lambda: TransactionTagSerializer(source='tags', many=True, read_only=True)),
+    'created_by': ('created_by_details', lambda: UserSerializer(source='created_by', read_only=True)),
+    'currency_original': (
+        'currency_original_details',
+        lambda: CurrencySerializer(source='currency_original', read_only=True)
+    ),
+}
+
+
 # Lightweight serializers for list views
-class IncomeListSerializer(serializers.ModelSerializer):
+class IncomeListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Lightweight serializer for income list - only IDs for foreign keys"""
     recurrence_type_display = serializers.CharField(source='get_recurrence_type_display', read_only=True)
     
@@ -106,9 +150,10 @@ class IncomeListSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at', 'amount', 'amount_rwf']
+        expandable_fields = TRANSACTION_EXPANDABLE_FIELDS
 
 
-class IncomeSerializer(serializers.ModelSerializer):
+class IncomeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     wallet_details = WalletSerializer(source='wallet', read_only=True)
     project_details = ProjectListSerializer(source='project', read_only=True)
     category_details = TransactionCategorySerializer(source='category', read_only=True)
@@ -136,7 +181,7 @@ class IncomeSerializer(serializers.ModelSerializer):
 
 
 # Lightweight serializer for expense list
-class ExpenseListSerializer(serializers.ModelSerializer):
+class ExpenseListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Lightweight serializer for expense list - only IDs for foreign keys"""
     recurrence_type_display = serializers.CharField(source='get_recurrence_type_display', read_only=True)
     
@@ -149,9 +194,10 @@ class ExpenseListSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at', 'amount', 'amount_rwf']
+        expandable_fields = TRANSACTION_EXPANDABLE_FIELDS
 
 
-class ExpenseSerializer(serializers.ModelSerializer):
+class ExpenseSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     wallet_details = WalletSerializer(source='wallet', read_only=True)
     project_details = ProjectListSerializer(source='project', read_only=True)
     category_details = TransactionCategorySerializer(source='category', read_only=True)
@@ -282,6 +328,74 @@ class SavingsGoalSerializer(serializers.ModelSerializer):
         return data
 
 
+class TransferSerializer(serializers.ModelSerializer):
+    source_wallet_details = WalletReferenceSerializer(source='source_wallet', read_only=True)
+    target_wallet_details = WalletReferenceSerializer(source='target_wallet', read_only=True)
+    created_by_details = UserSerializer(source='created_by', read_only=True)
+
+    class Meta:
+        model = Transfer
+        fields = '__all__'
+        read_only_fields = [
+            'target_amount', 'exchange_rate', 'amount_rwf', 'created_at', 'created_by'
+        ]
+
+    def validate(self, data):
+        if data['source_wallet'] == data['target_wallet']:
+            raise serializers.ValidationError("Source and target wallet must differ")
+        return data
+
+    @staticmethod
+    def transfer_spec(data):
+        """Validated data in the form create_transfers() takes"""
+        return {
+            'source_wallet_id': data['source_wallet'].pk,
+            'target_wallet_id': data['target_wallet'].pk,
+            'amount': data['source_amount'],
+            'date': data.get('date'),
+            'description': data.get('description', ''),
+        }
+
+
+class TransferBatchSerializer(serializers.Serializer):
+    """Input for creating many transfers in one transaction"""
+    transfers = TransferSerializer(many=True, allow_empty=False, max_length=TRANSFER_BATCH_MAX)
+
+
+class PeriodWalletBalanceSerializer(serializers.ModelSerializer):
+    wallet_name = serializers.CharField(source='wallet.name', read_only=True)
+    currency_code = serializers.CharField(source='wallet.currency.code', read_only=True)
+
+    class Meta:
+        model = PeriodWalletBalance
+        exclude = ['period']
+
+
+class PeriodCategoryTotalSerializer(serializers.ModelSerializer):
+    category_name = serializers.CharField(source='category.full_path', read_only=True)
+
+    class Meta:
+        model = PeriodCategoryTotal
+        exclude = ['period']
+
+
+class AccountingPeriodSerializer(serializers.ModelSerializer):
+    closed_by_details = UserSerializer(source='closed_by', read_only=True)
+    wallet_balances = PeriodWalletBalanceSerializer(many=True, read_only=True)
+    category_totals = PeriodCategoryTotalSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = AccountingPeriod
+        fields = '__all__'
+
+
+class ClosePeriodSerializer(serializers.Serializer):
+    """Input for closing a month"""
+    year = serializers.IntegerField(min_value=2000, max_value=2100)
+    month = serializers.IntegerField(min_value=1, max_value=12)
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+
 class TransactionHistorySerializer(serializers.ModelSerializer):
     user_details = UserSerializer(source='user', read_only=True)
     action_display = serializers.CharField(source='get_action_display', read_only=True)
@@ -299,10 +413,15 @@ class WalletSummarySerializer(serializers.Serializer):
     wallet_id = serializers.IntegerField()
     wallet_name = serializers.CharField()
     balance = serializers.DecimalField(max_digits=15, decimal_places=2)
+    balance_rwf = serializers.DecimalField(max_digits=15, decimal_places=2)
     total_income = serializers.DecimalField(max_digits=15, decimal_places=2)
     total_expense = serializers.DecimalField(max_digits=15, decimal_places=2)
+    transfers_in = serializers.DecimalField(max_digits=15, decimal_places=2)
+    transfers_out = serializers.DecimalField(max_digits=15, decimal_places=2)
     net_flow = serializers.DecimalField(max_digits=15, decimal_places=2)
     currency_code = serializers.CharField()
+    base_currency = serializers.CharField()
+    currency_breakdown = serializers.DictField(required=False)
 
 
 class MonthlyReportSerializer(serializers.Serializer):
@@ -315,16 +434,25 @@ class MonthlyReportSerializer(serializers.Serializer):
     income_by_category = serializers.DictField()
     expense_by_category = serializers.DictField()
     top_expenses = serializers.ListField()
+    currency = serializers.CharField()
+    rates = serializers.CharField()
+    closed = serializers.BooleanField(default=False)
 
 
 class ProjectProfitabilitySerializer(serializers.Serializer):
     """Project profitability analysis"""
-    project_id = serializers.IntegerField()
+    project_id = serializers.UUIDField()
     project_name = serializers.CharField()
+    status = serializers.CharField()
     total_income = serializers.DecimalField(max_digits=15, decimal_places=2)
     total_expense = serializers.DecimalField(max_digits=15, decimal_places=2)
     profit = serializers.DecimalField(max_digits=15, decimal_places=2)
-    profit_margin = serializers.DecimalField(max_digits=5, decimal_places=2)
+    profit_margin = serializers.DecimalField(max_digits=15, decimal_places=2)
+    budget = serializers.DecimalField(max_digits=15, decimal_places=2, allow_null=True)
+    budget_remaining = serializers.DecimalField(max_digits=15, decimal_places=2, allow_null=True)
+    budget_burn = serializers.DecimalField(max_digits=15, decimal_places=2, allow_null=True)
+    currency = serializers.CharField()
+    monthly = serializers.ListField(required=False)
 
 
 class CashFlowSerializer(serializers.Serializer):
@@ -332,5 +460,39 @@ class CashFlowSerializer(serializers.Serializer):
     date = serializers.DateField()
     income = serializers.DecimalField(max_digits=15, decimal_places=2)
     expense = serializers.DecimalField(max_digits=15, decimal_places=2)
+    transfers_in = serializers.DecimalField(max_digits=15, decimal_places=2)
+    transfers_out = serializers.DecimalField(max_digits=15, decimal_places=2)
     net_flow = serializers.DecimalField(max_digits=15, decimal_places=2)
     cumulative_balance = serializers.DecimalField(max_digits=15, decimal_places=2)
+
+
+class BulkTransactionActionSerializer(serializers.Serializer):
+    """Input for bulk income/expense operations"""
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=BULK_MAX_IDS)
+    operation = serializers.ChoiceField(choices=BULK_OPERATIONS)
+    category = serializers.PrimaryKeyRelatedField(queryset=TransactionCategory.objects.all(), required=False)
+    project = serializers.PrimaryKeyRelatedField(queryset=Project.objects.all(), required=False, allow_null=True)
+    wallet = serializers.PrimaryKeyRelatedField(queryset=Wallet.objects.all(), required=False)
+    tags = serializers.PrimaryKeyRelatedField(queryset=TransactionTag.objects.all(), many=True, required=False)
+    tag_mode = serializers.ChoiceField(choices=TAG_MODES, default='add')
+
+    # Parameter each operation needs
+    REQUIRED_PARAMS = {
+        'recategorize': 'category',
+        'retag': 'tags',
+        'reassign_project': 'project',
+        'change_wallet': 'wallet',
+    }
+
+    def validate(self, data):
+        required = self.REQUIRED_PARAMS.get(data['operation'])
+        if required and required not in data:
+            raise serializers.ValidationError({required: f"This field is required for {data['operation']}."})
+        return data
+
+
+class MergeDuplicatesSerializer(serializers.Serializer):
+    """Input for merging duplicate incomes/expenses into one"""
+    keep = serializers.IntegerField()
+    duplicates = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=BULK_MAX_IDS)
+    force = serializers.BooleanField(default=False, help_text="Merge even if fingerprints differ")
@@ -8,6 +8,8 @@ from decimal import Decimal
 from typing import Dict, Optional
 import logging
 
+from .caching import record_cache_access
+
 logger = logging.getLogger(__name__)
 
 # Default cache duration: 1 hour (3600 seconds)
@@ -75,6 +77,7 @@ class ExchangeRateService:
         # Check cache first
         cache_key = self.get_cache_key(from_currency, to_currency)
         cached_rate = cache.get(cache_key)
+        record_cache_access('exchange_rate', cached_rate is not None)
         
         if cached_rate is not None:
             logger.debug(f"Using cached exchange rate: {from_currency} -> {to_currency} = {cached_rate}")
@@ -169,6 +172,7 @@ class ExchangeRateService:
         # Check if we can use cached rate
         cache_key = self.get_cache_key(from_currency, to_currency)
         cached_rate = cache.get(cache_key)
+        record_cache_access('exchange_rate', cached_rate is not None)
         
         if cached_rate is not None:
             converted = amount * Decimal(str(cached_rate))
@@ -208,7 +212,7 @@ class ExchangeRateService:
         Refresh exchange rates for all currencies in the database
         This can be called periodically (e.g., via cron job)
         """
-        from .models import Currency
+        from .models import Currency, ExchangeRateSnapshot
         
         base_currency = Currency.objects.filter(is_default=True).first()
         if not base_currency:
@@ -239,6 +243,9 @@ class ExchangeRateService:
                     logger.info(f"Updated {currency.code} rate to {new_rate}")
         
         logger.info(f"Refreshed exchange rates: {updated_count} currencies updated")
+
+        # Keep a dated copy for reports converted at transaction-date rates
+        ExchangeRateSnapshot.record_today()
         return updated_count
 
 
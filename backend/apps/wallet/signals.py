@@ -0,0 +1,53 @@
+"""
+Signal receivers that keep wallet caches in step with the database
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.projects.models import Project
+from .models import (
+    Currency, Wallet, TransactionCategory, TransactionTag,
+    Income, Expense, Subscription, Budget, SavingsGoal, Transfer, AccountingPeriod, ExchangeRateSnapshot
+)
+from .caching import bump_reference_data_version, invalidate_tags, model_tag
+
+# Models whose changes invalidate tagged response caches (see cached_response).
+# ExchangeRateSnapshot.record_today() bulk-creates and invalidates its tag itself.
+TAGGED_MODELS = [
+    Currency, ExchangeRateSnapshot, Wallet, TransactionCategory, TransactionTag, Income, Expense, Subscription,
+    Budget, SavingsGoal, Transfer, AccountingPeriod, Project,
+]
+
+
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Currency)
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Wallet)
+@receiver(post_save, sender=TransactionCategory)
+@receiver(post_delete, sender=TransactionCategory)
+@receiver(post_save, sender=TransactionTag)
+@receiver(post_delete, sender=TransactionTag)
+def invalidate_reference_data(sender, **kwargs):
+    """Bump the reference data version once the change is committed"""
+    transaction.on_commit(bump_reference_data_version)
+
+
+def invalidate_model_tag(sender, **kwargs):
+    """Invalidate cached responses tagged with the changed model"""
+    tag = model_tag(sender)
+    transaction.on_commit(lambda: invalidate_tags(tag))
+
+
+for model in TAGGED_MODELS:
+    post_save.connect(invalidate_model_tag, sender=model, dispatch_uid=f'invalidate_{model_tag(model)}_save')
+    post_delete.connect(invalidate_model_tag, sender=model, dispatch_uid=f'invalidate_{model_tag(model)}_delete')
+
+
+@receiver(m2m_changed, sender=Income.tags.through)
+@receiver(m2m_changed, sender=Expense.tags.through)
+def invalidate_tagged_transactions(sender, instance, action, model, **kwargs):
+    """Tag assignments change per-tag totals without saving the transaction"""
+    if action.startswith('post_'):
+        changed = model if isinstance(instance, TransactionTag) else type(instance)
+        invalidate_model_tag(changed)
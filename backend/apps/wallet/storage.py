@@ -0,0 +1,159 @@
+"""
+Content-addressed storage for uploaded receipts, documents and images
+
+Uploads are hashed (SHA-256) while they are streamed to a temporary file,
+then stored under their digest, sharded by hash prefix:
+
+    cas/ab/cd/abcd1234...ef.pdf
+
+Uploading the same bytes again reuses the stored object instead of writing
+a copy. Size, mime type and checksum are recorded in StoredFile.
+
+Because identical uploads share one object, files must not be deleted
+through this storage while other rows may still point at them.
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+CONTENT_PREFIX = 'cas'
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+# Uploads up to this size are spooled in memory before going to object storage
+SPOOL_MAX_SIZE = getattr(settings, 'CONTENT_STORAGE_SPOOL_MAX_SIZE', 10 * 1024 * 1024)
+
+
+def content_name(digest: str, extension: str = '') -> str:
+    """Sharded storage name for a digest, e.g. cas/ab/cd/abcd...ef.pdf"""
+    return f'{CONTENT_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()}'
+
+
+def guess_mime_type(name, content) -> str:
+    """Mime type from the file name, falling back to what the client sent"""
+    mime_type, _ = mimetypes.guess_type(name)
+    return mime_type or getattr(content, 'content_type', None) or 'application/octet-stream'
+
+
+def copy_and_hash(content, destination):
+    """Stream content into destination in one pass, returning (sha256 hex digest, size)"""
+    sha256 = hashlib.sha256()
+    size = 0
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        sha256.update(chunk)
+        destination.write(chunk)
+        size += len(chunk)
+    return sha256.hexdigest(), size
+
+
+def find_stored_file(digest):
+    """StoredFile already holding this content, if any"""
+    from .models import StoredFile
+    return StoredFile.objects.filter(digest=digest).first()
+
+
+def record_duplicate(stored):
+    """Count another upload of content that was already stored"""
+    from .models import StoredFile
+    StoredFile.objects.filter(pk=stored.pk).update(upload_count=F('upload_count') + 1)
+    logger.info(f"Deduplicated upload of {stored.name} ({stored.size} bytes)")
+
+
+def record_stored_file(digest, name, size, mime_type):
+    """Record newly stored content (replacing a row whose object went missing)"""
+    from .models import StoredFile
+    StoredFile.objects.update_or_create(
+        digest=digest,
+        defaults={'name': name, 'size': size, 'mime_type': mime_type}
+    )
+
+
+class ContentAddressedMixin:
+    """Shared naming for content-addressed storages"""
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content digest in _save()
+        return name
+
+
+class ContentAddressedFileSystemStorage(ContentAddressedMixin, FileSystemStorage):
+    """
+    Local disk storage. Uploads are hashed while written to a temporary file
+    next to MEDIA_ROOT and moved into place atomically, or discarded if an
+    object with the same digest already exists.
+    """
+
+    def _save(self, name, content):
+        incoming = self.path('.incoming')
+        os.makedirs(incoming, exist_ok=True)
+
+        with tempfile.NamedTemporaryFile(dir=incoming, delete=False) as temp_file:
+            digest, size = copy_and_hash(content, temp_file)
+
+        stored = find_stored_file(digest)
+        if stored and self.exists(stored.name):
+            os.unlink(temp_file.name)
+            record_duplicate(stored)
+            return stored.name
+
+        stored_name = content_name(digest, os.path.splitext(name)[1])
+        full_path = self.path(stored_name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        os.replace(temp_file.name, full_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+
+        record_stored_file(digest, stored_name, size, guess_mime_type(name, content))
+        return stored_name
+
+
+try:
+    from storages.backends.s3 import S3Storage
+except ImportError:
+    S3Storage = None
+
+
+if S3Storage is not None:
+    class ContentAddressedS3Storage(ContentAddressedMixin, S3Storage):
+        """
+        S3-compatible object storage (AWS S3, MinIO, ...). Uploads are hashed
+        while spooled to a temporary file, and only sent if no object with
+        the same digest was stored yet (checked against StoredFile rather
+        than with a HEAD request).
+        """
+
+        def _save(self, name, content):
+            mime_type = guess_mime_type(name, content)
+
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool:
+                digest, size = copy_and_hash(content, spool)
+
+                stored = find_stored_file(digest)
+                if stored:
+                    record_duplicate(stored)
+                    return stored.name
+
+                stored_name = content_name(digest, os.path.splitext(name)[1])
+                spool.seek(0)
+                spooled = File(spool, name=stored_name)
+                spooled.content_type = mime_type
+                super()._save(stored_name, spooled)
+
+            record_stored_file(digest, stored_name, size, mime_type)
+            return stored_name
+
+
+def get_content_storage():
+    """Storage for content-addressed uploads (the 'content' alias in STORAGES)"""
+    return storages['content']
@@ -0,0 +1,250 @@
+"""
+Income and expense time-series statistics for the finance dashboard
+
+One UNION ALL query returns daily RWF totals per (type, group, day), where
+the group is a wallet, category, project or everything. The rows are
+scattered into a dense series × day matrix, and every statistic comes
+from its prefix sums:
+
+- rolling 7/30/90-day sums and moving averages
+- month-to-date vs the same days of the previous month (MoM)
+- year-to-date vs the same days of the previous year (YoY)
+- quantiles of the daily totals on days with activity
+
+Optionally (`detail`) the daily rolling series and monthly totals with
+their MoM/YoY deltas are returned as columns.
+"""
+import logging
+import time
+import warnings
+from datetime import date, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import F, FloatField, IntegerField, Sum, Value
+from django.db.models.functions import Cast
+
+from apps.projects.models import Project
+from .models import Income, Expense, TransactionCategory, Wallet
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_MODELS = {'income': Income, 'expense': Expense}
+
+# ?group_by= values and the transaction field they group on
+GROUPINGS = {'total': None, 'wallet': 'wallet_id', 'category': 'category_id', 'project': 'project_id'}
+
+ROLLING_WINDOWS = (7, 30, 90)
+
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+SERIES_DETAILS = ['daily', 'monthly']
+
+# Default reporting range when ?start_date= is not given
+DEFAULT_RANGE_DAYS = 365
+
+# Longest reporting range: the day matrix and ?detail=daily grow with it
+TIMESERIES_MAX_DAYS = getattr(settings, 'TIMESERIES_MAX_DAYS', 3660)
+
+
+def _round(values):
+    """Round a float array to cents for the response, NaN → None"""
+    return [None if value != value else round(value, 2) for value in np.asarray(values, dtype=float).tolist()]
+
+
+def _pct(delta, previous):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(previous != 0, delta / np.where(previous != 0, previous, 1) * 100, np.nan)
+
+
+def daily_totals(group_field, start, end):
+    """
+    Daily amount_rwf totals as (kind, key, day, total) tuples: one GROUP BY
+    per transaction type, combined with UNION ALL into a single statement
+    """
+    grouped = [
+        model.objects.filter(date__gte=start, date__lte=end).order_by().values(
+            kind=Value(kind),
+            key=F(group_field) if group_field else Value(0, output_field=IntegerField()),
+            day=F('date'),
+        ).annotate(
+            # Summed as float8 in the database: no Decimal per row
+            total=Cast(Sum('amount_rwf'), FloatField())
+        ).values_list('kind', 'key', 'day', 'total')
+        for kind, model in TRANSACTION_MODELS.items()
+    ]
+    return grouped[0].union(*grouped[1:], all=True)
+
+
+def group_names(group_by, keys) -> dict:
+    keys = [key for key in keys if key is not None]
+    if group_by == 'wallet':
+        return dict(Wallet.objects.filter(pk__in=keys).values_list('id', 'name'))
+    if group_by == 'category':
+        return dict(TransactionCategory.objects.filter(pk__in=keys).values_list('id', 'full_path'))
+    if group_by == 'project':
+        return dict(Project.objects.filter(pk__in=keys).values_list('id', 'title'))
+    return {0: 'All'}
+
+
+def _month_starts(first, last):
+    """First day of every month from `first`'s month to `last`'s month"""
+    months = np.arange(np.datetime64(first, 'M'), np.datetime64(last, 'M') + 1)
+    return months.astype('datetime64[D]')
+
+
+def time_series_stats(group_by='total', start=None, end=None, detail=()) -> dict:
+    """
+    Rolling sums, MoM/YoY deltas and quantiles of daily income and expense
+    per group. Rolling, MoM and YoY figures are as of `end`; totals,
+    quantiles and the detail series cover `start`..`end`.
+    """
+    started = time.perf_counter()
+    end = end or date.today()
+    start = start or end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if start > end:
+        raise ValueError("start_date must be on or before end_date")
+    if (end - start).days + 1 > TIMESERIES_MAX_DAYS:
+        raise ValueError(f"The date range can't be longer than {TIMESERIES_MAX_DAYS} days")
+
+    month_start = end.replace(day=1)
+    previous_month_start = (month_start - timedelta(days=1)).replace(day=1)
+    year_start = date(end.year, 1, 1)
+    previous_year_start = date(end.year - 1, 1, 1)
+    # Pull enough history for the widest window, MoM and YoY
+    first = min(start, previous_year_start, end - timedelta(days=max(ROLLING_WINDOWS) - 1))
+    if 'monthly' in detail:
+        # ... and a year before the first reported month for its YoY delta
+        first = min(first, date(start.year - 1, start.month, 1))
+
+    rows = list(daily_totals(GROUPINGS[group_by], first, end))
+    day_count = (end - first).days + 1
+
+    if rows:
+        kinds, keys, days, totals = zip(*rows)
+        kinds = np.array(kinds)
+        keys = np.array(keys, dtype=object)
+        key_labels, first_seen, groups = np.unique(keys.astype(str), return_index=True, return_inverse=True)
+        group_keys = keys[first_seen]
+        kind_index = (kinds == 'expense').astype(int)
+        series_index = kind_index * len(key_labels) + groups
+        day_index = (np.array(days, dtype='datetime64[D]') - np.datetime64(first)).astype(int)
+        matrix = np.zeros((2 * len(key_labels), day_count))
+        np.add.at(matrix, (series_index, day_index), np.array(totals, dtype=float))
+    else:
+        group_keys = np.array([], dtype=object)
+        matrix = np.zeros((0, day_count))
+
+    # prefix[:, i] = sum of the first i days, so any span is one subtraction
+    prefix = np.zeros((matrix.shape[0], day_count + 1))
+    np.cumsum(matrix, axis=1, out=prefix[:, 1:])
+
+    def index(day):
+        return (day - first).days
+
+    def span(from_day, days):
+        """Totals of `days` days starting at `from_day`"""
+        i = index(from_day)
+        return prefix[:, i + days] - prefix[:, i]
+
+    rolling = {window: prefix[:, -1] - prefix[:, -1 - window] for window in ROLLING_WINDOWS}
+
+    # Month and year to date vs the same number of days one period earlier
+    mtd_days = (end - month_start).days + 1
+    month_to_date = span(month_start, mtd_days)
+    previous_month_days = min(mtd_days, (month_start - previous_month_start).days)
+    previous_month_to_date = span(previous_month_start, previous_month_days)
+    ytd_days = (end - year_start).days + 1
+    year_to_date = span(year_start, ytd_days)
+    previous_year_to_date = span(previous_year_start, min(ytd_days, (year_start - previous_year_start).days))
+
+    in_range = matrix[:, index(start):]
+    range_total = in_range.sum(axis=1)
+    active = in_range > 0
+    active_days = active.sum(axis=1)
+    quantiles = None
+    if in_range.size:
+        with warnings.catch_warnings():
+            # Series without activity in range have no quantiles (all NaN)
+            warnings.simplefilter('ignore', RuntimeWarning)
+            quantiles = np.nanquantile(np.where(active, in_range, np.nan), QUANTILES, axis=1)
+
+    mom_delta = month_to_date - previous_month_to_date
+    yoy_delta = year_to_date - previous_year_to_date
+    columns = {
+        'total': range_total,
+        'month_to_date': month_to_date,
+        'previous_month_to_date': previous_month_to_date,
+        'mom_delta': mom_delta,
+        'mom_pct': _pct(mom_delta, previous_month_to_date),
+        'year_to_date': year_to_date,
+        'previous_year_to_date': previous_year_to_date,
+        'yoy_delta': yoy_delta,
+        'yoy_pct': _pct(yoy_delta, previous_year_to_date),
+    }
+    columns = {name: _round(values) for name, values in columns.items()}
+    rolling_columns = {str(window): _round(values) for window, values in rolling.items()}
+    average_columns = {str(window): _round(values / window) for window, values in rolling.items()}
+    quantile_columns = {str(q): _round(values) for q, values in zip(QUANTILES, quantiles)} if quantiles is not None else {}
+
+    names = group_names(group_by, group_keys.tolist())
+    group_count = len(group_keys)
+    # Only series with activity in the pulled history
+    active_series = np.flatnonzero(prefix[:, -1] > 0)
+    series = []
+    for s in active_series.tolist():
+        key = group_keys[s % group_count]
+        series.append({
+            'kind': 'income' if s < group_count else 'expense',
+            'key': None if group_by == 'total' else (str(key) if group_by == 'project' and key is not None else key),
+            'name': names.get(key) if key is not None else None,
+            'active_days': int(active_days[s]),
+            **{name: values[s] for name, values in columns.items()},
+            'rolling': {window: values[s] for window, values in rolling_columns.items()},
+            'moving_average': {window: values[s] for window, values in average_columns.items()},
+            'quantiles': {q: values[s] for q, values in quantile_columns.items()},
+        })
+
+    result = {
+        'start_date': start,
+        'end_date': end,
+        'group_by': group_by,
+        'windows': list(ROLLING_WINDOWS),
+        'quantiles': list(QUANTILES),
+        'currency': 'RWF',
+        'series': series,
+    }
+
+    if 'daily' in detail:
+        days = np.arange(index(start), day_count)
+        result['daily'] = {'dates': [start + timedelta(days=i) for i in range(len(days))]}
+        for entry, s in zip(series, active_series):
+            entry['daily'] = {'total': _round(matrix[s, days])}
+            for window in ROLLING_WINDOWS:
+                window_sums = prefix[s, days + 1] - prefix[s, np.maximum(days + 1 - window, 0)]
+                entry['daily'][f'rolling_{window}'] = _round(window_sums)
+
+    if 'monthly' in detail:
+        month_starts = _month_starts(first, end)
+        boundaries = (month_starts - np.datetime64(first)).astype(int)
+        monthly = np.add.reduceat(matrix, boundaries, axis=1) if matrix.size else np.zeros((0, len(boundaries)))
+        reported = np.flatnonzero(month_starts >= np.datetime64(start, 'M').astype('datetime64[D]'))
+        previous = np.full_like(monthly, np.nan)
+        previous[:, 1:] = monthly[:, :-1]
+        last_year = np.full_like(monthly, np.nan)
+        last_year[:, 12:] = monthly[:, :-12]
+        result['monthly'] = {'months': [month.item() for month in month_starts[reported]]}
+        for entry, s in zip(series, active_series):
+            entry['monthly'] = {
+                'total': _round(monthly[s, reported]),
+                'mom_delta': _round((monthly[s] - previous[s])[reported]),
+                'mom_pct': _round(_pct(monthly[s] - previous[s], previous[s])[reported]),
+                'yoy_delta': _round((monthly[s] - last_year[s])[reported]),
+                'yoy_pct': _round(_pct(monthly[s] - last_year[s], last_year[s])[reported]),
+            }
+
+    logger.debug(
+        f"Time series ({group_by}, {len(rows)} rows, {len(series)} series) "
+        f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+    )
+    return result
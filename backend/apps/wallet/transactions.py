@@ -0,0 +1,444 @@
+"""
+Write pipeline for incomes, expenses and subscriptions
+
+Every write goes through save_transaction(), which replaces the three
+copies of the conversion and balance logic that used to live in the
+models' save() methods. Within one transaction it:
+
+1. locks the affected wallet rows (with their currency) in id order,
+2. converts the amounts with one RateSnapshot, so the original→wallet and
+   wallet→RWF conversions and the new balance_rwf use the same rates,
+3. writes the row once (the next recurrence date is set before the INSERT
+   instead of by a second save),
+4. applies one balance UPDATE per wallet and, when a user is given, one
+   audit row.
+
+The models' save() delegates here, so ORM callers (admin, commands) get
+the same behaviour as the API. Wallet transfers go through
+create_transfers(), which follows the same steps for a batch of transfers.
+"""
+import json
+import logging
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import invalidate_tags, model_tag
+from .models import (
+    AccountingPeriod, Currency, Income, Expense, PeriodWalletBalance, Transfer, Wallet, TransactionHistory
+)
+from .services import exchange_rate_service
+
+logger = logging.getLogger(__name__)
+
+BASE_CURRENCY_CODE = 'RWF'
+
+CENT = Decimal('0.01')
+
+# Upper bound on transfers per batch request
+TRANSFER_BATCH_MAX = getattr(settings, 'TRANSFER_BATCH_MAX', 500)
+
+# Fields snapshotted into the audit trail for incomes and expenses
+AUDIT_FIELDS = ['title', 'amount', 'amount_rwf', 'date', 'wallet_id', 'category_id', 'project_id']
+
+# Fields whose change requires converting amounts and adjusting balances
+AMOUNT_FIELDS = {'amount', 'amount_original', 'currency_original', 'currency_original_id', 'wallet', 'wallet_id'}
+
+# Fields set by prepare_amounts()
+CONVERTED_FIELDS = {'amount', 'amount_rwf', 'amount_original', 'currency_original'}
+
+# Fields the duplicate fingerprint is computed from
+FINGERPRINT_FIELDS = {'title'}
+
+
+class TransactionWriteError(ValueError):
+    """A transaction couldn't be written; nothing was changed"""
+
+
+class InsufficientBalanceError(TransactionWriteError):
+    """A write would take a wallet below zero"""
+
+
+class PeriodClosedError(TransactionWriteError):
+    """A write would change a closed accounting period"""
+
+
+def ensure_open(*dates):
+    """
+    Raise PeriodClosedError if any of the dates falls in a closed period.
+    Reads the latest closed period from the database, not the cached
+    AccountingPeriod.closed_through(): a writer that waited on the wallet
+    locks of a close must see that close as soon as it gets them.
+    """
+    closed_through = AccountingPeriod.objects.order_by('-end_date').values_list('end_date', flat=True).first()
+    if closed_through is None:
+        return
+    closed = sorted(day for day in dates if day is not None and day <= closed_through)
+    if closed:
+        raise PeriodClosedError(
+            f"The books are closed through {closed_through.isoformat()} "
+            f"(transaction dated {closed[0].isoformat()})"
+        )
+
+
+def balance_sign(model) -> int:
+    """Incomes add to their wallet's balance, expenses subtract from it, subscriptions don't touch it"""
+    if model is Income:
+        return 1
+    if model is Expense:
+        return -1
+    return 0
+
+
+def jsonable(data):
+    """Round-trip through DjangoJSONEncoder so dates and decimals fit a JSONField"""
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+class RateSnapshot:
+    """
+    Exchange rates resolved once and reused for every conversion of a write
+    (or a batch of writes). Rates come from the cached exchange rate
+    service, falling back to the stored Currency rates. Report conversions
+    (conversion.ReportCurrency) use the same lookup.
+    """
+
+    def __init__(self):
+        self._rates = {}
+        self._stored_rates = None
+
+    def _stored_rate(self, source, target):
+        if self._stored_rates is None:
+            self._stored_rates = dict(Currency.objects.values_list('code', 'exchange_rate_to_base'))
+        source_rate = self._stored_rates.get(source)
+        target_rate = self._stored_rates.get(target)
+        if not source_rate or not target_rate:
+            raise TransactionWriteError(f"No exchange rate from {source} to {target}")
+        return Decimal(str(target_rate / source_rate))
+
+    def rate(self, source, target) -> Decimal:
+        """Rate from currency code `source` to `target`"""
+        if source == target:
+            return Decimal('1')
+        if (source, target) not in self._rates:
+            rate = exchange_rate_service.get_exchange_rate(source, target)
+            self._rates[source, target] = rate if rate is not None else self._stored_rate(source, target)
+        return self._rates[source, target]
+
+    def convert(self, amount, source, target) -> Decimal:
+        return (amount * self.rate(source, target)).quantize(CENT)
+
+
+def lock_wallets(wallet_ids) -> dict:
+    """Lock wallets (in id order, so concurrent writes can't deadlock) with their currency"""
+    return {
+        wallet.pk: wallet
+        for wallet in Wallet.objects.select_for_update(of=('self',)).select_related('currency').filter(
+            pk__in=set(wallet_ids)
+        ).order_by('pk')
+    }
+
+
+def apply_balance_deltas(wallets, deltas, rates):
+    """
+    Add each delta to its locked wallet's balance and refresh balance_rwf
+    with the snapshot rates: one UPDATE per changed wallet. UPDATE skips the
+    save signals, so wallet caches are invalidated once on commit.
+    """
+    now = timezone.now()
+    changed = False
+    for wallet_id in sorted(deltas):
+        delta = deltas[wallet_id]
+        if not delta:
+            continue
+        wallet = wallets[wallet_id]
+        new_balance = wallet.balance + delta
+        if new_balance < 0:
+            raise InsufficientBalanceError(
+                f"Insufficient balance in {wallet.name}. "
+                f"Current: {wallet.balance}, Required: {-delta}"
+            )
+        wallet.balance = new_balance
+        wallet.balance_rwf = rates.convert(new_balance, wallet.currency.code, BASE_CURRENCY_CODE)
+        Wallet.objects.filter(pk=wallet_id).update(
+            balance=wallet.balance, balance_rwf=wallet.balance_rwf, updated_at=now
+        )
+        changed = True
+
+    if changed:
+        transaction.on_commit(lambda: invalidate_tags(model_tag(Wallet)))
+
+
+def prepare_amounts(instance, wallet, rates):
+    """Set amount, amount_original/currency_original and amount_rwf from the snapshot rates"""
+    if not instance.amount_original:
+        if instance.amount is None:
+            raise TransactionWriteError("Amount is required")
+        # If no original amount specified, assume amount is in wallet currency
+        instance.amount_original = instance.amount
+        instance.currency_original = wallet.currency
+    elif not instance.currency_original_id:
+        instance.currency_original = wallet.currency
+
+    wallet_code = wallet.currency.code
+    if instance.currency_original_id == wallet.currency_id:
+        instance.amount = instance.amount_original
+    else:
+        instance.amount = rates.convert(instance.amount_original, instance.currency_original.code, wallet_code)
+    instance.amount_rwf = rates.convert(instance.amount, wallet_code, BASE_CURRENCY_CODE)
+
+
+def audit_snapshot(instance) -> dict:
+    return jsonable({'id': instance.pk, **{field: getattr(instance, field) for field in AUDIT_FIELDS}})
+
+
+def record_history(instance, user, action, old_data=None):
+    entity_type = instance._meta.model_name
+    TransactionHistory.objects.create(
+        user=user,
+        action=action,
+        entity_type=entity_type,
+        entity_id=instance.pk,
+        description=f"{'Created' if action == 'create' else 'Updated'} {entity_type}: {instance.title}",
+        old_data=old_data,
+        new_data=audit_snapshot(instance),
+    )
+
+
+def save_transaction(instance, user=None, rates=None, **save_kwargs):
+    """
+    Write an income, expense or subscription with its conversions, balance
+    change and (when `user` is given) audit entry in one transaction.
+    Raises TransactionWriteError, e.g. when a wallet would go negative.
+    """
+    model = type(instance)
+    update_fields = save_kwargs.get('update_fields')
+    if update_fields is not None and not AMOUNT_FIELDS & set(update_fields):
+        # e.g. advancing a recurrence: no conversion or balance change
+        fingerprinted = hasattr(instance, 'fingerprint') and FINGERPRINT_FIELDS & set(update_fields)
+        if not (fingerprinted or (hasattr(instance, 'date') and 'date' in update_fields)):
+            instance.save_row(**save_kwargs)
+            return instance
+        with transaction.atomic(savepoint=False):
+            old_date = model.objects.select_for_update().filter(pk=instance.pk).values_list('date', flat=True).first()
+            # Checked with the wallet locked, like a full write
+            lock_wallets([instance.wallet_id])
+            ensure_open(instance.date, old_date)
+            if fingerprinted:
+                instance.fingerprint = instance.compute_fingerprint()
+                save_kwargs['update_fields'] = {*update_fields, 'fingerprint'}
+            instance.save_row(**save_kwargs)
+        return instance
+
+    started = time.perf_counter()
+    rates = rates or RateSnapshot()
+    sign = balance_sign(model)
+    # Only incomes and expenses are audited here (AUDIT_FIELDS)
+    audited = user is not None
+
+    with transaction.atomic(savepoint=False):
+        dated = hasattr(instance, 'date')
+        old = None
+        if not instance._state.adding and (sign or audited or dated):
+            fields = {'wallet_id', 'amount', *(['date'] if dated else []), *(AUDIT_FIELDS if audited else [])}
+            old = model.objects.select_for_update().filter(pk=instance.pk).values('id', *fields).first()
+
+        wallet_ids = {instance.wallet_id} | ({old['wallet_id']} if old else set())
+        if sign:
+            wallets = lock_wallets(wallet_ids)
+        else:
+            wallets = Wallet.objects.select_related('currency').in_bulk([instance.wallet_id])
+        if instance.wallet_id not in wallets:
+            raise TransactionWriteError(f"Wallet not found: {instance.wallet_id}")
+        if dated:
+            # Checked with the wallets locked, so a concurrent period close can't slip in between
+            ensure_open(instance.date, old and old['date'])
+        instance.wallet = wallets[instance.wallet_id]
+
+        prepare_amounts(instance, instance.wallet, rates)
+        if hasattr(instance, 'fingerprint'):
+            instance.fingerprint = instance.compute_fingerprint()
+        if getattr(instance, 'is_recurring', False) and not instance.next_occurrence:
+            instance.set_next_occurrence()
+        if update_fields is not None:
+            save_kwargs['update_fields'] = {*update_fields, *CONVERTED_FIELDS}
+            if hasattr(instance, 'fingerprint'):
+                save_kwargs['update_fields'].add('fingerprint')
+        instance.save_row(**save_kwargs)
+
+        if sign:
+            deltas = defaultdict(Decimal)
+            deltas[instance.wallet_id] += sign * instance.amount
+            if old:
+                deltas[old['wallet_id']] -= sign * old['amount']
+            apply_balance_deltas(wallets, deltas, rates)
+
+        if audited:
+            record_history(
+                instance, user, 'update' if old else 'create',
+                old_data=jsonable({key: old[key] for key in ['id', *AUDIT_FIELDS]}) if old else None
+            )
+
+    logger.debug(
+        f"Saved {model._meta.model_name} {instance.pk} in {(time.perf_counter() - started) * 1000:.1f} ms"
+    )
+    return instance
+
+
+def delete_transaction(instance, user=None):
+    """Delete an income or expense, reverse its balance effect and record the deletion"""
+    entity_type = instance._meta.model_name
+    with transaction.atomic(savepoint=False):
+        wallets = lock_wallets([instance.wallet_id])
+        ensure_open(instance.date)
+        delta = -balance_sign(type(instance)) * instance.amount
+        apply_balance_deltas(wallets, {instance.wallet_id: delta}, RateSnapshot())
+        if user is not None:
+            TransactionHistory.objects.create(
+                user=user,
+                action='delete',
+                entity_type=entity_type,
+                entity_id=instance.pk,
+                description=f"Deleted {entity_type}: {instance.title}",
+                old_data=audit_snapshot(instance),
+            )
+        instance.delete()
+
+
+def set_initial_balance(wallet, initial_balance, rates=None):
+    """
+    Move a wallet's balance by the change in its initial balance (the caller
+    saves the new initial balance in the same transaction). Refused once a
+    closed period holds a closing balance for the wallet, since that
+    snapshot was computed from the old initial balance.
+    """
+    with transaction.atomic(savepoint=False):
+        wallets = lock_wallets([wallet.pk])
+        locked = wallets[wallet.pk]
+        if PeriodWalletBalance.objects.filter(wallet_id=wallet.pk).exists():
+            raise PeriodClosedError(
+                f"{wallet.name} is part of a closed period; its initial balance can't change"
+            )
+        apply_balance_deltas(wallets, {wallet.pk: initial_balance - locked.initial_balance}, rates or RateSnapshot())
+        wallet.balance, wallet.balance_rwf = locked.balance, locked.balance_rwf
+
+
+def create_transfers(transfers, user=None, rates=None) -> list:
+    """
+    Move funds between wallets. `transfers` is a list of dicts with
+    source_wallet_id, target_wallet_id, amount (in the source currency) and
+    optional date and description. The whole batch is applied in one
+    transaction: every wallet involved is locked once in id order, target
+    amounts come from one rate snapshot, and balances are checked on the
+    net change per wallet. Raises TransactionWriteError (nothing is moved).
+    """
+    started = time.perf_counter()
+    rates = rates or RateSnapshot()
+    for spec in transfers:
+        if spec['source_wallet_id'] == spec['target_wallet_id']:
+            raise TransactionWriteError("Source and target wallet must differ")
+        if spec['amount'] <= 0:
+            raise TransactionWriteError("Amount must be positive")
+
+    with transaction.atomic(savepoint=False):
+        wallet_ids = {spec[key] for spec in transfers for key in ('source_wallet_id', 'target_wallet_id')}
+        wallets = lock_wallets(wallet_ids)
+        missing = sorted(wallet_ids - set(wallets))
+        if missing:
+            raise TransactionWriteError(f"Wallet not found: {', '.join(map(str, missing))}")
+        ensure_open(*(spec.get('date') or timezone.localdate() for spec in transfers))
+
+        rows = []
+        deltas = defaultdict(Decimal)
+        for spec in transfers:
+            source = wallets[spec['source_wallet_id']]
+            target = wallets[spec['target_wallet_id']]
+            amount = Decimal(spec['amount']).quantize(CENT)
+            rate = rates.rate(source.currency.code, target.currency.code)
+            row = Transfer(
+                source_wallet=source,
+                target_wallet=target,
+                source_amount=amount,
+                target_amount=rates.convert(amount, source.currency.code, target.currency.code),
+                exchange_rate=rate.quantize(Decimal('1e-10')),
+                amount_rwf=rates.convert(amount, source.currency.code, BASE_CURRENCY_CODE),
+                description=spec.get('description') or '',
+                created_by=user,
+            )
+            if spec.get('date'):
+                row.date = spec['date']
+            deltas[source.pk] -= row.source_amount
+            deltas[target.pk] += row.target_amount
+            rows.append(row)
+
+        apply_balance_deltas(wallets, deltas, rates)
+        Transfer.objects.bulk_create(rows)
+        # bulk_create() skips post_save, so invalidate like the signals would
+        transaction.on_commit(lambda: invalidate_tags(model_tag(Transfer)))
+
+        if user is not None:
+            TransactionHistory.objects.bulk_create([
+                TransactionHistory(
+                    user=user,
+                    action='transfer',
+                    entity_type='transfer',
+                    entity_id=row.pk,
+                    description=(
+                        f"Transferred {row.source_amount} {row.source_wallet.currency.code} from "
+                        f"{row.source_wallet.name} to {row.target_wallet.name} "
+                        f"({row.target_amount} {row.target_wallet.currency.code})"
+                    ),
+                    new_data=jsonable({
+                        'source_wallet': row.source_wallet_id,
+                        'target_wallet': row.target_wallet_id,
+                        'source_amount': row.source_amount,
+                        'target_amount': row.target_amount,
+                        'exchange_rate': row.exchange_rate,
+                        'date': row.date,
+                    }),
+                )
+                for row in rows
+            ], batch_size=500)
+
+    logger.debug(f"Created {len(rows)} transfer(s) in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return rows
+
+
+def _split_many_to_many(model, data):
+    return {
+        field.name: data.pop(field.name)
+        for field in model._meta.many_to_many if field.name in data
+    }
+
+
+def create_from_serializer(serializer, user, **extra):
+    """ModelSerializer.create() through save_transaction: row, tags, balance and audit together"""
+    model = serializer.Meta.model
+    data = {**serializer.validated_data, **extra}
+    many_to_many = _split_many_to_many(model, data)
+    instance = model(**data)
+    with transaction.atomic():
+        save_transaction(instance, user=user)
+        for name, values in many_to_many.items():
+            getattr(instance, name).set(values)
+    serializer.instance = instance
+    return instance
+
+
+def update_from_serializer(serializer, user):
+    """ModelSerializer.update() through save_transaction"""
+    instance = serializer.instance
+    data = dict(serializer.validated_data)
+    many_to_many = _split_many_to_many(type(instance), data)
+    for name, value in data.items():
+        setattr(instance, name, value)
+    with transaction.atomic():
+        save_transaction(instance, user=user)
+        for name, values in many_to_many.items():
+            getattr(instance, name).set(values)
+    return instance
@@ -4,8 +4,8 @@ from .views import (
     CurrencyViewSet, WalletViewSet, TransactionCategoryViewSet,
     TransactionTagViewSet, IncomeViewSet, ExpenseViewSet,
     SubscriptionViewSet, BudgetViewSet, SavingsGoalViewSet,
-    TransactionHistoryViewSet, AnalyticsViewSet, DashboardStatsView,
-    ReferenceDataView
+    TransferViewSet, AccountingPeriodViewSet, TransactionHistoryViewSet, AnalyticsViewSet, DashboardStatsView,
+    ReferenceDataView, CacheHealthView
 )
 
 router = DefaultRouter()
@@ -18,6 +18,8 @@ router.register(r'expenses', ExpenseViewSet, basename='expense')
 router.register(r'subscriptions', SubscriptionViewSet, basename='subscription')
 router.register(r'budgets', BudgetViewSet, basename='budget')
 router.register(r'savings-goals', SavingsGoalViewSet, basename='savings-goal')
+router.register(r'transfers', TransferViewSet, basename='transfer')
+router.register(r'periods', AccountingPeriodViewSet, basename='period')
 router.register(r'history', TransactionHistoryViewSet, basename='history')
 router.register(r'analytics', AnalyticsViewSet, basename='analytics')
 
@@ -25,4 +27,5 @@ urlpatterns = [
     path('', include(router.urls)),
     path('dashboard/stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
     path('reference-data/', ReferenceDataView.as_view(), name='reference-data'),
+    path('cache/health/', CacheHealthView.as_view(), name='cache-health'),
 ]
@@ -1,29 +1,73 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.views import APIView
-from django.db.models import Sum, Q, F, Case, When, DecimalField, Value
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+from django.db import transaction
+from django.db.models import (
+    Sum, Q, F, Case, When, DecimalField, Value, OuterRef, Subquery, ExpressionWrapper,
+    Prefetch, prefetch_related_objects
+)
+from django.db.models.functions import Coalesce, TruncMonth
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import datetime, timedelta
 from decimal import Decimal
 from django_filters.rest_framework import DjangoFilterBackend
 import json
 from django.core.serializers.json import DjangoJSONEncoder
+from nvms.renderers import StreamingListMixin
+from nvms.fieldsets import QueryPlanMixin
+from nvms.columnar import (
+    ColumnarListMixin, COLUMNAR_RENDERER_CLASSES, wants_columnar, rows_to_columns
+)
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 
 from .models import (
-    Currency, Wallet, TransactionCategory, TransactionTag,
+    Currency, ExchangeRateSnapshot, Wallet, TransactionCategory, TransactionTag,
     Income, Expense, Subscription, Budget, SavingsGoal,
-    TransactionHistory
+    TransactionHistory, Transfer, AccountingPeriod, PeriodWalletBalance, PeriodCategoryTotal,
+    active_subcategories_prefetch
 )
 from .serializers import (
-    CurrencySerializer, WalletSerializer, WalletReferenceSerializer,
-    TransactionCategorySerializer, TransactionTagSerializer, IncomeSerializer, 
+    CurrencySerializer, WalletSerializer, WalletOptionSerializer,
+    TransactionCategorySerializer, TransactionCategoryTreeSerializer, TransactionTagSerializer, IncomeSerializer, 
     IncomeListSerializer, ExpenseSerializer, ExpenseListSerializer, 
     SubscriptionSerializer, SubscriptionListSerializer, BudgetSerializer, 
     SavingsGoalSerializer, TransactionHistorySerializer, WalletSummarySerializer,
     MonthlyReportSerializer, ProjectProfitabilitySerializer,
-    CashFlowSerializer
+    CashFlowSerializer, BulkTransactionActionSerializer, MergeDuplicatesSerializer,
+    TransferSerializer, TransferBatchSerializer, AccountingPeriodSerializer, ClosePeriodSerializer
+)
+from .exports import (
+    EXPORT_FORMATS, INCOME_EXPORT_COLUMNS, EXPENSE_EXPORT_COLUMNS,
+    HISTORY_EXPORT_COLUMNS, export_queryset, export_rows, monthly_report_rows
+)
+from .bulk import BulkActionError, bulk_update_transactions
+from .periods import (
+    PeriodCloseError, close_period, closed_month_summary, latest_snapshot, reopen_period, wallet_balances_as_of
+)
+from .transactions import (
+    RateSnapshot, TransactionWriteError, create_from_serializer, create_transfers, delete_transaction,
+    set_initial_balance, update_from_serializer
+)
+from .duplicates import duplicate_groups, merge_duplicates
+from .idempotency import idempotent
+from .jobs import run_job
+from .anomalies import ANOMALY_WINDOW_DAYS, ANOMALY_Z_THRESHOLD, get_anomaly_report
+from .timeseries import GROUPINGS as TIMESERIES_GROUPINGS, SERIES_DETAILS, time_series_stats
+from .analytics import (
+    TRANSACTION_MODELS as ANALYTICS_TRANSACTION_TYPES,
+    date_range_filters, month_range_filters, year_range_filters, category_rollups, tag_totals,
+    category_month_totals
+)
+from .conversion import ReportCurrency, ReportCurrencyError, original_amount, original_currency
+from .caching import (
+    get_reference_data_version, reference_data_etag, get_reference_data_bundle,
+    cached_response, cache_health_report
 )
 
 
@@ -35,19 +79,276 @@ class ReferenceDataView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        """Get all reference data in one request - optimized with lightweight serializers"""
+        """
+        Get all reference data in one request.
+        The bundle is rendered once per version and revalidated with ETags,
+        so an unchanged client gets a 304 without touching the database.
+        """
+        version = get_reference_data_version()
+        etag = reference_data_etag(version)
+        
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            if '*' in etags or etag in etags or f'W/{etag}' in etags:
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+                response['Cache-Control'] = 'private, no-cache'
+                return response
+        
+        content = get_reference_data_bundle(version, self.build_bundle)
+        response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+    
+    def build_bundle(self):
+        """Serialize reference data - optimized with lightweight serializers"""
         # Use select_related to avoid N+1 queries
         wallets = Wallet.objects.filter(is_active=True).select_related('currency')
         currencies = Currency.objects.filter(is_active=True)
-        categories = TransactionCategory.objects.filter(is_active=True).select_related('parent')
+        categories = list(TransactionCategory.objects.filter(is_active=True).select_related('parent'))
+        TransactionCategory.attach_subcategories(categories)
         tags = TransactionTag.objects.filter(is_active=True)
         
-        return Response({
-            'wallets': WalletReferenceSerializer(wallets, many=True).data,
+        return {
+            'wallets': WalletOptionSerializer(wallets, many=True).data,
             'currencies': CurrencySerializer(currencies, many=True).data,
             'categories': TransactionCategorySerializer(categories, many=True).data,
             'tags': TransactionTagSerializer(tags, many=True).data,
-        })
+        }
+
+
+def transaction_total_subquery(model, group_field, filters=None):
+    """
+    Correlated SUM(amount_rwf) of a transaction model for the outer row,
+    where `group_field` (e.g. 'wallet', 'project') points at the outer pk
+    """
+    totals = model.objects.filter(
+        **{group_field: OuterRef('pk')}, **(filters or {})
+    ).order_by().values(group_field).annotate(total=Sum('amount_rwf')).values('total')
+    return Coalesce(
+        Subquery(totals, output_field=DecimalField(max_digits=15, decimal_places=2)),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=15, decimal_places=2)
+    )
+
+
+def project_monthly_totals(project_ids, filters=None):
+    """Income/expense/profit per month for the given projects (one grouped query per type)"""
+    months = {}
+    for model, kind in ((Income, 'income'), (Expense, 'expense')):
+        rows = model.objects.filter(
+            project_id__in=project_ids, **(filters or {})
+        ).order_by().annotate(
+            month=TruncMonth('date')
+        ).values('project_id', 'month').annotate(total=Sum('amount_rwf'))
+        for row in rows:
+            entry = months.setdefault(row['project_id'], {}).setdefault(row['month'], {
+                'income': Decimal('0'), 'expense': Decimal('0')
+            })
+            entry[kind] += row['total'] or Decimal('0')
+    
+    return {
+        project_id: [
+            {
+                'month': month.strftime('%Y-%m'),
+                'income': str(totals['income'].quantize(Decimal('0.01'))),
+                'expense': str(totals['expense'].quantize(Decimal('0.01'))),
+                'profit': str((totals['income'] - totals['expense']).quantize(Decimal('0.01'))),
+            }
+            for month, totals in sorted(by_month.items())
+        ]
+        for project_id, by_month in months.items()
+    }
+
+
+class ExportMixin:
+    """
+    Adds an `export` action streaming the filtered list as CSV or XLSX.
+    Set `export_name` and `export_columns` ((header, lookup) pairs).
+    """
+    export_name = None
+    export_columns = None
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the filtered list (?file_format=csv|xlsx, same filters as list)"""
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"file_format must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_queryset(self.export_name, file_format, queryset, self.export_columns)
+
+
+class BulkTransactionMixin:
+    """
+    Adds a `bulk` action applying one operation (recategorize, retag,
+    reassign_project, change_wallet, delete) to many transactions at once
+    """
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Apply a bulk operation in one transaction"""
+        serializer = BulkTransactionActionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        try:
+            result = bulk_update_transactions(
+                self.get_serializer_class().Meta.model,
+                data['ids'],
+                data['operation'],
+                data,
+                request.user
+            )
+        except BulkActionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(result)
+
+
+class DuplicateReviewMixin:
+    """
+    Adds `duplicates` (candidate groups sharing a fingerprint) and `merge`
+    (fold duplicates into one transaction) actions
+    """
+
+    @action(detail=False, methods=['get'])
+    def duplicates(self, request):
+        """
+        Groups of likely duplicate transactions, most recent first
+        Optional: the list filters (?wallet=, ?category=, ...), ?limit=100
+        """
+        try:
+            limit = int(request.query_params.get('limit', 100))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        model = self.get_serializer_class().Meta.model
+        groups = duplicate_groups(self.filter_queryset(model.objects.all()), limit=max(limit, 1))
+        return Response({'count': len(groups), 'groups': groups})
+
+    @action(detail=False, methods=['post'])
+    def merge(self, request):
+        """Merge duplicates into the kept transaction and fix wallet balances"""
+        serializer = MergeDuplicatesSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        try:
+            result = merge_duplicates(
+                self.get_serializer_class().Meta.model,
+                data['keep'],
+                data['duplicates'],
+                request.user,
+                force=data['force']
+            )
+        except BulkActionError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(result)
+
+
+class TransactionWriteViewMixin:
+    """
+    Creates, updates and deletes incomes/expenses through the transaction
+    service, so the row, wallet balance and audit entry are written together
+    """
+
+    def perform_create(self, serializer):
+        try:
+            create_from_serializer(serializer, self.request.user, created_by=self.request.user)
+        except TransactionWriteError as e:
+            raise ValidationError({'error': str(e)})
+
+    def perform_update(self, serializer):
+        try:
+            update_from_serializer(serializer, self.request.user)
+        except TransactionWriteError as e:
+            raise ValidationError({'error': str(e)})
+
+    def perform_destroy(self, instance):
+        try:
+            delete_transaction(instance, self.request.user)
+        except TransactionWriteError as e:
+            raise ValidationError({'error': str(e)})
+
+
+def build_monthly_report(month, year, converter=None):
+    """
+    Monthly financial report data (amounts in RWF, or in the converter's
+    report currency), plus the month's income and expense querysets
+    """
+    converter = converter or ReportCurrency()
+    month_filters = month_range_filters(year, month)
+    incomes = Income.objects.filter(
+        # user=request.user,
+        **month_filters
+    )
+    expenses = Expense.objects.filter(
+        # user=request.user,
+        **month_filters
+    )
+    
+    # Closed months are read from their snapshot (stored RWF totals)
+    closed = closed_month_summary(year, month) if converter.uses_stored_rwf else None
+    if closed is not None:
+        total_income = closed['total_income']
+        total_expense = closed['total_expense']
+        income_by_category = {name: float(total) for name, total in closed['income_by_category'].items()}
+        expense_by_category = {name: float(total) for name, total in closed['expense_by_category'].items()}
+    else:
+        total_income = converter.sum_transactions(incomes)
+        total_expense = converter.sum_transactions(expenses)
+        
+        # Totals by category - grouped in the database
+        income_by_category = {
+            name: float(total)
+            for name, total in converter.sum_transactions_by(incomes, 'category__name').items()
+        }
+        expense_by_category = {
+            name: float(total)
+            for name, total in converter.sum_transactions_by(expenses, 'category__name').items()
+        }
+    
+    # Top expenses (ranked by RWF amount, converted at the current rate)
+    top_expenses = list(expenses.order_by('-amount_rwf')[:10].values('title', 'amount_rwf', 'date'))
+    if not converter.uses_stored_rwf:
+        for expense in top_expenses:
+            expense['amount'] = converter.convert(expense['amount_rwf'])
+    
+    report_data = {
+        'month': month,
+        'year': year,
+        'total_income': total_income,
+        'total_expense': total_expense,
+        'net_savings': total_income - total_expense,
+        'income_by_category': income_by_category,
+        'expense_by_category': expense_by_category,
+        'top_expenses': top_expenses,
+        'currency': converter.code,
+        'rates': converter.mode,
+        'closed': closed is not None
+    }
+    return report_data, incomes, expenses
+
+
+class CacheHealthView(APIView):
+    """Cache backend health and hit ratios (staff only)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        report = cache_health_report()
+        return Response(
+            report,
+            status=status.HTTP_200_OK if report['healthy'] else status.HTTP_503_SERVICE_UNAVAILABLE
+        )
 
 
 class CurrencyViewSet(viewsets.ModelViewSet):
@@ -128,16 +429,18 @@ class WalletViewSet(viewsets.ModelViewSet):
 
     def perform_update(self, serializer):
         old_data = WalletSerializer(self.get_object()).data
-        serializer.save()
-        
-        # Log update
         wallet: Wallet = serializer.instance
-        if (wallet.initial_balance != Decimal(old_data['initial_balance'])):
-            # Adjust balance based on change in initial balance
-            difference = wallet.initial_balance - Decimal(old_data['initial_balance'])
-            operation = 'add' if difference > 0 else 'subtract'
-            wallet.update_balance(abs(difference), operation)
+        initial_balance = serializer.validated_data.get('initial_balance')
+        try:
+            with transaction.atomic():
+                if initial_balance is not None and initial_balance != wallet.initial_balance:
+                    # Adjust balance based on change in initial balance
+                    set_initial_balance(wallet, initial_balance)
+                serializer.save()
+        except TransactionWriteError as e:
+            raise ValidationError({'error': str(e)})
 
+        # Log update
         TransactionHistory.objects.create(
             user=self.request.user,
             action='update',
@@ -149,11 +452,15 @@ class WalletViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def transfer(self, request, pk=None):
-        """Transfer funds between wallets"""
+        """Transfer funds between wallets (amount in this wallet's currency)"""
         source_wallet = self.get_object()
         target_wallet_id = request.data.get('target_wallet_id')
-        amount = Decimal(request.data.get('amount', 0))
+        try:
+            amount = Decimal(str(request.data.get('amount', 0)))
+        except ArithmeticError:
+            amount = Decimal('0')
         
         if amount <= 0:
             return Response(
@@ -161,72 +468,144 @@ class WalletViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            target_wallet = Wallet.objects.get(id=target_wallet_id)
-        except Wallet.DoesNotExist:
+        if not Wallet.objects.filter(id=target_wallet_id).exists():
             return Response(
                 {'error': 'Target wallet not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        if source_wallet.balance < amount:
-            return Response(
-                {'error': 'Insufficient balance'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Perform transfer
-        source_wallet.update_balance(amount, 'subtract')
-        target_wallet.update_balance(amount, 'add')
-        
-        # Log transfer
-        TransactionHistory.objects.create(
-            user=request.user,
-            action='transfer',
-            entity_type='wallet',
-            entity_id=source_wallet.id,
-            description=f"Transferred {amount} from {source_wallet.name} to {target_wallet.name}",
-            new_data={
-                'source_wallet': source_wallet.id,
-                'target_wallet': target_wallet.id,
-                'amount': str(amount)
-            }
-        )
+        try:
+            [transfer] = create_transfers([{
+                'source_wallet_id': source_wallet.id,
+                'target_wallet_id': int(target_wallet_id),
+                'amount': amount,
+                'description': request.data.get('description', ''),
+            }], user=request.user)
+        except TransactionWriteError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
             'message': 'Transfer successful',
-            'source_balance': source_wallet.balance,
-            'target_balance': target_wallet.balance
+            'source_balance': transfer.source_wallet.balance,
+            'target_balance': transfer.target_wallet.balance,
+            'transfer': TransferSerializer(transfer).data
+        })
+
+    @action(detail=False, methods=['get'])
+    def balances_as_of(self, request):
+        """
+        Wallet balances at the end of ?date=YYYY-MM-DD, from the latest closed
+        period's closing balances plus the transactions dated after it
+        (RWF at current rates)
+        """
+        try:
+            day = parse_date(request.query_params.get('date', ''))
+        except ValueError:
+            day = None
+        if day is None:
+            return Response({'error': 'date is required (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
+
+        wallets = list(self.filter_queryset(self.get_queryset()).select_related('currency'))
+        balances = wallet_balances_as_of(day, Wallet.objects.filter(pk__in=[wallet.pk for wallet in wallets]))
+        rates = RateSnapshot()
+        snapshot = latest_snapshot(day)
+        return Response({
+            'date': day,
+            'closed_through': snapshot.end_date if snapshot else None,
+            'wallets': [
+                {
+                    'wallet_id': wallet.id,
+                    'wallet_name': wallet.name,
+                    'currency_code': wallet.currency.code,
+                    'balance': balances[wallet.id],
+                    'balance_rwf': rates.convert(balances[wallet.id], wallet.currency.code, 'RWF'),
+                }
+                for wallet in wallets
+            ]
         })
 
     @action(detail=False, methods=['get'])
     def summary(self, request):
-        """Get summary of all wallets (totals in RWF)"""
-        from django.db.models import Sum, DecimalField
-        from django.db.models.functions import Coalesce
+        """
+        Get summary of all wallets (totals in RWF)
+        Income, expense and transfer totals come from correlated subqueries, so each
+        wallet's transactions are scanned once and the totals aren't
+        multiplied by joining incomes and expenses together.
+        Optional: ?start_date=&end_date= and ?breakdown=currency
+        """
+        date_filters = {}
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+        if start_date:
+            date_filters['date__gte'] = start_date
+        if end_date:
+            date_filters['date__lte'] = end_date
         
-        wallets = self.get_queryset().annotate(
-            total_income=Coalesce(Sum('incomes__amount_rwf'), 0, output_field=DecimalField()),
-            total_expense=Coalesce(Sum('expenses__amount_rwf'), 0, output_field=DecimalField())
+        wallets = self.filter_queryset(self.get_queryset()).annotate(
+            total_income=transaction_total_subquery(Income, 'wallet', date_filters),
+            total_expense=transaction_total_subquery(Expense, 'wallet', date_filters),
+            transfers_in=transaction_total_subquery(Transfer, 'target_wallet', date_filters),
+            transfers_out=transaction_total_subquery(Transfer, 'source_wallet', date_filters)
         ).select_related('currency')
         
+        breakdowns = {}
+        if request.query_params.get('breakdown') == 'currency':
+            breakdowns = self.currency_breakdown(wallets, date_filters)
+        
         summaries = []
         for wallet in wallets:
-            summaries.append({
+            summary = {
                 'wallet_id': wallet.id,
                 'wallet_name': wallet.name,
                 'balance': wallet.balance,
                 'balance_rwf': wallet.balance_rwf,
                 'total_income': wallet.total_income,
                 'total_expense': wallet.total_expense,
-                'net_flow': wallet.total_income - wallet.total_expense,
+                'transfers_in': wallet.transfers_in,
+                'transfers_out': wallet.transfers_out,
+                'net_flow': (
+                    wallet.total_income - wallet.total_expense + wallet.transfers_in - wallet.transfers_out
+                ),
                 'currency_code': wallet.currency.code,
                 'base_currency': 'RWF'
-            })
+            }
+            if request.query_params.get('breakdown') == 'currency':
+                summary['currency_breakdown'] = breakdowns.get(wallet.id, {})
+            summaries.append(summary)
         
         serializer = WalletSummarySerializer(summaries, many=True)
         return Response(serializer.data)
 
+    def currency_breakdown(self, wallets, date_filters):
+        """Income/expense totals per original currency, one grouped query per type"""
+        breakdowns = {}
+        wallet_ids = [wallet.id for wallet in wallets]
+        for model, kind in ((Income, 'income'), (Expense, 'expense')):
+            rows = model.objects.filter(
+                wallet_id__in=wallet_ids, **date_filters
+            ).order_by().values(
+                'wallet_id', 'currency_original__code'
+            ).annotate(
+                total_original=Sum('amount_original'),
+                total_rwf=Sum('amount_rwf')
+            )
+            for row in rows:
+                code = row['currency_original__code'] or 'UNKNOWN'
+                entry = breakdowns.setdefault(row['wallet_id'], {}).setdefault(code, {
+                    'income': Decimal('0'), 'income_rwf': Decimal('0'),
+                    'expense': Decimal('0'), 'expense_rwf': Decimal('0'),
+                })
+                entry[kind] += row['total_original'] or Decimal('0')
+                entry[f'{kind}_rwf'] += row['total_rwf'] or Decimal('0')
+        
+        return {
+            wallet_id: {
+                code: {key: str(value.quantize(Decimal('0.01'))) for key, value in totals.items()}
+                for code, totals in codes.items()
+            }
+            for wallet_id, codes in breakdowns.items()
+        }
+
 
 class TransactionCategoryViewSet(viewsets.ModelViewSet):
     """Transaction category management"""
@@ -237,14 +616,21 @@ class TransactionCategoryViewSet(viewsets.ModelViewSet):
     filterset_fields = ['category_type', 'parent']
     search_fields = ['name', 'description']
 
+    def get_queryset(self):
+        return TransactionCategory.objects.filter(is_active=True).select_related(
+            'parent'
+        ).prefetch_related(active_subcategories_prefetch())
+
     @action(detail=False, methods=['get'])
     def tree(self, request):
-        """Get category tree structure"""
-        root_categories = TransactionCategory.objects.filter(
-            parent__isnull=True,
+        """Get category tree structure (all active categories in one query, nested)"""
+        categories = TransactionCategory.objects.filter(
             is_active=True
+        ).select_related('parent').order_by('depth', 'name')
+        root_categories = TransactionCategory.attach_subcategories(categories)
+        serializer = TransactionCategoryTreeSerializer(
+            root_categories, many=True, context=self.get_serializer_context()
         )
-        serializer = self.get_serializer(root_categories, many=True)
         return Response(serializer.data)
 
 
@@ -257,14 +643,56 @@ class TransactionTagViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'description']
 
 
-class IncomeViewSet(viewsets.ModelViewSet):
+# Joins and prefetches behind each nested field of the transaction serializers
+TRANSACTION_SELECT_RELATED = {
+    'wallet_details': ['wallet__currency'],
+    'project_details': ['project__assigned_to', 'project__supervisor', 'project__created_by'],
+    'category_details': ['category__parent'],
+    'created_by_details': ['created_by'],
+    'currency_original_details': ['currency_original'],
+}
+
+TRANSACTION_PREFETCH_RELATED = {
+    'category_details': [active_subcategories_prefetch('category__subcategories')],
+    'tags_details': ['tags'],
+    'created_by_details': ['created_by__groups'],
+}
+
+# Columns for ?format=columnar, with dictionary-encoded foreign keys
+TRANSACTION_COLUMNAR_FIELDS = [
+    'id', 'date', 'title', 'amount', 'amount_rwf', 'amount_original',
+    'currency_original', 'wallet', 'category', 'project', 'is_recurring',
+]
+
+TRANSACTION_COLUMNAR_DICTIONARIES = {
+    'wallet': ['name', 'currency__code'],
+    'category': ['name', 'color'],
+    'project': ['title'],
+    'currency_original': ['code'],
+}
+
+CASH_FLOW_COLUMNS = [
+    'date', 'income', 'expense', 'transfers_in', 'transfers_out', 'net_flow', 'cumulative_balance'
+]
+
+
+class IncomeViewSet(
+    TransactionWriteViewMixin, ColumnarListMixin, StreamingListMixin, QueryPlanMixin, BulkTransactionMixin,
+    DuplicateReviewMixin, ExportMixin, viewsets.ModelViewSet
+):
     """Income transaction management"""
     serializer_class = IncomeSerializer
+    export_name = 'incomes'
+    export_columns = INCOME_EXPORT_COLUMNS
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['wallet', 'project', 'category', 'is_recurring', 'recurrence_type']
     search_fields = ['title', 'description', 'notes']
     ordering_fields = ['date', 'amount', 'created_at']
+    select_related_fields = TRANSACTION_SELECT_RELATED
+    prefetch_related_fields = TRANSACTION_PREFETCH_RELATED
+    columnar_fields = TRANSACTION_COLUMNAR_FIELDS
+    columnar_dictionaries = TRANSACTION_COLUMNAR_DICTIONARIES
 
     def get_serializer_class(self):
         """Use lightweight serializer for list, full serializer for detail"""
@@ -273,19 +701,9 @@ class IncomeViewSet(viewsets.ModelViewSet):
         return IncomeSerializer
 
     def get_queryset(self):
-        # Optimize with select_related for ForeignKeys and prefetch_related for ManyToMany
-        # This reduces N+1 queries dramatically
-        queryset = Income.objects.select_related(
-            'wallet',
-            'wallet__currency',
-            'project',
-            'category',
-            'category__parent',
-            'currency_original',
-            'created_by'
-        ).prefetch_related('tags')
+        # Only join what the requested fields (?fields=/?expand=) render
+        queryset = self.apply_query_plan(Income.objects.all())
 
-        
         # Filter by date range
         start_date = self.request.query_params.get('start_date')
         end_date = self.request.query_params.get('end_date')
@@ -296,100 +714,40 @@ class IncomeViewSet(viewsets.ModelViewSet):
         
         return queryset
 
-    def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
-
-        # Log creation
-        income = serializer.instance
-        TransactionHistory.objects.create(
-            user=self.request.user,
-            action='create',
-            entity_type='income',
-            entity_id=income.id,
-            description=f"Created income: {income.title}",
-            new_data=json.loads(json.dumps(serializer.data, cls=DjangoJSONEncoder))
-        )
-
-    def perform_update(self, serializer):
-        old_data = IncomeSerializer(self.get_object()).data
-        serializer.save()
-        
-        # Log update
-        income: Income = serializer.instance
-        income.wallet.update_balance(
-            Decimal(serializer.data['amount']) - Decimal(old_data['amount']),
-            'add' if Decimal(serializer.data['amount']) > Decimal(old_data['amount']) else 'subtract'
-        )
-        TransactionHistory.objects.create(
-            user=self.request.user,
-            action='update',
-            entity_type='income',
-            entity_id=income.id,
-            description=f"Updated income: {income.title}",
-            old_data=json.loads(json.dumps(old_data, cls=DjangoJSONEncoder)),
-            new_data=json.loads(json.dumps(serializer.data, cls=DjangoJSONEncoder))
-        )
-
-    def perform_destroy(self, instance: Income):
-        # Log deletion
-        TransactionHistory.objects.create(
-            user=self.request.user,
-            action='delete',
-            entity_type='income',
-            entity_id=instance.id,
-            description=f"Deleted income: {instance.title}",
-            old_data=json.dumps(IncomeSerializer(instance).data, cls=DjangoJSONEncoder)
-        )
-        instance.wallet.update_balance(instance.amount, 'subtract')
-        instance.delete()
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
 
     @action(detail=False, methods=['post'])
+    @idempotent
     def process_recurring(self, request):
-        """Process all due recurring incomes"""
-        today = timezone.now().date()
-        due_incomes = Income.objects.filter(
-            is_recurring=True,
-            next_occurrence__lte=today
-        )
-        
-        created_count = 0
-        for income in due_incomes:
-            # Create new income for this occurrence
-            Income.objects.create(
-                wallet=income.wallet,
-                project=income.project,
-                title=f"{income.title} (Recurring)",
-                amount=income.amount,
-                category=income.category,
-                description=income.description,
-                date=income.next_occurrence,
-                is_recurring=False,
-                created_by=income.created_by
-            )
-            created_count += 1
-            
-            # Update next occurrence
-            income.calculate_next_occurrence()
-        
+        """Process all due recurring incomes (safe to run concurrently, see jobs.py)"""
+        run = run_job('recurring_incomes', user=request.user)
         return Response({
-            'message': f'Processed {created_count} recurring incomes',
-            'count': created_count
+            'message': f'Processed {run.processed} recurring incomes',
+            'count': run.processed,
+            'errors': run.errors,
+            'run': run.pk
         })
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Get income statistics (using RWF as base currency)"""
+        """Get income statistics (in RWF, or ?currency= with optional ?rates=historical)"""
+        try:
+            converter = ReportCurrency.from_request(request)
+        except ReportCurrencyError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         today = timezone.now().date()
         incomes = self.get_queryset()
         
-        total = incomes.aggregate(total=Sum('amount_rwf'))['total'] or 0
-        this_month = incomes.filter(
-            date__year=today.year,
-            date__month=today.month
-        ).aggregate(total=Sum('amount_rwf'))['total'] or 0
-        this_year = incomes.filter(
-            date__year=today.year
-        ).aggregate(total=Sum('amount_rwf'))['total'] or 0
+        total = converter.sum_transactions(incomes)
+        this_month = converter.sum_transactions(incomes.filter(
+            **month_range_filters(today.year, today.month)
+        ))
+        this_year = converter.sum_transactions(incomes.filter(
+            **year_range_filters(today.year)
+        ))
         count = incomes.count()
         
         return Response({
@@ -397,18 +755,28 @@ class IncomeViewSet(viewsets.ModelViewSet):
             'this_month': str(this_month),
             'this_year': str(this_year),
             'count': count,
-            'currency': 'RWF'
+            'currency': converter.code,
+            'rates': converter.mode
         })
 
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+class ExpenseViewSet(
+    TransactionWriteViewMixin, ColumnarListMixin, StreamingListMixin, QueryPlanMixin, BulkTransactionMixin,
+    DuplicateReviewMixin, ExportMixin, viewsets.ModelViewSet
+):
     """Expense transaction management"""
     serializer_class = ExpenseSerializer
+    export_name = 'expenses'
+    export_columns = EXPENSE_EXPORT_COLUMNS
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['wallet', 'project', 'category', 'is_recurring', 'recurrence_type']
     search_fields = ['title', 'description', 'notes']
     ordering_fields = ['date', 'amount', 'created_at']
+    select_related_fields = TRANSACTION_SELECT_RELATED
+    prefetch_related_fields = TRANSACTION_PREFETCH_RELATED
+    columnar_fields = TRANSACTION_COLUMNAR_FIELDS
+    columnar_dictionaries = TRANSACTION_COLUMNAR_DICTIONARIES
 
     def get_serializer_class(self):
         """Use lightweight serializer for list, full serializer for detail"""
@@ -417,18 +785,9 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         return ExpenseSerializer
 
     def get_queryset(self):
-        # Optimize with select_related for ForeignKeys and prefetch_related for ManyToMany
-        queryset = Expense.objects.select_related(
-            'wallet',
-            'wallet__currency',
-            'project',
-            'category',
-            'category__parent',
-            'currency_original',
-            'created_by'
-        ).prefetch_related('tags')
+        # Only join what the requested fields (?fields=/?expand=) render
+        queryset = self.apply_query_plan(Expense.objects.all())
 
-        
         # Filter by date range
         start_date = self.request.query_params.get('start_date')
         end_date = self.request.query_params.get('end_date')
@@ -439,100 +798,40 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         
         return queryset
 
-    def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
-        
-        # Log creation
-        expense = serializer.instance
-        TransactionHistory.objects.create(
-            user=self.request.user,
-            action='create',
-            entity_type='expense',
-            entity_id=expense.id,
-            description=f"Created expense: {expense.title}",
-            new_data=json.loads(json.dumps(serializer.data, cls=DjangoJSONEncoder))
-        )
-
-    def perform_update(self, serializer):
-        old_data = ExpenseSerializer(self.get_object()).data
-        serializer.save()
-        
-        # Log update
-        expense = serializer.instance
-        expense.wallet.update_balance(
-            Decimal(old_data['amount']) - Decimal(serializer.data['amount']),
-            'add' if Decimal(serializer.data['amount']) < Decimal(old_data['amount']) else 'subtract'
-        )
-        TransactionHistory.objects.create(
-            user=self.request.user,
-            action='update',
-            entity_type='expense',
-            entity_id=expense.id,
-            description=f"Updated expense: {expense.title}",
-            old_data=json.loads(json.dumps(old_data, cls=DjangoJSONEncoder)),
-            new_data=json.loads(json.dumps(serializer.data, cls=DjangoJSONEncoder))
-        )
-
-    def perform_destroy(self, instance):
-        # Log deletion
-        TransactionHistory.objects.create(
-            user=self.request.user,
-            action='delete',
-            entity_type='expense',
-            entity_id=instance.id,
-            description=f"Deleted expense: {instance.title}",
-            old_data=json.dumps(ExpenseSerializer(instance).data, cls=DjangoJSONEncoder)
-        )
-        instance.wallet.update_balance(instance.amount, 'add')
-        instance.delete()
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
 
     @action(detail=False, methods=['post'])
+    @idempotent
     def process_recurring(self, request):
-        """Process all due recurring expenses"""
-        today = timezone.now().date()
-        due_expenses = Expense.objects.filter(
-            is_recurring=True,
-            next_occurrence__lte=today
-        )
-        
-        created_count = 0
-        for expense in due_expenses:
-            # Create new expense for this occurrence
-            Expense.objects.create(
-                wallet=expense.wallet,
-                project=expense.project,
-                title=f"{expense.title} (Recurring)",
-                amount=expense.amount,
-                category=expense.category,
-                description=expense.description,
-                date=expense.next_occurrence,
-                is_recurring=False,
-                created_by=expense.user
-            )
-            created_count += 1
-            
-            # Update next occurrence
-            expense.calculate_next_occurrence()
-        
+        """Process all due recurring expenses (safe to run concurrently, see jobs.py)"""
+        run = run_job('recurring_expenses', user=request.user)
         return Response({
-            'message': f'Processed {created_count} recurring expenses',
-            'count': created_count
+            'message': f'Processed {run.processed} recurring expenses',
+            'count': run.processed,
+            'errors': run.errors,
+            'run': run.pk
         })
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Get expense statistics (using RWF as base currency)"""
+        """Get expense statistics (in RWF, or ?currency= with optional ?rates=historical)"""
+        try:
+            converter = ReportCurrency.from_request(request)
+        except ReportCurrencyError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         today = timezone.now().date()
         expenses = self.get_queryset()
         
-        total = expenses.aggregate(total=Sum('amount_rwf'))['total'] or 0
-        this_month = expenses.filter(
-            date__year=today.year,
-            date__month=today.month
-        ).aggregate(total=Sum('amount_rwf'))['total'] or 0
-        this_year = expenses.filter(
-            date__year=today.year
-        ).aggregate(total=Sum('amount_rwf'))['total'] or 0
+        total = converter.sum_transactions(expenses)
+        this_month = converter.sum_transactions(expenses.filter(
+            **month_range_filters(today.year, today.month)
+        ))
+        this_year = converter.sum_transactions(expenses.filter(
+            **year_range_filters(today.year)
+        ))
         count = expenses.count()
         
         return Response({
@@ -540,7 +839,8 @@ class ExpenseViewSet(viewsets.ModelViewSet):
             'this_month': str(this_month),
             'this_year': str(this_year),
             'count': count,
-            'currency': 'RWF'
+            'currency': converter.code,
+            'rates': converter.mode
         })
 
 
@@ -567,12 +867,13 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
             'category',
             'category__parent',
             'currency_original'
-        )
+        ).prefetch_related(active_subcategories_prefetch('category__subcategories'))
 
     def perform_create(self, serializer):
         serializer.save()
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def renew(self, request, pk=None):
         """Manually trigger subscription renewal"""
         subscription = self.get_object()
@@ -583,7 +884,10 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        expense = subscription.process_renewal()
+        try:
+            expense = subscription.process_renewal(user=request.user)
+        except TransactionWriteError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         if expense:
             return Response({
@@ -614,60 +918,59 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['post'])
+    @idempotent
     def process_renewals(self, request):
-        """Process all due subscription renewals"""
-        today = timezone.now().date()
-        due_subscriptions = self.get_queryset().filter(
-            status='active',
-            next_billing_date__lte=today
-        )
-        
-        processed_count = 0
-        errors = []
-        
-        for subscription in due_subscriptions:
-            try:
-                subscription.process_renewal()
-                processed_count += 1
-            except Exception as e:
-                errors.append(f"{subscription.name}: {str(e)}")
-        
+        """Process all due subscription renewals (safe to run concurrently, see jobs.py)"""
+        run = run_job('subscription_renewals', user=request.user)
         return Response({
-            'message': f'Processed {processed_count} subscriptions',
-            'count': processed_count,
-            'errors': errors
+            'message': f'Processed {run.processed} subscriptions',
+            'count': run.processed,
+            'errors': run.errors,
+            'run': run.pk
         })
 
     @action(detail=False, methods=['get'])
+    @cached_response(tags=[Subscription, Currency])
     def stats(self, request):
-        """Get subscription statistics (monthly costs in RWF) - optimized with database aggregation"""
+        """Get subscription statistics (monthly costs in RWF, or ?currency=) - optimized with database aggregation"""
+        try:
+            converter = ReportCurrency.from_request(request)
+        except ReportCurrencyError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         subscriptions = self.get_queryset()
         active_subscriptions = subscriptions.filter(is_active=True)
         
         # Calculate monthly cost using database-level CASE/WHEN instead of Python loop
         # This is MUCH faster as it happens in one query instead of N iterations
-        monthly_cost_aggregate = active_subscriptions.aggregate(
-            total_monthly_cost=Sum(
-                Case(
-                    When(billing_cycle='monthly', then=F('amount_rwf')),
-                    When(billing_cycle='yearly', then=F('amount_rwf') / Value(12)),
-                    When(billing_cycle='quarterly', then=F('amount_rwf') / Value(3)),
-                    When(billing_cycle='semi_annually', then=F('amount_rwf') / Value(6)),
-                    When(billing_cycle='weekly', then=F('amount_rwf') * Value(4)),
-                    When(billing_cycle='daily', then=F('amount_rwf') * Value(30)),
-                    default=Value(0),
-                    output_field=DecimalField(max_digits=15, decimal_places=2)
+        amount = 'amount_rwf' if converter.uses_stored_rwf else original_amount()
+        monthly_cost = Case(
+            When(billing_cycle='monthly', then=amount),
+            When(billing_cycle='yearly', then=amount / Value(12)),
+            When(billing_cycle='quarterly', then=amount / Value(3)),
+            When(billing_cycle='semi_annually', then=amount / Value(6)),
+            When(billing_cycle='weekly', then=amount * Value(4)),
+            When(billing_cycle='daily', then=amount * Value(30)),
+            default=Value(0),
+            output_field=DecimalField(max_digits=15, decimal_places=2)
+        )
+        if converter.uses_stored_rwf:
+            monthly_cost_aggregate = active_subscriptions.aggregate(total_monthly_cost=Sum(monthly_cost))
+            total_monthly_cost = monthly_cost_aggregate['total_monthly_cost'] or Decimal('0')
+        else:
+            # Monthly cost per original currency, converted once per currency
+            # (subscriptions have no transaction date, so current rates apply)
+            total_monthly_cost = converter.sum_currency_totals(
+                active_subscriptions.order_by().values(code=original_currency()).annotate(
+                    total=Sum(monthly_cost)
                 )
             )
-        )
-        
-        total_monthly_cost = monthly_cost_aggregate['total_monthly_cost'] or Decimal('0')
         
         return Response({
             'total_monthly_cost': str(total_monthly_cost),
             'active_count': active_subscriptions.count(),
             'total_count': subscriptions.count(),
-            'currency': 'RWF'
+            'currency': converter.code
         })
 
 
@@ -766,6 +1069,7 @@ class SavingsGoalViewSet(viewsets.ModelViewSet):
         serializer.save()
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def contribute(self, request, pk=None):
         """Add contribution to savings goal"""
         goal = self.get_object()
@@ -808,9 +1112,127 @@ class SavingsGoalViewSet(viewsets.ModelViewSet):
         })
 
 
-class TransactionHistoryViewSet(viewsets.ReadOnlyModelViewSet):
+class TransferViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Transfers between wallets. Creating one converts the amount into the
+    target wallet's currency and moves both balances atomically.
+    """
+    serializer_class = TransferSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['source_wallet', 'target_wallet']
+    search_fields = ['description']
+    ordering_fields = ['date', 'source_amount', 'created_at']
+
+    def get_queryset(self):
+        queryset = Transfer.objects.select_related(
+            'source_wallet__currency', 'target_wallet__currency', 'created_by'
+        ).prefetch_related('created_by__groups')
+
+        # Transfers into or out of one wallet, and date range
+        wallet = self.request.query_params.get('wallet')
+        start_date = self.request.query_params.get('start_date')
+        end_date = self.request.query_params.get('end_date')
+        if wallet:
+            queryset = queryset.filter(Q(source_wallet=wallet) | Q(target_wallet=wallet))
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+        return queryset
+
+    def _create(self, specs):
+        try:
+            transfers = create_transfers(specs, user=self.request.user)
+        except TransactionWriteError as e:
+            return None, Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        prefetch_related_objects(transfers, 'created_by__groups')
+        return transfers, None
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        transfers, error = self._create([TransferSerializer.transfer_spec(serializer.validated_data)])
+        if error:
+            return error
+        return Response(TransferSerializer(transfers[0]).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    @idempotent
+    def batch(self, request):
+        """Create many transfers in one transaction: all are applied or none"""
+        serializer = TransferBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        transfers, error = self._create([
+            TransferSerializer.transfer_spec(data) for data in serializer.validated_data['transfers']
+        ])
+        if error:
+            return error
+        return Response({
+            'count': len(transfers),
+            'transfers': TransferSerializer(transfers, many=True).data
+        }, status=status.HTTP_201_CREATED)
+
+
+class AccountingPeriodViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Closed months with their closing wallet balances and category totals.
+    Closing and reopening are restricted to staff.
+    """
+    serializer_class = AccountingPeriodSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return AccountingPeriod.objects.select_related('closed_by').prefetch_related(
+            'closed_by__groups',
+            Prefetch(
+                'wallet_balances',
+                queryset=PeriodWalletBalance.objects.select_related('wallet__currency')
+            ),
+            Prefetch(
+                'category_totals',
+                queryset=PeriodCategoryTotal.objects.select_related('category')
+            ),
+        )
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def close(self, request):
+        """Close a month: lock its transactions and store its closing balances"""
+        serializer = ClosePeriodSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        try:
+            period = close_period(data['year'], data['month'], user=request.user, notes=data['notes'])
+        except PeriodCloseError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            AccountingPeriodSerializer(self.get_queryset().get(pk=period.pk)).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
+    def reopen(self, request, pk=None):
+        """Reopen the latest closed month"""
+        period = self.get_object()
+        try:
+            reopen_period(period)
+        except PeriodCloseError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'message': f'Reopened {period}'})
+
+
+class TransactionHistoryViewSet(ExportMixin, viewsets.ReadOnlyModelViewSet):
     """Transaction history/audit trail"""
     serializer_class = TransactionHistorySerializer
+    export_name = 'history'
+    export_columns = HISTORY_EXPORT_COLUMNS
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['action', 'entity_type']
@@ -825,86 +1247,276 @@ class AnalyticsViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
     @action(detail=False, methods=['get'])
+    @cached_response(tags=[Income, Expense, TransactionCategory, Currency, ExchangeRateSnapshot, AccountingPeriod])
     def monthly_report(self, request):
-        """Get monthly financial report (all amounts in RWF)"""
+        """Get monthly financial report (amounts in RWF, or ?currency= with optional ?rates=historical)"""
         month = int(request.query_params.get('month', timezone.now().month))
         year = int(request.query_params.get('year', timezone.now().year))
-        
-        # Get incomes and expenses for the month
-        incomes = Income.objects.filter(
-            # user=request.user,
-            date__year=year,
-            date__month=month
-        )
-        expenses = Expense.objects.filter(
-            # user=request.user,
-            date__year=year,
-            date__month=month
-        )
-        
-        total_income = incomes.aggregate(total=Sum('amount_rwf'))['total'] or 0
-        total_expense = expenses.aggregate(total=Sum('amount_rwf'))['total'] or 0
-        
-        # Income by category (in RWF)
-        income_by_category = {}
-        for income in incomes:
-            cat_name = income.category.name
-            income_by_category[cat_name] = income_by_category.get(cat_name, 0) + float(income.amount_rwf)
-        
-        # Expense by category (in RWF)
-        expense_by_category = {}
-        for expense in expenses:
-            cat_name = expense.category.name
-            expense_by_category[cat_name] = expense_by_category.get(cat_name, 0) + float(expense.amount_rwf)
-        
-        # Top expenses (in RWF)
-        top_expenses = list(expenses.order_by('-amount_rwf')[:10].values('title', 'amount_rwf', 'date'))
-        
-        report_data = {
-            'month': month,
-            'year': year,
-            'total_income': total_income,
-            'total_expense': total_expense,
-            'net_savings': total_income - total_expense,
-            'income_by_category': income_by_category,
-            'expense_by_category': expense_by_category,
-            'top_expenses': top_expenses,
-            'currency': 'RWF'
-        }
+        try:
+            converter = ReportCurrency.from_request(request)
+            report_data, _, _ = build_monthly_report(month, year, converter)
+        except (ReportCurrencyError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         serializer = MonthlyReportSerializer(report_data)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    def monthly_report_export(self, request):
+        """Stream the monthly report and the month's transactions (?file_format=csv|xlsx)"""
+        month = int(request.query_params.get('month', timezone.now().month))
+        year = int(request.query_params.get('year', timezone.now().year))
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"file_format must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            converter = ReportCurrency.from_request(request)
+            report_data, incomes, expenses = build_monthly_report(month, year, converter)
+        except (ReportCurrencyError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return export_rows(
+            f'monthly-report-{year}-{month:02d}',
+            file_format,
+            monthly_report_rows(report_data, incomes, expenses, converter.convert)
+        )
+
+    PROFITABILITY_ORDERING = [
+        'title', 'total_income', 'total_expense', 'profit', 'profit_margin', 'budget_burn'
+    ]
+
+    @action(detail=False, methods=['get'])
+    @cached_response(tags=['projects.project', Income, Expense])
     def project_profitability(self, request):
-        """Analyze profitability of projects (all amounts in RWF)"""
+        """
+        Analyze profitability of projects (all amounts in RWF)
+        Totals, profit, margin and budget burn are computed for all visible
+        projects in one query, sorted and paginated in the database.
+        Optional: ?status=, ?start_date=&end_date=, ?ordering=-profit, ?monthly=true
+        """
         from apps.projects.models import Project
         
-        projects = Project.objects.filter(created_by=request.user)
-        profitability_data = []
+        date_filters = {}
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+        if start_date:
+            date_filters['date__gte'] = start_date
+        if end_date:
+            date_filters['date__lte'] = end_date
+        
+        money = DecimalField(max_digits=15, decimal_places=2)
+        projects = Project.objects.filter(is_active=True).annotate(
+            total_income=transaction_total_subquery(Income, 'project', date_filters),
+            total_expense=transaction_total_subquery(Expense, 'project', date_filters),
+        ).annotate(
+            profit=ExpressionWrapper(F('total_income') - F('total_expense'), output_field=money),
+            profit_margin=Case(
+                When(total_income__gt=0, then=(F('total_income') - F('total_expense')) * Value(100) / F('total_income')),
+                default=Value(Decimal('0')),
+                output_field=money
+            ),
+            budget_burn=Case(
+                When(budget__gt=0, then=F('total_expense') * Value(100) / F('budget')),
+                default=None,
+                output_field=money
+            ),
+        )
         
-        for project in projects:
-            total_income = project.incomes.aggregate(total=Sum('amount_rwf'))['total'] or 0
-            total_expense = project.expenses.aggregate(total=Sum('amount_rwf'))['total'] or 0
-            profit = total_income - total_expense
-            profit_margin = (profit / total_income * 100) if total_income > 0 else 0
-            
-            profitability_data.append({
+        status_filter = request.query_params.get('status')
+        if status_filter:
+            projects = projects.filter(status=status_filter)
+        
+        ordering = request.query_params.get('ordering', '-profit')
+        if ordering.lstrip('-') not in self.PROFITABILITY_ORDERING:
+            return Response(
+                {'error': f"ordering must be one of: {', '.join(self.PROFITABILITY_ORDERING)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        order_field = F(ordering.lstrip('-'))
+        projects = projects.order_by(
+            order_field.desc(nulls_last=True) if ordering.startswith('-') else order_field.asc(nulls_last=True),
+            'id'
+        )
+        
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(projects, request, view=self)
+        
+        monthly = {}
+        if request.query_params.get('monthly') == 'true':
+            monthly = project_monthly_totals([project.id for project in page], date_filters)
+        
+        profitability_data = []
+        for project in page:
+            row = {
                 'project_id': project.id,
                 'project_name': project.title,
-                'total_income': total_income,
-                'total_expense': total_expense,
-                'profit': profit,
-                'profit_margin': profit_margin,
+                'status': project.status,
+                'total_income': project.total_income,
+                'total_expense': project.total_expense,
+                'profit': project.profit,
+                'profit_margin': project.profit_margin,
+                'budget': project.budget,
+                'budget_remaining': project.budget - project.total_expense if project.budget is not None else None,
+                'budget_burn': project.budget_burn,
                 'currency': 'RWF'
-            })
+            }
+            if request.query_params.get('monthly') == 'true':
+                row['monthly'] = monthly.get(project.id, [])
+            profitability_data.append(row)
         
         serializer = ProjectProfitabilitySerializer(profitability_data, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
+
+    def analytics_filters(self, request):
+        """Date range (?start_date=&end_date=) and optional ?category= subtree filters"""
+        filters = date_range_filters(
+            request.query_params.get('start_date'),
+            request.query_params.get('end_date')
+        )
+        category_id = request.query_params.get('category')
+        category = None
+        if category_id:
+            category = TransactionCategory.objects.filter(pk=category_id).first() if category_id.isdigit() else None
+            if category is None:
+                raise ValueError(f"Category not found: {category_id}")
+        return filters, category
 
     @action(detail=False, methods=['get'])
+    @cached_response(tags=[Income, Expense, TransactionCategory])
+    def category_rollup(self, request):
+        """
+        Income and expense per category including all subcategories (in RWF)
+        Optional: ?start_date=&end_date=, ?category= to limit to one subtree
+        """
+        try:
+            filters, category = self.analytics_filters(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        categories = TransactionCategory.objects.filter(is_active=True)
+        if category:
+            categories = category.get_descendants()
+        rows = category_rollups(filters, categories).values(
+            'id', 'name', 'parent_id', 'depth', 'full_path', 'category_type',
+            'income_total', 'income_count', 'expense_total', 'expense_count'
+        )
+        return Response({'categories': list(rows), 'currency': 'RWF'})
+
+    @action(detail=False, methods=['get'])
+    @cached_response(tags=[Income, Expense, TransactionTag])
+    def tag_totals(self, request):
+        """
+        Income and expense per tag (in RWF), e.g. tax deductible or client reimbursable
+        Optional: ?start_date=&end_date=, ?category= to limit to one subtree
+        """
+        try:
+            filters, category = self.analytics_filters(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if category:
+            filters['category__path__startswith'] = category.path
+        rows = tag_totals(filters, TransactionTag.objects.filter(is_active=True)).values(
+            'id', 'name', 'color', 'income_total', 'income_count', 'expense_total', 'expense_count'
+        )
+        return Response({'tags': list(rows), 'currency': 'RWF'})
+
+    @action(detail=False, methods=['get'])
+    @cached_response(tags=[Income, Expense, TransactionCategory])
+    def category_monthly(self, request):
+        """
+        Totals per category and month (in RWF)
+        Optional: ?type=income|expense, ?start_date=&end_date=, ?category= to limit to one subtree
+        """
+        kind = request.query_params.get('type')
+        if kind and kind not in ANALYTICS_TRANSACTION_TYPES:
+            return Response(
+                {'error': f"type must be one of: {', '.join(ANALYTICS_TRANSACTION_TYPES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            filters, category = self.analytics_filters(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if category:
+            filters['category__path__startswith'] = category.path
+        rows = category_month_totals(filters, [kind] if kind else None)
+        return Response({'rows': list(rows), 'currency': 'RWF'})
+
+    @action(detail=False, methods=['get'])
+    @cached_response(tags=[Income, Expense, Wallet, TransactionCategory, 'projects.project'])
+    def timeseries(self, request):
+        """
+        Rolling 7/30/90-day sums, moving averages, MoM/YoY deltas and daily
+        quantiles of income and expense (in RWF)
+        Optional: ?group_by=total|wallet|category|project, ?start_date=&end_date=
+        (default: the year to today, at most TIMESERIES_MAX_DAYS), ?detail=daily,monthly for the series
+        """
+        group_by = request.query_params.get('group_by', 'total')
+        if group_by not in TIMESERIES_GROUPINGS:
+            return Response(
+                {'error': f"group_by must be one of: {', '.join(TIMESERIES_GROUPINGS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        detail = [part for part in request.query_params.get('detail', '').split(',') if part]
+        unknown = set(detail) - set(SERIES_DETAILS)
+        if unknown:
+            return Response(
+                {'error': f"detail must be a list of: {', '.join(SERIES_DETAILS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        dates = {}
+        for param in ('start_date', 'end_date'):
+            value = request.query_params.get(param)
+            dates[param] = parse_date(value) if value else None
+            if value and dates[param] is None:
+                return Response({'error': f"Invalid {param}: {value}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            stats = time_series_stats(
+                group_by, dates['start_date'], dates['end_date'] or timezone.localdate(), detail
+            )
+        except OverflowError:
+            return Response({'error': 'Dates out of range'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(stats)
+
+    @action(detail=False, methods=['get'])
+    def anomalies(self, request):
+        """
+        Unusual expenses for review: amount outliers per category, subscription
+        price jumps and daily spending spikes per wallet and category (in RWF)
+        Optional: ?days=90, ?threshold=3.5, ?refresh=true
+        """
+        try:
+            days = int(request.query_params.get('days', ANOMALY_WINDOW_DAYS))
+            threshold = float(request.query_params.get('threshold', ANOMALY_Z_THRESHOLD))
+        except ValueError:
+            return Response(
+                {'error': 'days must be an integer and threshold a number'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 1 <= days <= 366 or threshold <= 0:
+            return Response(
+                {'error': 'days must be between 1 and 366 and threshold positive'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        refresh = request.query_params.get('refresh') == 'true'
+        return Response(get_anomaly_report(days, threshold, refresh=refresh))
+
+    @action(detail=False, methods=['get'], renderer_classes=COLUMNAR_RENDERER_CLASSES)
     def cash_flow(self, request):
-        """Get cash flow over time (all amounts in RWF) - optimized with efficient queries"""
+        """
+        Get cash flow over time (all amounts in RWF) - optimized with efficient queries
+        Optional: ?wallet= for one wallet's flows, including transfers in and out,
+        with cumulative_balance starting from the wallet's balance (RWF)
+        """
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
         
@@ -916,69 +1528,107 @@ class AnalyticsViewSet(viewsets.ViewSet):
             start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
             end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
         
+        wallet = request.query_params.get('wallet')
+        wallet_filter = {'wallet': wallet} if wallet else {}
+
         # Get all transactions in date range (using RWF amounts)
         # Use values() to get only what we need, not full objects
         incomes = Income.objects.filter(
             date__gte=start_date,
-            date__lte=end_date
+            date__lte=end_date,
+            **wallet_filter
         ).values('date').annotate(total=Sum('amount_rwf'))
         
         expenses = Expense.objects.filter(
             date__gte=start_date,
-            date__lte=end_date
+            date__lte=end_date,
+            **wallet_filter
         ).values('date').annotate(total=Sum('amount_rwf'))
+
+        # Between all wallets, transfers in and out cancel out
+        transfers = Transfer.objects.filter(date__gte=start_date, date__lte=end_date)
+        transfers_in = transfers.filter(**({'target_wallet': wallet} if wallet else {}))
+        transfers_out = transfers.filter(**({'source_wallet': wallet} if wallet else {}))
         
         # Convert to dictionaries for O(1) lookup instead of O(N) iteration per day
         income_dict = {item['date']: item['total'] for item in incomes}
         expense_dict = {item['date']: item['total'] for item in expenses}
+        transfer_in_dict = {
+            item['date']: item['total']
+            for item in transfers_in.order_by().values('date').annotate(total=Sum('amount_rwf'))
+        }
+        transfer_out_dict = {
+            item['date']: item['total']
+            for item in transfers_out.order_by().values('date').annotate(total=Sum('amount_rwf'))
+        }
         
         # Build daily cash flow using dictionary lookups (much faster than filtering lists)
         cash_flow_data = []
         cumulative_balance = Decimal('0')
+        if wallet:
+            # One wallet's running balance starts from its balance the day
+            # before, built from the latest closed period's snapshot
+            opening = wallet_balances_as_of(start_date - timedelta(days=1), Wallet.objects.filter(pk=wallet))
+            source = Wallet.objects.select_related('currency').filter(pk=wallet).first()
+            if source is not None:
+                cumulative_balance = RateSnapshot().convert(opening[source.pk], source.currency.code, 'RWF')
         
         current_date = start_date
         while current_date <= end_date:
             # O(1) dictionary lookup instead of O(N) list filtering
             day_income = income_dict.get(current_date, Decimal('0'))
             day_expense = expense_dict.get(current_date, Decimal('0'))
-            net_flow = day_income - day_expense
+            day_transfers_in = transfer_in_dict.get(current_date, Decimal('0'))
+            day_transfers_out = transfer_out_dict.get(current_date, Decimal('0'))
+            net_flow = day_income - day_expense + day_transfers_in - day_transfers_out
             cumulative_balance += net_flow
             
             cash_flow_data.append({
                 'date': current_date,
                 'income': day_income,
                 'expense': day_expense,
+                'transfers_in': day_transfers_in,
+                'transfers_out': day_transfers_out,
                 'net_flow': net_flow,
                 'cumulative_balance': cumulative_balance
             })
             
             current_date += timedelta(days=1)
         
+        if wants_columnar(request):
+            return Response(rows_to_columns(cash_flow_data, CASH_FLOW_COLUMNS))
+
         serializer = CashFlowSerializer(cash_flow_data, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @cached_response(tags=[
+        Income, Expense, Wallet, Budget, SavingsGoal, Subscription, Currency, ExchangeRateSnapshot
+    ])
     def dashboard(self, request):
-        """Get dashboard overview (all amounts in RWF)"""
+        """Get dashboard overview (amounts in RWF, or ?currency= with optional ?rates=historical)"""
+        try:
+            converter = ReportCurrency.from_request(request)
+        except ReportCurrencyError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         today = timezone.now().date()
         
-        # Current month stats (in RWF)
-        current_month_income = Income.objects.filter(
+        # Current month stats
+        current_month_income = converter.sum_transactions(Income.objects.filter(
             # user=request.user,
-            date__year=today.year,
-            date__month=today.month
-        ).aggregate(total=Sum('amount_rwf'))['total'] or 0
+            **month_range_filters(today.year, today.month)
+        ))
         
-        current_month_expense = Expense.objects.filter(
+        current_month_expense = converter.sum_transactions(Expense.objects.filter(
             # user=request.user,
-            date__year=today.year,
-            date__month=today.month
-        ).aggregate(total=Sum('amount_rwf'))['total'] or 0
+            **month_range_filters(today.year, today.month)
+        ))
         
-        # Total wallet balance (in RWF)
-        total_balance = Wallet.objects.filter(
+        # Total wallet balance
+        total_balance = converter.sum_balances(Wallet.objects.filter(
             is_active=True
-        ).aggregate(total=Sum('balance_rwf'))['total'] or 0
+        ))
         
         # Active budgets
         active_budgets = Budget.objects.filter(
@@ -1010,7 +1660,8 @@ class AnalyticsViewSet(viewsets.ViewSet):
             'active_budgets': active_budgets,
             'active_goals': active_goals,
             'upcoming_subscriptions': upcoming_subscriptions,
-            'currency': 'RWF'
+            'currency': converter.code,
+            'rates': converter.mode
         })
 
 
@@ -1018,40 +1669,44 @@ class DashboardStatsView(APIView):
     """Dashboard statistics view"""
     permission_classes = [IsAuthenticated]
 
+    @cached_response(tags=[Wallet, Income, Expense, Currency, ExchangeRateSnapshot])
     def get(self, request):
-        """Get dashboard statistics (all amounts in RWF)"""
+        """Get dashboard statistics (amounts in RWF, or ?currency= with optional ?rates=historical)"""
+        try:
+            converter = ReportCurrency.from_request(request)
+        except ReportCurrencyError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         today = timezone.now().date()
         user = request.user
 
-        # Total balance across all wallets (in RWF)
-        total_balance = Wallet.objects.filter(
+        # Total balance across all wallets
+        total_balance = converter.sum_balances(Wallet.objects.filter(
             is_active=True
-        ).aggregate(total=Sum('balance_rwf'))['total'] or 0
+        ))
 
-        # Total income (all time, in RWF)
-        total_income = Income.objects.all().aggregate(total=Sum('amount_rwf'))['total'] or 0
+        # Total income (all time)
+        total_income = converter.sum_transactions(Income.objects.all())
 
-        # Total expenses (all time, in RWF)
-        total_expenses = Expense.objects.all().aggregate(total=Sum('amount_rwf'))['total'] or 0
+        # Total expenses (all time)
+        total_expenses = converter.sum_transactions(Expense.objects.all())
 
         # Active wallets count
         active_wallets = Wallet.objects.filter(
             is_active=True
         ).count()
 
-        # Monthly income (current month, in RWF)
-        monthly_income = Income.objects.filter(
+        # Monthly income (current month)
+        monthly_income = converter.sum_transactions(Income.objects.filter(
             # user=user,
-            date__year=today.year,
-            date__month=today.month
-        ).aggregate(total=Sum('amount_rwf'))['total'] or 0
+            **month_range_filters(today.year, today.month)
+        ))
 
-        # Monthly expenses (current month, in RWF)
-        monthly_expenses = Expense.objects.filter(
+        # Monthly expenses (current month)
+        monthly_expenses = converter.sum_transactions(Expense.objects.filter(
             # user=user,
-            date__year=today.year,
-            date__month=today.month
-        ).aggregate(total=Sum('amount_rwf'))['total'] or 0
+            **month_range_filters(today.year, today.month)
+        ))
 
         # Net monthly (income - expenses for current month)
         net_monthly = Decimal(str(monthly_income)) - Decimal(str(monthly_expenses))
@@ -1064,5 +1719,6 @@ class DashboardStatsView(APIView):
             'monthly_income': str(monthly_income),
             'monthly_expenses': str(monthly_expenses),
             'net_monthly': str(net_monthly),
-            'currency': 'RWF'
+            'currency': converter.code,
+            'rates': converter.mode
         })
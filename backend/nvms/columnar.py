@@ -0,0 +1,148 @@
+"""
+Columnar JSON payloads for chart-heavy list endpoints
+
+`?format=columnar` returns one array per field instead of an array of
+objects, built straight from values_list() without serializer instances:
+
+    {
+        "count": 3,
+        "columns": {"id": [3, 2, 1], "wallet": [0, 0, 1], ...},
+        "dictionaries": {"wallet": {"id": [4, 7], "name": ["Cash", "Bank"]}}
+    }
+
+Foreign keys listed in `columnar_dictionaries` are dictionary-encoded: the
+column holds indexes into the matching dictionary, which carries each
+related object's id and label fields once. Amounts are JSON numbers.
+
+List endpoints are paginated like the JSON list, with larger pages
+(COLUMNAR_PAGE_SIZE rows, `?page_size=` up to COLUMNAR_MAX_PAGE_SIZE):
+`count` is then the number of matching rows and `next`/`previous` link the
+other pages, as in the paginated JSON.
+"""
+from django.conf import settings
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .fieldsets import parse_field_list
+from .renderers import ColumnarJSONRenderer
+
+COLUMNAR_FORMAT = ColumnarJSONRenderer.format
+
+# Rows per page of a columnar list (charts want more than the JSON page)
+COLUMNAR_PAGE_SIZE = getattr(settings, 'COLUMNAR_PAGE_SIZE', 5000)
+COLUMNAR_MAX_PAGE_SIZE = getattr(settings, 'COLUMNAR_MAX_PAGE_SIZE', 20000)
+
+# For @action(renderer_classes=...) on endpoints that support ?format=columnar
+COLUMNAR_RENDERER_CLASSES = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
+
+
+def wants_columnar(request) -> bool:
+    """Whether content negotiation picked the columnar renderer"""
+    renderer = getattr(request, 'accepted_renderer', None)
+    return getattr(renderer, 'format', None) == COLUMNAR_FORMAT
+
+
+def dictionary_encode(values):
+    """
+    Replace values with indexes into a list of distinct values, in order of
+    first appearance. None stays None.
+    """
+    index = {}
+    codes = []
+    for value in values:
+        if value is None:
+            codes.append(None)
+            continue
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(index)
+        codes.append(code)
+    return codes, list(index)
+
+
+def rows_to_columns(rows, fields) -> dict:
+    """Columnar payload from already computed rows (dicts)"""
+    return {
+        'count': len(rows),
+        'columns': {field: [row[field] for row in rows] for field in fields},
+        'dictionaries': {},
+    }
+
+
+def values_to_columns(model, rows, fields, dictionaries=None) -> dict:
+    """
+    Columnar payload for values_list() rows of `model`. `dictionaries` maps
+    foreign key fields (which must also be in `fields`) to the related
+    fields describing them.
+    """
+    dictionaries = {name: labels for name, labels in (dictionaries or {}).items() if name in fields}
+
+    # Transpose in C rather than appending value by value
+    transposed = zip(*rows) if rows else ([] for _ in fields)
+    columns = {field: list(values) for field, values in zip(fields, transposed)}
+
+    encoded = {}
+    for name, label_fields in dictionaries.items():
+        columns[name], ids = dictionary_encode(columns[name])
+        related_model = model._meta.get_field(name).related_model
+        labels = {
+            pk: values for pk, *values in
+            related_model._base_manager.filter(pk__in=ids).values_list('pk', *label_fields)
+        }
+        missing = [None] * len(label_fields)
+        encoded[name] = {'id': ids}
+        for position, label in enumerate(label_fields):
+            encoded[name][label] = [labels.get(pk, missing)[position] for pk in ids]
+
+    return {'count': len(rows), 'columns': columns, 'dictionaries': encoded}
+
+
+class ColumnarPagination(PageNumberPagination):
+    """Pages of a columnar list: `count`/`next`/`previous` around the columns"""
+    page_size = COLUMNAR_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = COLUMNAR_MAX_PAGE_SIZE
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            **{key: value for key, value in data.items() if key != 'count'},
+        })
+
+
+class ColumnarListMixin:
+    """
+    Adds `?format=columnar` to a viewset's list action. `?fields=` narrows
+    the columns to a subset of `columnar_fields`. Responses are paginated
+    with ColumnarPagination.
+    """
+    columnar_fields = []
+    columnar_dictionaries = {}
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.action == 'list':
+            renderers.append(ColumnarJSONRenderer())
+        return renderers
+
+    def get_columnar_fields(self):
+        requested = parse_field_list(self.request.query_params.get('fields'))
+        if requested:
+            return [field for field in self.columnar_fields if field in requested] or self.columnar_fields
+        return self.columnar_fields
+
+    def list(self, request, *args, **kwargs):
+        if not wants_columnar(request):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).select_related(None)
+        fields = self.get_columnar_fields()
+        paginator = ColumnarPagination()
+        # Only the page's values_list() rows are fetched
+        rows = paginator.paginate_queryset(queryset.values_list(*fields), request, view=self)
+        return paginator.get_paginated_response(
+            values_to_columns(queryset.model, rows, fields, self.columnar_dictionaries)
+        )
@@ -0,0 +1,88 @@
+"""
+Sparse fieldsets and on-demand expansion for DRF serializers
+
+`?fields=id,title,amount` limits a response to the named fields and
+`?expand=wallet,tags` adds the optional nested fields a serializer lists in
+`Meta.expandable_fields`. Viewsets using QueryPlanMixin only join and
+prefetch the relations behind the fields that will actually be rendered.
+"""
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_field_list(value) -> list:
+    """Split a comma separated query parameter into field names"""
+    if not value:
+        return []
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Serializer mixin applying `?fields=` and `?expand=` from the request in
+    the serializer context.
+
+    `Meta.expandable_fields` maps an expand name to a (field name, factory)
+    pair, where the factory returns a new field instance, e.g.
+    `{'wallet': ('wallet_details', lambda: WalletSerializer(source='wallet', read_only=True))}`.
+    Only the top-level serializer is affected; nested serializers render as usual.
+    """
+
+    def _is_root_serializer(self):
+        return self.root is self or getattr(self.root, 'child', None) is self
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS or not self._is_root_serializer():
+            return fields
+
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        expanded = []
+        for name in parse_field_list(request.query_params.get('expand')):
+            if name in expandable:
+                field_name, factory = expandable[name]
+                fields[field_name] = factory()
+                expanded.append(field_name)
+
+        requested = parse_field_list(request.query_params.get('fields'))
+        if requested:
+            keep = set(requested) | set(expanded)
+            for field_name in list(fields):
+                if field_name not in keep:
+                    fields.pop(field_name)
+        return fields
+
+
+class QueryPlanMixin:
+    """
+    Viewset mixin that builds select_related/prefetch_related from the fields
+    the serializer will render, so unrequested relations cost no joins.
+
+    `select_related_fields` and `prefetch_related_fields` map serializer
+    field names to the lookups they need.
+    """
+    select_related_fields = {}
+    prefetch_related_fields = {}
+
+    def get_rendered_field_names(self) -> set:
+        """Names of the fields the serializer for this request will output"""
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        return {
+            name for name, field in serializer.fields.items()
+            if not field.write_only
+        }
+
+    def apply_query_plan(self, queryset):
+        """Add the joins and prefetches needed by the rendered fields"""
+        names = self.get_rendered_field_names()
+        select_related = []
+        prefetch_related = []
+        for name in sorted(names):
+            select_related.extend(self.select_related_fields.get(name, ()))
+            prefetch_related.extend(self.prefetch_related_fields.get(name, ()))
+
+        if select_related:
+            queryset = queryset.select_related(*dict.fromkeys(select_related))
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*dict.fromkeys(prefetch_related))
+        return queryset
@@ -0,0 +1,155 @@
+"""
+Request-scoped memoization of computed model properties
+
+A property decorated with `memoized_property` is computed once per saved
+row per request: serializers, admin columns and derived properties that
+read it again get the stored value. Values live in a scope opened by
+RequestMemoMiddleware (or `memo_scope()` in commands and tests) and are
+dropped with it; outside a scope the property is computed on every access,
+as a plain property would be.
+
+Saving or deleting a row drops its memoized values. Properties computed
+from other models name them in `depends_on`, e.g.
+`@memoized_property(depends_on=['wallet.Expense'])`; saving or deleting
+any row of those models drops every value of the property in the scope.
+Changes that skip signals (QuerySet.update(), bulk_create()) don't.
+
+With MEMO_DEBUG (default: DEBUG) every request logs how often each
+property was computed and served from the scope, and the response gets an
+X-Memo-Report header with the same counts.
+"""
+import contextvars
+import logging
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+MEMO_DEBUG = getattr(settings, 'MEMO_DEBUG', settings.DEBUG)
+
+_current_scope = contextvars.ContextVar('memo_scope', default=None)
+
+
+class MemoScope:
+    """Memoized values of one request, with computation and hit counts"""
+
+    def __init__(self):
+        # property → {pk: value}
+        self.values = defaultdict(dict)
+        # (property label, pk) → times computed / served from the scope
+        self.computed = Counter()
+        self.hits = Counter()
+
+    def report(self) -> list:
+        """
+        Per property: rows, computations, hits and recomputations (rows
+        computed more than once, i.e. invalidated and read again)
+        """
+        rows = defaultdict(lambda: {'rows': 0, 'computed': 0, 'hits': 0, 'recomputed': 0})
+        for (label, _pk), count in self.computed.items():
+            row = rows[label]
+            row['rows'] += 1
+            row['computed'] += count
+            row['recomputed'] += count - 1
+        for (label, _pk), count in self.hits.items():
+            rows[label]['hits'] += count
+        return [{'property': label, **counts} for label, counts in sorted(rows.items())]
+
+
+def current_scope():
+    """The active MemoScope, or None outside a request"""
+    return _current_scope.get()
+
+
+@contextmanager
+def memo_scope():
+    """Open a memoization scope (nested scopes start empty)"""
+    scope = MemoScope()
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+
+
+class memoized_property:
+    """
+    Read-only property memoized per row for the current scope. Use bare
+    (`@memoized_property`) or with `depends_on=['app_label.Model', ...]`.
+    """
+
+    def __init__(self, func=None, depends_on=()):
+        self.func = func
+        self.depends_on = set(depends_on)
+        if func is not None:
+            self.__doc__ = func.__doc__
+
+    def __call__(self, func):
+        # @memoized_property(depends_on=[...]) form
+        self.func = func
+        self.__doc__ = func.__doc__
+        return self
+
+    def __set_name__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    @property
+    def label(self):
+        return f"{self.owner.__name__}.{self.name}"
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        scope = _current_scope.get()
+        if scope is None or instance.pk is None:
+            return self.func(instance)
+
+        values = scope.values[self]
+        key = (self.label, instance.pk)
+        if instance.pk in values:
+            scope.hits[key] += 1
+            return values[instance.pk]
+        value = values[instance.pk] = self.func(instance)
+        scope.computed[key] += 1
+        return value
+
+    def __set__(self, instance, value):
+        raise AttributeError(f"{self.label} is read-only")
+
+
+def _invalidate(sender, instance, **kwargs):
+    scope = _current_scope.get()
+    if scope is None or not scope.values:
+        return
+    label = sender._meta.label
+    for prop in list(scope.values):
+        if label in prop.depends_on:
+            scope.values[prop].clear()
+        elif isinstance(instance, prop.owner):
+            scope.values[prop].pop(instance.pk, None)
+
+
+post_save.connect(_invalidate, dispatch_uid='nvms.memo.invalidate_on_save')
+post_delete.connect(_invalidate, dispatch_uid='nvms.memo.invalidate_on_delete')
+
+
+class RequestMemoMiddleware:
+    """Open a memoization scope per request (and report it with MEMO_DEBUG)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with memo_scope() as scope:
+            response = self.get_response(request)
+            if MEMO_DEBUG and scope.computed:
+                report = scope.report()
+                logger.debug(f"Memoized properties for {request.method} {request.path}: {report}")
+                response['X-Memo-Report'] = ', '.join(
+                    f"{row['property']}={row['computed']}/{row['hits']}" for row in report
+                )
+        return response
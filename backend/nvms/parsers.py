@@ -0,0 +1,27 @@
+"""
+Fast JSON parsing for Django REST Framework
+
+Uses orjson when it is installed and falls back to DRF's JSONParser otherwise.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser, get_encoding
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser backed by orjson, with the stdlib parser as fallback"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+
+        # orjson only decodes UTF-8 and always rejects NaN/Infinity
+        encoding = get_encoding(parser_context).lower().replace('-', '')
+        if orjson is None or encoding != 'utf8' or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,112 @@
+"""
+Fast JSON rendering for Django REST Framework
+
+Uses orjson when it is installed and falls back to DRF's stdlib-based
+JSONRenderer otherwise, producing the same output either way.
+"""
+from django.http import StreamingHttpResponse
+from rest_framework.utils import encoders
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    # Types orjson doesn't handle natively (Decimal, lazy strings, querysets),
+    # plus datetimes so they are formatted exactly like DRF's encoder does
+    return encoders.JSONEncoder().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson, with the stdlib renderer as fallback"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # orjson output is always compact UTF-8
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            option |= orjson.OPT_INDENT_2
+
+        try:
+            ret = orjson.dumps(data, default=_default, option=option)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Match JSONRenderer, which always escapes \u2028 and \u2029
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class ColumnarJSONRenderer(FastJSONRenderer):
+    """
+    Selected with `?format=columnar` (or its media type in Accept) on views
+    that build a columnar payload, see nvms.columnar
+    """
+    media_type = 'application/vnd.nvms.columnar+json'
+    format = 'columnar'
+
+
+_renderer = FastJSONRenderer()
+
+
+def render_json(data) -> bytes:
+    """Render data to JSON bytes with the project renderer"""
+    return _renderer.render(data)
+
+
+def stream_json_array(queryset, serializer_class, context=None, chunk_size=500):
+    """
+    Yield a JSON array of serialized objects chunk by chunk, so the full
+    list is never held in memory as objects or as one rendered string
+    """
+    yield b'['
+    first = True
+    batch = []
+
+    def render_batch(objects):
+        data = serializer_class(objects, many=True, context=context).data
+        return b','.join(render_json(item) for item in data)
+
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        batch.append(obj)
+        if len(batch) >= chunk_size:
+            yield (b'' if first else b',') + render_batch(batch)
+            first = False
+            batch = []
+    if batch:
+        yield (b'' if first else b',') + render_batch(batch)
+    yield b']'
+
+
+class StreamingListMixin:
+    """
+    `?stream=true` on a list endpoint streams the whole filtered queryset as
+    an unpaginated JSON array, rendered incrementally in chunks
+    """
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('stream') != 'true':
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            stream_json_array(
+                queryset,
+                self.get_serializer_class(),
+                self.get_serializer_context(),
+                self.stream_chunk_size
+            ),
+            content_type='application/json'
+        )
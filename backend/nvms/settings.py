@@ -71,6 +71,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'nvms.memo.RequestMemoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -117,6 +118,51 @@ else:
 
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Redis when REDIS_URL is set (production); otherwise a cache shared by all
+# worker processes on the host, so rates and reports are computed once per
+# host rather than once per worker.
+REDIS_URL = config('REDIS_URL', default='')
+CACHE_BACKEND = config('CACHE_BACKEND', default='redis' if REDIS_URL else 'file')
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'nvms',
+        }
+    }
+elif CACHE_BACKEND == 'database':
+    # Requires `python manage.py createcachetable`
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'nvms_cache',
+            'KEY_PREFIX': 'nvms',
+        }
+    }
+elif CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'KEY_PREFIX': 'nvms',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_DIR', default=str(BASE_DIR / '.cache')),
+            'KEY_PREFIX': 'nvms',
+            'OPTIONS': {
+                'MAX_ENTRIES': 5000,
+            },
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -158,6 +204,35 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Receipts, project documents and note images use content-addressed storage
+# (deduplicated by SHA-256): 'local' keeps them under MEDIA_ROOT, 's3' uses any
+# S3-compatible endpoint such as MinIO (requires django-storages[s3])
+MEDIA_STORAGE = config('MEDIA_STORAGE', default='local')
+
+if MEDIA_STORAGE == 's3':
+    CONTENT_STORAGE = {
+        'BACKEND': 'apps.wallet.storage.ContentAddressedS3Storage',
+        'OPTIONS': {
+            'bucket_name': config('S3_BUCKET_NAME', default='nvms-media'),
+            'endpoint_url': config('S3_ENDPOINT_URL', default=None),
+            'access_key': config('S3_ACCESS_KEY', default=None),
+            'secret_key': config('S3_SECRET_KEY', default=None),
+            'region_name': config('S3_REGION', default=None),
+            'default_acl': None,
+            'querystring_auth': True,
+        },
+    }
+else:
+    CONTENT_STORAGE = {
+        'BACKEND': 'apps.wallet.storage.ContentAddressedFileSystemStorage',
+    }
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'content': CONTENT_STORAGE,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -175,7 +250,12 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'nvms.renderers.FastJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'nvms.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
@@ -191,6 +271,13 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Browsers may send Idempotency-Key on transaction-creating POSTs
+from corsheaders.defaults import default_headers
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
+# Idempotency keys are replayable for 24 hours
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=60 * 60 * 24, cast=int)
+
 # SimpleJWT Configuration
 from datetime import timedelta
 
@@ -223,5 +310,8 @@ SIMPLE_JWT = {
 EXCHANGE_RATE_API_KEY = config('EXCHANGE_RATE_API_KEY', default='589d2e78ed29b70fe39b0e88')
 EXCHANGE_RATE_CACHE_DURATION = 3600  # 1 hour in seconds
 
+# Tagged response cache for dashboard/analytics endpoints (invalidated by signals)
+RESPONSE_CACHE_DURATION = config('RESPONSE_CACHE_DURATION', default=300, cast=int)  # 5 minutes
+
 # Custom user model (if needed later)
 # AUTH_USER_MODEL = 'authentication.CustomUser'
@@ -424,9 +424,7 @@ const Expenses: React.FC = () => {
                     <option value="">Select wallet</option>
                     {referenceData?.wallets.map((wallet) => (
                       <option key={wallet.id} value={wallet.id}>
-                        {wallet.name} (
-                        {currencyMap.get(wallet.currency)?.symbol || "$"}
-                        {wallet.balance})
+                        {wallet.name} ({wallet.currency_code})
                       </option>
                     ))}
                   </select>
@@ -412,8 +412,7 @@ const Income: React.FC = () => {
                     <option value="">Select wallet</option>
                     {referenceData?.wallets.map((wallet) => (
                       <option key={wallet.id} value={wallet.id}>
-                        {wallet.name} ({wallet.currency_symbol}
-                        {wallet.balance})
+                        {wallet.name} ({wallet.currency_code})
                       </option>
                     ))}
                   </select>